@@ -0,0 +1,304 @@
+# Analisador offline dos templates de images/.
+#
+# Para cada template:
+#   - remove as margens de cor uniforme (de forma simétrica, para não mudar o
+#     centro usado nos cliques);
+#   - mede o quanto ele é único nas telas gravadas (sessões de logs/sessao_*.zip
+#     ou capturas .png): melhor score, segundo melhor pico em outro lugar e a
+#     margem entre eles;
+#   - agrupa templates quase idênticos, escolhendo um representante que é
+#     verificado contra todos os membros do grupo (um membro que não aparece
+#     em nenhuma tela não é juntado: fica como "não verificado" no relatório).
+#
+# Gera um conjunto otimizado de templates, um mapa nome original -> template
+# otimizado e um relatório. Nada é alterado em images/.
+#
+# Uso:
+#   python analisar_templates.py --telas output/logs/sessao_20250101_120000.zip capturas/ --saida images_otimizadas
+import argparse
+import glob
+import json
+import os
+import zipfile
+
+import cv2
+import numpy as np
+
+
+limiar = 0.7  # Mesmo limite usado pela macro
+limiar_duplicata = 0.95  # Score mínimo entre dois templates para considerá-los o mesmo
+tolerancia_margem = 2  # Diferença máxima de tom para uma linha/coluna contar como uniforme
+lado_minimo = 8  # Menor lado que um template pode ter depois do corte
+
+
+def carregar_templates(diretorio):
+    """Carrega todos os templates .png do diretório, em escala de cinza"""
+    carregados = {}
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "*.png"))):
+        imagem = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+        if imagem is not None:
+            carregados[os.path.basename(caminho)] = imagem
+    return carregados
+
+
+def carregar_telas(caminhos):
+    """
+    Carrega as telas de referência: arquivos de sessão (.zip gravados pela
+    macro), imagens .png ou diretórios com imagens .png.
+
+    Returns:
+        list: (nome, tela em escala de cinza)
+    """
+    telas = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            telas.extend(carregar_telas(sorted(glob.glob(os.path.join(caminho, "*.png")))))
+        elif caminho.lower().endswith(".zip"):
+            with zipfile.ZipFile(caminho) as arquivo:
+                for nome in sorted(arquivo.namelist()):
+                    if nome.startswith("quadros/") and nome.endswith(".png"):
+                        dados = np.frombuffer(arquivo.read(nome), dtype=np.uint8)
+                        tela = cv2.imdecode(dados, cv2.IMREAD_GRAYSCALE)
+                        if tela is not None:
+                            telas.append((f"{os.path.basename(caminho)}:{nome}", tela))
+        else:
+            tela = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+            if tela is not None:
+                telas.append((os.path.basename(caminho), tela))
+    return telas
+
+
+def _uniforme(faixa, cor):
+    return int(np.abs(faixa.astype(np.int16) - cor).max()) <= tolerancia_margem
+
+
+def cortar_margens(template):
+    """
+    Remove margens uniformes, o mesmo tanto dos dois lados de cada eixo, para
+    que o centro do template continue no mesmo ponto.
+
+    Returns:
+        tuple: (template cortado, corte horizontal, corte vertical) - cortes por lado, em pixels
+    """
+    altura, largura = template.shape
+    cor = int(np.median(np.concatenate([template[0], template[-1], template[:, 0], template[:, -1]])))
+
+    def margem(linhas):
+        quantidade = 0
+        for linha in linhas:
+            if not _uniforme(linha, cor):
+                break
+            quantidade += 1
+        return quantidade
+
+    corte_y = min(margem(template), margem(template[::-1]), max((altura - lado_minimo) // 2, 0))
+    corte_x = min(margem(template.T), margem(template.T[::-1]), max((largura - lado_minimo) // 2, 0))
+    return template[corte_y:altura - corte_y, corte_x:largura - corte_x], corte_x, corte_y
+
+
+def _dois_melhores(mapa, altura, largura):
+    """Melhor pico do mapa e o melhor pico fora da vizinhança dele"""
+    _, melhor, _, (x, y) = cv2.minMaxLoc(mapa)
+    copia = mapa.copy()
+    copia[max(0, y - altura // 2):y + altura // 2 + 1, max(0, x - largura // 2):x + largura // 2 + 1] = -1
+    segundo = cv2.minMaxLoc(copia)[1] if copia.size else -1.0
+    return melhor, segundo
+
+
+def unicidade(template, telas):
+    """
+    Mede o quanto o template se destaca nas telas gravadas.
+
+    Returns:
+        dict: telas onde foi encontrado, pior margem entre o melhor e o segundo
+              pico e telas com mais de um ponto acima do limite (ambíguas)
+    """
+    altura, largura = template.shape
+    encontradas = 0
+    ambiguas = []
+    menor_margem = None
+    for nome, tela in telas:
+        if tela.shape[0] < altura or tela.shape[1] < largura:
+            continue
+        mapa = cv2.matchTemplate(tela, template, cv2.TM_CCOEFF_NORMED)
+        melhor, segundo = _dois_melhores(mapa, altura, largura)
+        if melhor < limiar:
+            continue
+        encontradas += 1
+        margem = melhor - segundo
+        menor_margem = margem if menor_margem is None else min(menor_margem, margem)
+        if segundo >= limiar:
+            ambiguas.append(nome)
+    return {"telas_encontrado": encontradas, "menor_margem": menor_margem, "telas_ambiguas": ambiguas}
+
+
+def similaridade(a, b):
+    """Score do menor template dentro do maior (-1 se nenhum cabe no outro)"""
+    if a.shape[0] <= b.shape[0] and a.shape[1] <= b.shape[1]:
+        menor, maior = a, b
+    elif b.shape[0] <= a.shape[0] and b.shape[1] <= a.shape[1]:
+        menor, maior = b, a
+    else:
+        return -1.0
+    # Só compara templates de tamanhos parecidos
+    if menor.size < 0.8 * maior.size:
+        return -1.0
+    return cv2.minMaxLoc(cv2.matchTemplate(maior, menor, cv2.TM_CCOEFF_NORMED))[1]
+
+
+def agrupar_duplicatas(cortados, telas):
+    """
+    Agrupa templates quase idênticos. O representante de cada grupo é o
+    menor template do grupo; ele só substitui um membro se o membro for
+    encontrado em ao menos uma tela e o representante for encontrado, no
+    mesmo lugar, em todas as telas onde o membro é encontrado.
+
+    Returns:
+        tuple: (representantes, nao_verificados)
+               representantes: nome -> nome do representante (o próprio nome
+               se o membro não foi juntado)
+               nao_verificados: membro -> representante candidato, para os
+               membros que nenhuma tela permitiu verificar
+    """
+    nomes = sorted(cortados)
+    pai = {nome: nome for nome in nomes}
+
+    def raiz(nome):
+        while pai[nome] != nome:
+            pai[nome] = pai[pai[nome]]
+            nome = pai[nome]
+        return nome
+
+    for i, a in enumerate(nomes):
+        for b in nomes[i + 1:]:
+            if similaridade(cortados[a], cortados[b]) >= limiar_duplicata:
+                pai[raiz(b)] = raiz(a)
+
+    grupos = {}
+    for nome in nomes:
+        grupos.setdefault(raiz(nome), []).append(nome)
+
+    representantes = {}
+    nao_verificados = {}
+    for membros in grupos.values():
+        candidato = min(membros, key=lambda nome: (cortados[nome].size, nome))
+        for nome in membros:
+            valido = nome == candidato or _representante_valido(cortados[candidato], cortados[nome], telas)
+            representantes[nome] = candidato if valido else nome
+            if valido is None:
+                nao_verificados[nome] = candidato
+    return representantes, nao_verificados
+
+
+def _representante_valido(representante, membro, telas):
+    """
+    Verifica se o representante é encontrado onde o membro é encontrado, no mesmo lugar.
+
+    Returns:
+        True se isso foi confirmado em ao menos uma tela, False se falhou em
+        alguma tela (ou se os templates não são quase idênticos), None se
+        nenhuma tela contém o membro
+    """
+    if similaridade(representante, membro) < limiar_duplicata:
+        return False
+    verificadas = 0
+    for _, tela in telas:
+        if tela.shape[0] < membro.shape[0] or tela.shape[1] < membro.shape[1]:
+            continue
+        _, score_membro, _, local_membro = cv2.minMaxLoc(cv2.matchTemplate(tela, membro, cv2.TM_CCOEFF_NORMED))
+        if score_membro < limiar:
+            continue
+        _, score_rep, _, local_rep = cv2.minMaxLoc(cv2.matchTemplate(tela, representante, cv2.TM_CCOEFF_NORMED))
+        distancia = abs(local_rep[0] - local_membro[0]) + abs(local_rep[1] - local_membro[1])
+        if score_rep < limiar or distancia > max(membro.shape):
+            return False
+        verificadas += 1
+    return True if verificadas else None
+
+
+def analisar(diretorio_imagens, caminhos_telas, diretorio_saida):
+    """
+    Analisa os templates e grava o conjunto otimizado, o mapa de nomes e o relatório.
+
+    Returns:
+        str: Caminho do relatório
+    """
+    originais = carregar_templates(diretorio_imagens)
+    telas = carregar_telas(caminhos_telas)
+    print(f"{len(originais)} templates, {len(telas)} reference screens")
+
+    cortados = {}
+    resultados = {}
+    for nome, template in originais.items():
+        cortado, corte_x, corte_y = cortar_margens(template)
+        cortados[nome] = cortado
+        resultados[nome] = {
+            "tamanho_original": list(template.shape[::-1]),
+            "tamanho_otimizado": list(cortado.shape[::-1]),
+            "corte_por_lado": [corte_x, corte_y],
+            "pixels_economizados": int(template.size - cortado.size),
+        }
+        if telas:
+            resultados[nome].update(unicidade(cortado, telas))
+
+    representantes, nao_verificados = agrupar_duplicatas(cortados, telas)
+
+    os.makedirs(diretorio_saida, exist_ok=True)
+    for nome in sorted(set(representantes.values())):
+        cv2.imwrite(os.path.join(diretorio_saida, nome), cortados[nome])
+    # Os membros não verificados ficam fora do mapa: a decisão sobre eles é manual
+    mapa = {nome: representante for nome, representante in representantes.items() if nome not in nao_verificados}
+    with open(os.path.join(diretorio_saida, "mapa_templates.json"), "w", encoding="utf-8") as f:
+        json.dump(mapa, f, indent=2, sort_keys=True)
+
+    caminho_relatorio = os.path.join(diretorio_saida, "relatorio_templates.txt")
+    with open(caminho_relatorio, "w", encoding="utf-8") as f:
+        _escrever_relatorio(f, resultados, representantes, nao_verificados, len(telas))
+    print(f"✅ Report written to {caminho_relatorio}")
+    return caminho_relatorio
+
+
+def _escrever_relatorio(f, resultados, representantes, nao_verificados, total_telas):
+    economia = sum(r["pixels_economizados"] for r in resultados.values())
+    total = sum(r["tamanho_original"][0] * r["tamanho_original"][1] for r in resultados.values())
+    f.write("TEMPLATE ANALYSIS REPORT\n")
+    f.write(f"Templates: {len(resultados)} -> {len(set(representantes.values()))} after merging near-duplicates\n")
+    f.write(f"Reference screens: {total_telas}\n")
+    f.write(f"Pixels removed by trimming: {economia} of {total} ({economia / max(total, 1):.1%})\n\n")
+
+    f.write("TRIMMED TEMPLATES (center unchanged; top-left moves by the trim per side)\n")
+    for nome, r in sorted(resultados.items()):
+        if r["pixels_economizados"]:
+            f.write(f"  {nome}: {r['tamanho_original'][0]}x{r['tamanho_original'][1]} -> "
+                    f"{r['tamanho_otimizado'][0]}x{r['tamanho_otimizado'][1]} "
+                    f"(trim x={r['corte_por_lado'][0]}, y={r['corte_por_lado'][1]})\n")
+
+    f.write("\nNEAR-DUPLICATES (member -> representative)\n")
+    for nome, representante in sorted(representantes.items()):
+        if nome != representante:
+            f.write(f"  {nome} -> {representante}\n")
+
+    if nao_verificados:
+        f.write("\nUNVERIFIED NEAR-DUPLICATES (not found in any reference screen; not merged, left out of mapa_templates.json)\n")
+        for nome, candidato in sorted(nao_verificados.items()):
+            f.write(f"  {nome} -> {candidato}?\n")
+
+    if total_telas:
+        f.write(f"\nUNIQUENESS (threshold {limiar})\n")
+        for nome, r in sorted(resultados.items(), key=lambda item: (item[1]["menor_margem"] is None,
+                                                                    item[1]["menor_margem"] or 0)):
+            margem = "-" if r["menor_margem"] is None else f"{r['menor_margem']:.2f}"
+            alerta = "  AMBIGUOUS" if r["telas_ambiguas"] else ""
+            f.write(f"  {nome}: found in {r['telas_encontrado']} screens, smallest margin {margem}{alerta}\n")
+            for tela in r["telas_ambiguas"][:5]:
+                f.write(f"      second match above threshold in {tela}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze and optimize the template images")
+    parser.add_argument("--imagens", default="images", help="Template directory")
+    parser.add_argument("--telas", nargs="*", default=[],
+                        help="Recorded sessions (.zip), screenshots (.png) or directories of screenshots")
+    parser.add_argument("--saida", default="images_otimizadas", help="Output directory")
+    args = parser.parse_args()
+    analisar(args.imagens, args.telas, args.saida)
@@ -0,0 +1,703 @@
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+import cv2
+import numpy as np
+import pyautogui
+
+try:
+    from PIL import ImageGrab
+except ImportError:
+    ImageGrab = None
+
+
+# Variáveis globais de configuração da captura (podem ser alteradas pelo GUI)
+# "regiao": captura apenas o retângulo pedido
+# "tela_cheia": captura a tela inteira e recorta (comportamento antigo)
+# "xshm": leitura direta do framebuffer X11 via memória compartilhada (Linux)
+backend_captura = "regiao"
+
+# Instância do backend XShm (criada na primeira captura com backend_captura = "xshm")
+_backend_xshm = None
+
+# Modo de espera entre verificações de esperarPor
+# "intervalo": dorme um intervalo fixo entre verificações
+# "damage": no X11, acorda somente quando pixels mudam nas regiões observadas (XDamage)
+modo_espera = "intervalo"
+
+# Instância do monitor XDamage (criada na primeira espera com modo_espera = "damage")
+_monitor_damage = None
+
+# Gravação de sessão e reprodução (ver iniciar_gravacao / iniciar_replay)
+_gravador = None
+_replay = None
+
+# Janela de referência das coordenadas relativas (ver fixar_janela).
+# Sem janela fixada, as coordenadas relativas se referem à tela inteira.
+intervalo_validacao_janela = 2.0
+_localizar_janela = None
+_janela_referencia = None
+_instante_validacao_janela = 0.0
+
+# Janela de validade (em segundos) das capturas reaproveitadas entre chamadas
+# consecutivas de visão. Use 0 para desativar o cache.
+janela_cache = 0.15
+
+# Número máximo de regiões mantidas no cache
+max_regioes_cache = 8
+
+# Cache de capturas recentes: lista de (instante, (inicio_x, inicio_y, fim_x, fim_y), regiao_gray)
+_cache_quadros = []
+_lock_cache = threading.Lock()  # buscas podem rodar em paralelo (ver correspondencia.executar_em_paralelo)
+
+# Captura contínua em segundo plano (opcional, ver iniciar_captura_continua)
+fps_captura_continua = 10
+tamanho_buffer_quadros = 30
+
+# Buffer circular de quadros da tela inteira: deque de (instante, quadro_gray)
+_buffer_quadros = deque(maxlen=tamanho_buffer_quadros)
+_thread_captura = None
+_parar_thread = threading.Event()
+
+# Instante (time.monotonic) da última ação de entrada executada
+_instante_ultima_entrada = 0.0
+
+# Ponteiro do mouse: altura (em pixels) abaixo do ponto do cursor que pode cobrir
+# ou destacar (hover) conteúdo, e quanto o limite de correspondência é reduzido nessa faixa
+altura_cursor = 32
+tolerancia_cursor = 0.1
+
+# Última posição do mouse informada por uma ação de entrada (usada no replay)
+_ultima_posicao_mouse = None
+
+
+def tamanho_tela():
+    """
+    Retorna as dimensões da tela principal em pixels.
+
+    Returns:
+        tuple: (largura, altura)
+    """
+    if _replay is not None:
+        return _replay.largura_tela, _replay.altura_tela
+    largura, altura = pyautogui.size()
+    return int(largura), int(altura)
+
+
+def limites_tela():
+    """
+    Retorna os limites da área de trabalho virtual (todos os monitores). No
+    Windows, monitores à esquerda ou acima do principal têm coordenadas
+    negativas; nas outras plataformas, usa a tela principal.
+
+    Returns:
+        tuple: (inicio_x, inicio_y, fim_x, fim_y) em pixels
+    """
+    largura, altura = tamanho_tela()
+    if _replay is None and sys.platform == "win32":
+        try:
+            import ctypes
+            metricas = ctypes.windll.user32.GetSystemMetrics
+            # SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN
+            x0, y0, largura_virtual, altura_virtual = (metricas(i) for i in (76, 77, 78, 79))
+            if largura_virtual > 0 and altura_virtual > 0:
+                return x0, y0, x0 + largura_virtual, y0 + altura_virtual
+        except (AttributeError, OSError):
+            pass
+    return 0, 0, largura, altura
+
+
+def calcular_regiao(iniX, iniY, fimX, fimY, largura, altura):
+    """
+    Converte coordenadas relativas (0 a 1) em um retângulo absoluto da tela,
+    limitado às dimensões da tela.
+
+    Args:
+        iniX, iniY, fimX, fimY: Coordenadas relativas da região
+        largura, altura: Dimensões da tela em pixels
+
+    Returns:
+        tuple: (inicio_x, inicio_y, fim_x, fim_y) em pixels
+    """
+    inicio_x = min(max(int(largura * iniX), 0), largura)
+    fim_x = min(max(int(largura * fimX), inicio_x), largura)
+    inicio_y = min(max(int(altura * iniY), 0), altura)
+    fim_y = min(max(int(altura * fimY), inicio_y), altura)
+    return inicio_x, inicio_y, fim_x, fim_y
+
+
+def fixar_janela(localizar):
+    """
+    Passa a interpretar todas as coordenadas relativas (iniX, iniY, fimX, fimY)
+    em relação a uma janela em vez da tela inteira. A posição da janela é
+    revalidada a cada intervalo_validacao_janela segundos.
+
+    Args:
+        localizar: Função sem argumentos que retorna (inicio_x, inicio_y, fim_x, fim_y)
+                   da janela em pixels, ou None se ela não for encontrada
+
+    Returns:
+        tuple: Retângulo encontrado, ou None (coordenadas relativas à tela inteira)
+    """
+    global _localizar_janela, _janela_referencia, _instante_validacao_janela
+    _localizar_janela = localizar
+    _janela_referencia = localizar()
+    _instante_validacao_janela = time.monotonic()
+    invalidar_cache()
+    return _janela_referencia
+
+
+def soltar_janela():
+    """Volta a interpretar as coordenadas relativas em relação à tela inteira"""
+    global _localizar_janela, _janela_referencia
+    _localizar_janela = None
+    _janela_referencia = None
+
+
+def retangulo_referencia(largura=None, altura=None):
+    """
+    Retorna o retângulo ao qual as coordenadas relativas se referem: a janela
+    fixada (revalidada se o intervalo de validação passou) ou a tela inteira.
+
+    Args:
+        largura, altura: Dimensões da tela (opcional, evita consultar de novo)
+
+    Returns:
+        tuple: (inicio_x, inicio_y, fim_x, fim_y) em pixels
+    """
+    global _janela_referencia, _instante_validacao_janela
+    if largura is None:
+        largura, altura = tamanho_tela()
+
+    if _localizar_janela is not None and _replay is None:
+        agora = time.monotonic()
+        if agora - _instante_validacao_janela >= intervalo_validacao_janela:
+            _instante_validacao_janela = agora
+            janela = _localizar_janela()
+            if janela != _janela_referencia:
+                print(f"Reference window changed: {_janela_referencia} -> {janela}")
+                _janela_referencia = janela
+                invalidar_cache()
+
+    if _janela_referencia is None:
+        return 0, 0, largura, altura
+    return _janela_referencia
+
+
+def regiao_absoluta(iniX, iniY, fimX, fimY, largura=None, altura=None):
+    """
+    Converte coordenadas relativas à janela de referência (ou à tela) em um
+    retângulo absoluto. Sem largura/altura, o retângulo é limitado à área de
+    trabalho virtual (a janela fixada pode estar em outro monitor); com elas,
+    é limitado a um quadro da tela principal desse tamanho.
+
+    Args:
+        iniX, iniY, fimX, fimY: Coordenadas relativas da região
+        largura, altura: Dimensões do quadro da tela principal (opcional)
+
+    Returns:
+        tuple: (inicio_x, inicio_y, fim_x, fim_y) em pixels da tela
+    """
+    if largura is None:
+        limite_x0, limite_y0, limite_x1, limite_y1 = limites_tela()
+        ref_x0, ref_y0, ref_x1, ref_y1 = retangulo_referencia()
+    else:
+        limite_x0, limite_y0, limite_x1, limite_y1 = 0, 0, largura, altura
+        ref_x0, ref_y0, ref_x1, ref_y1 = retangulo_referencia(largura, altura)
+    inicio_x, inicio_y, fim_x, fim_y = calcular_regiao(iniX, iniY, fimX, fimY, ref_x1 - ref_x0, ref_y1 - ref_y0)
+    inicio_x = min(max(inicio_x + ref_x0, limite_x0), limite_x1)
+    fim_x = min(max(fim_x + ref_x0, inicio_x), limite_x1)
+    inicio_y = min(max(inicio_y + ref_y0, limite_y0), limite_y1)
+    fim_y = min(max(fim_y + ref_y0, inicio_y), limite_y1)
+    return inicio_x, inicio_y, fim_x, fim_y
+
+
+def coordenadas_relativas(x, y):
+    """
+    Converte uma posição absoluta da tela em coordenadas relativas à janela de
+    referência (ou à tela), no mesmo sistema usado por iniX/iniY/fimX/fimY.
+
+    Returns:
+        tuple: (x_relativo, y_relativo)
+    """
+    ref_x0, ref_y0, ref_x1, ref_y1 = retangulo_referencia()
+    return (x - ref_x0) / (ref_x1 - ref_x0), (y - ref_y0) / (ref_y1 - ref_y0)
+
+
+def centro_referencia():
+    """Retorna o centro (x, y) da janela de referência (ou da tela) em pixels"""
+    ref_x0, ref_y0, ref_x1, ref_y1 = retangulo_referencia()
+    return (ref_x0 + ref_x1) // 2, (ref_y0 + ref_y1) // 2
+
+
+def _para_cinza(imagem):
+    """Converte uma imagem PIL (RGB/RGBA) em um array NumPy em escala de cinza"""
+    if imagem.mode != "RGB":
+        imagem = imagem.convert("RGB")
+    return cv2.cvtColor(np.asarray(imagem), cv2.COLOR_RGB2GRAY)
+
+
+def _obter_backend_xshm():
+    """
+    Retorna o backend XShm, criando-o na primeira chamada. Se o X11 não estiver
+    disponível, volta para o backend "regiao" e retorna None.
+    """
+    global _backend_xshm, backend_captura
+    if _backend_xshm is None:
+        try:
+            import captura_xshm
+            _backend_xshm = captura_xshm.CapturaXShm()
+        except (OSError, ImportError) as e:
+            print(f"XShm capture backend unavailable ({e}), using region capture")
+            backend_captura = "regiao"
+            return None
+    return _backend_xshm
+
+
+def _capturar_retangulo(inicio_x, inicio_y, fim_x, fim_y):
+    """
+    Captura somente o retângulo pedido usando o backend configurado (ou a
+    sessão em reprodução) e registra a captura se houver gravação ativa.
+
+    Returns:
+        numpy.ndarray: Região capturada em escala de cinza
+    """
+    if fim_x <= inicio_x or fim_y <= inicio_y:
+        return np.zeros((max(fim_y - inicio_y, 0), max(fim_x - inicio_x, 0)), dtype=np.uint8)
+
+    if _replay is not None:
+        return _replay.capturar(inicio_x, inicio_y, fim_x, fim_y)
+
+    regiao_gray = _capturar_do_backend(inicio_x, inicio_y, fim_x, fim_y)
+    if _gravador is not None:
+        _gravador.registrar_quadro((inicio_x, inicio_y, fim_x, fim_y), regiao_gray)
+    return regiao_gray
+
+
+def _capturar_do_backend(inicio_x, inicio_y, fim_x, fim_y):
+    """Captura o retângulo (não vazio) com o backend configurado em backend_captura"""
+    if backend_captura == "xshm":
+        backend = _obter_backend_xshm()
+        if backend is not None:
+            return backend.capturar_cinza(inicio_x, inicio_y, fim_x - inicio_x, fim_y - inicio_y)
+
+    if backend_captura == "tela_cheia":
+        screenshot = np.array(pyautogui.screenshot())
+        regiao = screenshot[inicio_y:fim_y, inicio_x:fim_x]
+        return cv2.cvtColor(regiao, cv2.COLOR_RGB2GRAY)
+
+    if ImageGrab is not None:
+        try:
+            largura, altura = tamanho_tela()
+            if inicio_x < 0 or inicio_y < 0 or fim_x > largura or fim_y > altura:
+                # Fora da tela principal (outro monitor): captura a área de trabalho virtual
+                imagem = ImageGrab.grab(bbox=(inicio_x, inicio_y, fim_x, fim_y), all_screens=True)
+            else:
+                imagem = ImageGrab.grab(bbox=(inicio_x, inicio_y, fim_x, fim_y))
+            return _para_cinza(imagem)
+        except OSError:
+            # Alguns ambientes não suportam ImageGrab, usa o pyautogui como alternativa
+            pass
+
+    imagem = pyautogui.screenshot(region=(inicio_x, inicio_y, fim_x - inicio_x, fim_y - inicio_y))
+    return _para_cinza(imagem)
+
+
+def invalidar_cache():
+    """Descarta todas as capturas em cache (a tela pode ter mudado)"""
+    with _lock_cache:
+        _cache_quadros.clear()
+
+
+def notificar_entrada(acao, *detalhes):
+    """
+    Informa à camada de captura que uma ação de entrada (clique, atalho,
+    tecla, movimento do mouse) foi executada. Invalida o cache de capturas
+    e marca o instante da ação, para que quadros anteriores a ela não sejam
+    mais usados como "tela atual".
+
+    Args:
+        acao: Nome da ação executada (ex: 'left', 'hotkey', 'press')
+        detalhes: Parâmetros da ação (coordenadas, teclas)
+    """
+    global _instante_ultima_entrada, _ultima_posicao_mouse
+    _instante_ultima_entrada = time.monotonic()
+    if len(detalhes) >= 2 and all(isinstance(v, (int, float)) for v in detalhes[:2]):
+        _ultima_posicao_mouse = (int(detalhes[0]), int(detalhes[1]))
+    invalidar_cache()
+    if _gravador is not None:
+        _gravador.registrar_entrada(acao, detalhes)
+
+
+def instante_ultima_entrada():
+    """Retorna o instante (time.monotonic) da última ação de entrada notificada"""
+    return _instante_ultima_entrada
+
+
+def iniciar_gravacao(caminho):
+    """
+    Passa a gravar em um arquivo de sessão (ZIP) todas as capturas feitas e as
+    ações de entrada notificadas, para reprodução posterior com iniciar_replay.
+
+    Args:
+        caminho: Caminho do arquivo de sessão a criar
+    """
+    global _gravador
+    import gravacao
+    parar_gravacao()
+    largura, altura = tamanho_tela()
+    _gravador = gravacao.GravadorSessao(caminho, largura, altura)
+
+
+def parar_gravacao():
+    """Finaliza a gravação em andamento, se houver"""
+    global _gravador
+    if _gravador is not None:
+        _gravador.fechar()
+        _gravador = None
+
+
+def iniciar_replay(caminho):
+    """
+    Passa a servir as capturas a partir de uma sessão gravada, sem acessar a
+    tela. Enquanto o replay estiver ativo as esperas não dormem e as ações de
+    entrada do macro.py não são executadas.
+
+    Args:
+        caminho: Caminho do arquivo de sessão gravado com iniciar_gravacao
+    """
+    global _replay
+    import gravacao
+    parar_replay()
+    _replay = gravacao.FonteReplay(caminho)
+    invalidar_cache()
+
+
+def parar_replay():
+    """Encerra a reprodução da sessão e volta a capturar a tela"""
+    global _replay
+    if _replay is not None:
+        _replay.fechar()
+        _replay = None
+        invalidar_cache()
+
+
+def replay_ativo():
+    """Indica se as capturas estão vindo de uma sessão gravada"""
+    return _replay is not None
+
+
+def relogio():
+    """
+    Retorna o instante atual em segundos, para medir timeouts. Durante o replay,
+    é o relógio virtual da sessão (ver gravacao.FonteReplay).
+
+    Returns:
+        float: Instante em segundos (só as diferenças entre instantes têm significado)
+    """
+    if _replay is not None:
+        return _replay.instante
+    return time.time()
+
+
+def pausar(segundos):
+    """
+    Pausa fixa do fluxo da macro (ex: esperar uma animação da interface). Durante
+    o replay não dorme: só avança o relógio virtual.
+
+    Args:
+        segundos: Duração da pausa
+    """
+    if _replay is None:
+        time.sleep(segundos)
+    else:
+        _replay.avancar(segundos)
+
+
+def posicao_cursor():
+    """
+    Retorna a posição atual do mouse na tela. Durante o replay, retorna a
+    última posição gravada.
+
+    Returns:
+        tuple: (x, y) em pixels, ou None se desconhecida
+    """
+    if _replay is not None:
+        return _ultima_posicao_mouse
+    x, y = pyautogui.position()
+    return int(x), int(y)
+
+
+def faixa_cursor(inicio_x, inicio_y, fim_x, fim_y):
+    """
+    Calcula a faixa de linhas de uma região capturada que pode estar afetada
+    pelo mouse (ponteiro ou destaque de hover da linha sob ele).
+
+    Args:
+        inicio_x, inicio_y, fim_x, fim_y: Retângulo absoluto da região capturada
+
+    Returns:
+        tuple: (y_inicio, y_fim) em coordenadas da região, ou None se o mouse
+               está fora da região
+    """
+    posicao = posicao_cursor()
+    if posicao is None:
+        return None
+    x, y = posicao
+    if not (inicio_x <= x < fim_x and inicio_y - altura_cursor < y < fim_y):
+        return None
+    return max(y - inicio_y - altura_cursor // 2, 0), min(y - inicio_y + altura_cursor, fim_y - inicio_y)
+
+
+def _loop_captura_continua(intervalo):
+    """Loop da thread de captura: guarda quadros da tela inteira no buffer circular"""
+    while not _parar_thread.is_set():
+        inicio = time.monotonic()
+        try:
+            largura, altura = tamanho_tela()
+            quadro = _capturar_retangulo(0, 0, largura, altura)
+            _buffer_quadros.append((time.monotonic(), quadro))
+        except Exception as e:
+            print(f"Error in background capture: {e}")
+        _parar_thread.wait(max(0.0, intervalo - (time.monotonic() - inicio)))
+
+
+def iniciar_captura_continua(fps=None, tamanho_buffer=None):
+    """
+    Inicia uma thread que captura a tela inteira em escala de cinza a uma taxa
+    fixa e guarda os quadros mais recentes, com o instante de cada um, em um
+    buffer circular. Enquanto estiver ativa, as funções de visão leem o quadro
+    mais novo sem esperar por uma nova captura.
+
+    Args:
+        fps: Quadros por segundo (padrão: fps_captura_continua)
+        tamanho_buffer: Número de quadros mantidos (padrão: tamanho_buffer_quadros)
+    """
+    global _thread_captura, _buffer_quadros, fps_captura_continua, tamanho_buffer_quadros
+    # No replay, uma thread consumindo quadros gravados tornaria a reprodução não determinística
+    if captura_continua_ativa() or _replay is not None:
+        return
+
+    if fps is not None:
+        fps_captura_continua = fps
+    if tamanho_buffer is not None:
+        tamanho_buffer_quadros = tamanho_buffer
+
+    _buffer_quadros = deque(maxlen=tamanho_buffer_quadros)
+    _parar_thread.clear()
+    _thread_captura = threading.Thread(target=_loop_captura_continua,
+                                       args=(1.0 / fps_captura_continua,))
+    _thread_captura.daemon = True
+    _thread_captura.start()
+
+
+def parar_captura_continua():
+    """Para a thread de captura contínua e descarta o buffer de quadros"""
+    global _thread_captura
+    if _thread_captura is None:
+        return
+    _parar_thread.set()
+    _thread_captura.join(timeout=2)
+    _thread_captura = None
+    _buffer_quadros.clear()
+
+
+def captura_continua_ativa():
+    """Indica se a thread de captura contínua está rodando"""
+    return _thread_captura is not None and _thread_captura.is_alive()
+
+
+def intervalo_captura():
+    """Intervalo em segundos entre dois quadros da captura contínua"""
+    return 1.0 / fps_captura_continua
+
+
+def quadros_desde(instante):
+    """
+    Retorna os quadros do buffer capturados depois de um instante, do mais
+    antigo para o mais novo. Permite verificar quadros capturados logo após
+    o clique que disparou uma espera.
+
+    Args:
+        instante: Instante de referência (time.monotonic)
+
+    Returns:
+        list: Lista de (instante, quadro_gray) da tela inteira
+    """
+    return [(t, quadro) for t, quadro in list(_buffer_quadros) if t > instante]
+
+
+def _quadro_mais_recente():
+    """
+    Retorna o quadro mais novo do buffer se ele for posterior à última ação de
+    entrada e ainda estiver fresco; caso contrário retorna None.
+    """
+    if not captura_continua_ativa() or not _buffer_quadros:
+        return None
+    instante, quadro = _buffer_quadros[-1]
+    idade_maxima = max(janela_cache, 2 * intervalo_captura())
+    if instante <= _instante_ultima_entrada or time.monotonic() - instante > idade_maxima:
+        return None
+    return quadro
+
+
+def recortar_quadro(quadro, iniX=0, iniY=0, fimX=1, fimY=1):
+    """
+    Recorta uma região relativa de um quadro da tela inteira (sem cópia).
+
+    Returns:
+        tuple: (regiao_gray, inicio_x, inicio_y, largura, altura)
+    """
+    altura, largura = quadro.shape[:2]
+    inicio_x, inicio_y, fim_x, fim_y = regiao_absoluta(iniX, iniY, fimX, fimY, largura, altura)
+    return quadro[inicio_y:fim_y, inicio_x:fim_x], inicio_x, inicio_y, largura, altura
+
+
+def _buscar_no_cache(inicio_x, inicio_y, fim_x, fim_y):
+    """
+    Procura uma captura recente que contenha o retângulo pedido.
+
+    Returns:
+        numpy.ndarray: Recorte (view) da captura em cache, ou None se não houver
+    """
+    # No replay, cada captura tem que consumir o quadro gravado correspondente
+    if janela_cache <= 0 or _replay is not None:
+        return None
+
+    agora = time.monotonic()
+    with _lock_cache:
+        # Remove capturas vencidas
+        _cache_quadros[:] = [item for item in _cache_quadros if agora - item[0] <= janela_cache]
+
+        # Percorre da mais recente para a mais antiga
+        for instante, (cx0, cy0, cx1, cy1), quadro in reversed(_cache_quadros):
+            if cx0 <= inicio_x and cy0 <= inicio_y and fim_x <= cx1 and fim_y <= cy1:
+                return quadro[inicio_y - cy0:fim_y - cy0, inicio_x - cx0:fim_x - cx0]
+    return None
+
+
+def _guardar_no_cache(retangulo, regiao_gray):
+    """Guarda uma captura no cache, descartando as mais antigas se necessário"""
+    if janela_cache <= 0 or _replay is not None:
+        return
+    with _lock_cache:
+        _cache_quadros.append((time.monotonic(), retangulo, regiao_gray))
+        if len(_cache_quadros) > max_regioes_cache:
+            del _cache_quadros[0]
+
+
+def _obter_monitor_damage():
+    """
+    Retorna o monitor XDamage, criando-o na primeira chamada. Se a extensão não
+    estiver disponível, volta para o modo "intervalo" e retorna None.
+    """
+    global _monitor_damage, modo_espera
+    if _monitor_damage is None:
+        try:
+            import captura_xshm
+            _monitor_damage = captura_xshm.MonitorDamage()
+        except (OSError, ImportError) as e:
+            print(f"XDamage wait mode unavailable ({e}), using fixed interval")
+            modo_espera = "intervalo"
+            return None
+    return _monitor_damage
+
+
+def aguardar_mudanca(regioes, intervalo, tempo_maximo):
+    """
+    Espera até a próxima verificação de uma espera por imagem.
+
+    No modo "damage", bloqueia até algum pixel mudar dentro das regiões ou até
+    tempo_maximo; no modo "intervalo", apenas dorme o intervalo.
+
+    Args:
+        regioes: Lista de (iniX, iniY, fimX, fimY) relativas observadas
+        intervalo: Intervalo fixo entre verificações (modo "intervalo")
+        tempo_maximo: Tempo máximo de espera em segundos (modo "damage")
+
+    Returns:
+        bool: True se a tela pode ter mudado, False se nada mudou nas regiões
+    """
+    if _replay is not None:
+        # Na reprodução não há o que esperar: avança o relógio virtual e segue para o próximo quadro gravado
+        _replay.avancar(min(intervalo, max(tempo_maximo, 0)))
+        return True
+
+    monitor = _obter_monitor_damage() if modo_espera == "damage" else None
+    if monitor is None:
+        time.sleep(intervalo)
+        return True
+
+    retangulos = [regiao_absoluta(iniX, iniY, fimX, fimY)
+                  for iniX, iniY, fimX, fimY in regioes]
+    mudou = monitor.esperar_mudanca(retangulos, tempo_maximo)
+    if mudou:
+        # As capturas em cache podem ser anteriores à mudança
+        invalidar_cache()
+    return mudou
+
+
+def impressao_regiao(regiao_gray):
+    """
+    Calcula uma impressão digital barata (CRC32 dos pixels e dimensões) de uma
+    região. Regiões idênticas pixel a pixel têm a mesma impressão.
+
+    Args:
+        regiao_gray: Array em escala de cinza da região
+
+    Returns:
+        tuple: (altura, largura, crc32)
+    """
+    return regiao_gray.shape[:2] + (zlib.crc32(np.ascontiguousarray(regiao_gray)),)
+
+
+def regiao_mudou(regiao_gray, impressoes, chave):
+    """
+    Compara a impressão digital da região com a última registrada para a chave
+    e atualiza o registro.
+
+    Args:
+        regiao_gray: Array em escala de cinza da região
+        impressoes: Dicionário com as últimas impressões (mantido pelo chamador)
+        chave: Identificador da região dentro do dicionário
+
+    Returns:
+        bool: True se a região mudou (ou é a primeira verificação), False se está idêntica
+    """
+    impressao = impressao_regiao(regiao_gray)
+    if impressoes.get(chave) == impressao:
+        return False
+    impressoes[chave] = impressao
+    return True
+
+
+def capturar_regiao(iniX=0, iniY=0, fimX=1, fimY=1):
+    """
+    Captura apenas a região pedida da tela, já convertida para escala de cinza.
+    As coordenadas são relativas à janela fixada com fixar_janela, se houver.
+    Se a captura contínua estiver ativa, recorta o quadro mais novo do buffer.
+    Se uma captura recente (dentro de janela_cache) já contém a região, ela é
+    reaproveitada sem nova captura.
+
+    Args:
+        iniX, iniY, fimX, fimY: Coordenadas relativas da região de busca (0 a 1)
+
+    Returns:
+        tuple: (regiao_gray, inicio_x, inicio_y, largura, altura)
+               regiao_gray é o array em escala de cinza da região, inicio_x/inicio_y
+               são a origem da região na tela e largura/altura as dimensões da tela
+    """
+    quadro = _quadro_mais_recente()
+    if quadro is not None:
+        return recortar_quadro(quadro, iniX, iniY, fimX, fimY)
+
+    largura, altura = tamanho_tela()
+    inicio_x, inicio_y, fim_x, fim_y = regiao_absoluta(iniX, iniY, fimX, fimY)
+    regiao_gray = _buscar_no_cache(inicio_x, inicio_y, fim_x, fim_y)
+    if regiao_gray is None:
+        regiao_gray = _capturar_retangulo(inicio_x, inicio_y, fim_x, fim_y)
+        _guardar_no_cache((inicio_x, inicio_y, fim_x, fim_y), regiao_gray)
+    return regiao_gray, inicio_x, inicio_y, largura, altura
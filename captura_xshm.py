@@ -0,0 +1,398 @@
+# Backend de captura nativo para X11 (Linux), usado quando captura.backend_captura = "xshm".
+# Lê o framebuffer diretamente com a extensão MIT-SHM (XShmGetImage) para um buffer de
+# memória compartilhada reaproveitado entre chamadas, sem subprocessos e sem arquivos
+# intermediários. Se a extensão não estiver disponível, usa XGetImage.
+#
+# Também contém o MonitorDamage, que usa a extensão XDamage para acordar as esperas
+# somente quando pixels mudam dentro das regiões observadas.
+import ctypes
+import ctypes.util
+import select
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+XDAMAGE_REPORT_RAW_RECTANGLES = 0
+XDAMAGE_NOTIFY = 0
+
+# Número máximo de buffers (um por tamanho de região) mantidos abertos
+max_buffers = 16
+
+
+class XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XRectangle(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_short),
+        ("y", ctypes.c_short),
+        ("width", ctypes.c_ushort),
+        ("height", ctypes.c_ushort),
+    ]
+
+
+class XDamageNotifyEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("serial", ctypes.c_ulong),
+        ("send_event", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("drawable", ctypes.c_ulong),
+        ("damage", ctypes.c_ulong),
+        ("level", ctypes.c_int),
+        ("more", ctypes.c_int),
+        ("timestamp", ctypes.c_ulong),
+        ("area", XRectangle),
+        ("geometry", XRectangle),
+    ]
+
+
+class XEvent(ctypes.Union):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("pad", ctypes.c_long * 24),
+    ]
+
+
+def _carregar_biblioteca(nome):
+    caminho = ctypes.util.find_library(nome)
+    if not caminho:
+        raise OSError(f"Library '{nome}' not found")
+    return ctypes.CDLL(caminho)
+
+
+class CapturaXShm:
+    """
+    Captura regiões da tela X11 para arrays NumPy.
+
+    Mantém um buffer de memória compartilhada por tamanho de região; cada
+    captura reescreve o mesmo buffer e devolve uma nova imagem em escala de
+    cinza convertida a partir dele.
+    """
+
+    def __init__(self, display=None):
+        self._lock = threading.RLock()
+        self._buffers = {}
+
+        self._xlib = _carregar_biblioteca("X11")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._configurar_assinaturas()
+
+        self._display = self._xlib.XOpenDisplay(display.encode() if display else None)
+        if not self._display:
+            raise OSError("Could not open X display")
+
+        tela = self._xlib.XDefaultScreen(self._display)
+        self._root = self._xlib.XRootWindow(self._display, tela)
+        self._visual = self._xlib.XDefaultVisual(self._display, tela)
+        self._depth = self._xlib.XDefaultDepth(self._display, tela)
+
+        # A extensão MIT-SHM é opcional: sem ela usa XGetImage
+        self._xext = None
+        try:
+            xext = _carregar_biblioteca("Xext")
+            xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+            xext.XShmQueryExtension.restype = ctypes.c_int
+            if xext.XShmQueryExtension(self._display):
+                self._xext = xext
+                self._configurar_assinaturas_xshm()
+        except OSError:
+            pass
+
+    @property
+    def usa_memoria_compartilhada(self):
+        """Indica se as capturas usam XShmGetImage (True) ou XGetImage (False)"""
+        return self._xext is not None
+
+    def _configurar_assinaturas(self):
+        xlib = self._xlib
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.restype = ctypes.c_int
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultDepth.restype = ctypes.c_int
+        xlib.XGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+                                   ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_int]
+        xlib.XGetImage.restype = ctypes.POINTER(XImage)
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+
+        libc = self._libc
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmget.restype = ctypes.c_int
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def _configurar_assinaturas_xshm(self):
+        xext = self._xext
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        xext.XShmGetImage.restype = ctypes.c_int
+
+    def _criar_buffer(self, largura, altura):
+        """
+        Cria uma XImage ligada a um segmento de memória compartilhada e a
+        visão NumPy (BGRX) sobre esse segmento.
+        """
+        info = XShmSegmentInfo()
+        imagem = self._xext.XShmCreateImage(self._display, self._visual, self._depth, ZPIXMAP,
+                                            None, ctypes.byref(info), largura, altura)
+        if not imagem:
+            raise OSError("XShmCreateImage failed")
+        if imagem.contents.bits_per_pixel != 32:
+            self._xlib.XDestroyImage(imagem)
+            raise OSError(f"Unsupported pixel format: {imagem.contents.bits_per_pixel} bpp")
+
+        bytes_por_linha = imagem.contents.bytes_per_line
+        tamanho = bytes_por_linha * altura
+        info.shmid = self._libc.shmget(IPC_PRIVATE, tamanho, IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            self._xlib.XDestroyImage(imagem)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        info.shmaddr = self._libc.shmat(info.shmid, None, 0)
+        if info.shmaddr in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(info.shmid, IPC_RMID, None)
+            self._xlib.XDestroyImage(imagem)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        imagem.contents.data = info.shmaddr
+        info.readOnly = 0
+
+        self._xext.XShmAttach(self._display, ctypes.byref(info))
+        self._xlib.XSync(self._display, 0)
+        # Marca o segmento para remoção: ele é liberado quando o último processo se desanexar
+        self._libc.shmctl(info.shmid, IPC_RMID, None)
+
+        dados = (ctypes.c_ubyte * tamanho).from_address(info.shmaddr)
+        bgrx = np.ctypeslib.as_array(dados).reshape(altura, bytes_por_linha)[:, :largura * 4]
+        return imagem, info, bgrx.reshape(altura, largura, 4)
+
+    def _liberar_buffer(self, buffer):
+        imagem, info, _ = buffer
+        self._xext.XShmDetach(self._display, ctypes.byref(info))
+        self._xlib.XSync(self._display, 0)
+        # Os dados pertencem ao segmento compartilhado, não ao malloc do Xlib
+        imagem.contents.data = None
+        self._xlib.XDestroyImage(imagem)
+        self._libc.shmdt(info.shmaddr)
+
+    def _buffer(self, largura, altura):
+        """Retorna (criando se necessário) o buffer reaproveitável para o tamanho pedido"""
+        chave = (largura, altura)
+        buffer = self._buffers.pop(chave, None)
+        if buffer is None:
+            if len(self._buffers) >= max_buffers:
+                # Libera o buffer usado há mais tempo
+                antigo = next(iter(self._buffers))
+                self._liberar_buffer(self._buffers.pop(antigo))
+            buffer = self._criar_buffer(largura, altura)
+        # Reinsere no fim para manter a ordem de uso
+        self._buffers[chave] = buffer
+        return buffer
+
+    def capturar_bgrx(self, inicio_x, inicio_y, largura, altura):
+        """
+        Captura uma região da tela no formato BGRX.
+
+        Com MIT-SHM, o array retornado é uma visão do buffer compartilhado e
+        será sobrescrito pela próxima captura do mesmo tamanho.
+
+        Returns:
+            numpy.ndarray: Array (altura, largura, 4) em BGRX
+        """
+        with self._lock:
+            if self._xext is not None:
+                imagem, _, bgrx = self._buffer(largura, altura)
+                if not self._xext.XShmGetImage(self._display, self._root, imagem,
+                                               inicio_x, inicio_y, ALL_PLANES):
+                    raise OSError("XShmGetImage failed")
+                return bgrx
+
+            imagem = self._xlib.XGetImage(self._display, self._root, inicio_x, inicio_y,
+                                          largura, altura, ALL_PLANES, ZPIXMAP)
+            if not imagem:
+                raise OSError("XGetImage failed")
+            try:
+                if imagem.contents.bits_per_pixel != 32:
+                    raise OSError(f"Unsupported pixel format: {imagem.contents.bits_per_pixel} bpp")
+                bytes_por_linha = imagem.contents.bytes_per_line
+                dados = (ctypes.c_ubyte * (bytes_por_linha * altura)).from_address(imagem.contents.data)
+                bgrx = np.ctypeslib.as_array(dados).reshape(altura, bytes_por_linha)[:, :largura * 4]
+                return bgrx.reshape(altura, largura, 4).copy()
+            finally:
+                self._xlib.XDestroyImage(imagem)
+
+    def capturar_cinza(self, inicio_x, inicio_y, largura, altura):
+        """
+        Captura uma região da tela já convertida para escala de cinza.
+
+        Returns:
+            numpy.ndarray: Array (altura, largura) em escala de cinza
+        """
+        with self._lock:
+            bgrx = self.capturar_bgrx(inicio_x, inicio_y, largura, altura)
+            return cv2.cvtColor(bgrx, cv2.COLOR_BGRA2GRAY)
+
+    def fechar(self):
+        """Libera os buffers compartilhados e fecha a conexão com o servidor X"""
+        with self._lock:
+            if self._xext is not None:
+                for buffer in self._buffers.values():
+                    self._liberar_buffer(buffer)
+            self._buffers.clear()
+            if self._display:
+                self._xlib.XCloseDisplay(self._display)
+                self._display = None
+
+
+class MonitorDamage:
+    """
+    Observa a janela raiz com a extensão XDamage e permite esperar até que
+    algum pixel mude dentro de um conjunto de retângulos da tela.
+
+    Usa uma conexão própria com o servidor X; os eventos que chegam enquanto
+    ninguém está esperando ficam na fila e não são perdidos.
+    """
+
+    def __init__(self, display=None):
+        self._lock = threading.Lock()
+        self._xlib = _carregar_biblioteca("X11")
+        self._xdamage = _carregar_biblioteca("Xdamage")
+
+        xlib = self._xlib
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.restype = ctypes.c_int
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        xlib.XConnectionNumber.restype = ctypes.c_int
+        xlib.XPending.argtypes = [ctypes.c_void_p]
+        xlib.XPending.restype = ctypes.c_int
+        xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.POINTER(XEvent)]
+        xlib.XFlush.argtypes = [ctypes.c_void_p]
+
+        xdamage = self._xdamage
+        xdamage.XDamageQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                                  ctypes.POINTER(ctypes.c_int)]
+        xdamage.XDamageQueryExtension.restype = ctypes.c_int
+        xdamage.XDamageCreate.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int]
+        xdamage.XDamageCreate.restype = ctypes.c_ulong
+        xdamage.XDamageDestroy.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+
+        self._display = xlib.XOpenDisplay(display.encode() if display else None)
+        if not self._display:
+            raise OSError("Could not open X display")
+
+        evento_base = ctypes.c_int()
+        erro_base = ctypes.c_int()
+        if not xdamage.XDamageQueryExtension(self._display, ctypes.byref(evento_base),
+                                             ctypes.byref(erro_base)):
+            xlib.XCloseDisplay(self._display)
+            self._display = None
+            raise OSError("XDamage extension not available")
+        self._tipo_evento = evento_base.value + XDAMAGE_NOTIFY
+
+        raiz = xlib.XRootWindow(self._display, xlib.XDefaultScreen(self._display))
+        self._damage = xdamage.XDamageCreate(self._display, raiz, XDAMAGE_REPORT_RAW_RECTANGLES)
+        xlib.XFlush(self._display)
+        self._conexao = xlib.XConnectionNumber(self._display)
+
+    def _consumir_eventos(self, retangulos):
+        """
+        Lê todos os eventos pendentes.
+
+        Returns:
+            bool: True se algum retângulo danificado intersecta os retângulos observados
+        """
+        mudou = False
+        evento = XEvent()
+        while self._xlib.XPending(self._display):
+            self._xlib.XNextEvent(self._display, ctypes.byref(evento))
+            if evento.type != self._tipo_evento:
+                continue
+            area = ctypes.cast(ctypes.byref(evento), ctypes.POINTER(XDamageNotifyEvent)).contents.area
+            for x0, y0, x1, y1 in retangulos:
+                if area.x < x1 and x0 < area.x + area.width and area.y < y1 and y0 < area.y + area.height:
+                    mudou = True
+                    break
+        return mudou
+
+    def esperar_mudanca(self, retangulos, timeout):
+        """
+        Bloqueia até que algum pixel mude dentro de um dos retângulos ou até o
+        timeout.
+
+        Args:
+            retangulos: Lista de (inicio_x, inicio_y, fim_x, fim_y) em pixels
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            bool: True se houve mudança nos retângulos, False se o tempo acabou
+        """
+        limite = time.monotonic() + max(timeout, 0)
+        with self._lock:
+            while True:
+                if self._consumir_eventos(retangulos):
+                    return True
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                select.select([self._conexao], [], [], restante)
+
+    def fechar(self):
+        """Remove o objeto de damage e fecha a conexão com o servidor X"""
+        with self._lock:
+            if self._display:
+                self._xdamage.XDamageDestroy(self._display, self._damage)
+                self._xlib.XCloseDisplay(self._display)
+                self._display = None
@@ -0,0 +1,462 @@
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+# Buffers de resultado do matchTemplate reaproveitados entre chamadas, um conjunto por thread
+_buffers = threading.local()
+
+# Busca em pirâmide (grosso para fino): em regiões grandes, procura candidatos
+# numa versão reduzida da região e do template e confirma apenas os melhores
+# em resolução total. Só é usada quando o chamador informa o limiar.
+usar_piramide = True
+area_minima_piramide = 200_000  # pixels da região a partir dos quais compensa reduzir
+lado_minimo_template = 16  # menor lado do template no nível mais reduzido
+niveis_maximos_piramide = 2  # cada nível reduz pela metade (pyrDown)
+candidatos_piramide = 10  # candidatos confirmados em resolução total
+# Abaixo de (limiar - margem_piramide) no nível reduzido, a região é dada como
+# sem correspondência sem a busca completa. Entre esse valor e o limiar, se
+# nenhum candidato for confirmado, refaz a busca em resolução total.
+margem_piramide = 0.25
+
+
+class ScoreReduzido(float):
+    """
+    Score de uma região descartada no nível reduzido da pirâmide. Compara como
+    um float comum, mas não é o score em resolução total: quem guarda scores
+    (ver telemetria) deve ignorá-lo.
+    """
+
+_piramides_template = {}  # id(template) -> (template, [níveis reduzidos])
+
+# Correspondência em paralelo. O OpenCV libera o GIL durante o matchTemplate,
+# então alternativas e blocos da região podem ser processados em threads.
+usar_paralelismo = True
+threads_correspondencia = min(8, os.cpu_count() or 1)
+# Regiões grandes são divididas em faixas horizontais sobrepostas. A divisão não
+# depende do número de threads: o resultado é o mesmo em paralelo ou em sequência.
+area_minima_blocos = 400_000  # pixels da região a partir dos quais ela é dividida
+linhas_minimas_bloco = 128  # linhas mínimas de resultado por faixa
+max_blocos = 4
+
+# Memória da última posição de cada template: antes da busca completa, confere
+# só o trecho da tela onde ele foi encontrado da última vez. Aceita se os pixels
+# forem idênticos (checksum) a um acerto guardado com score de pelo menos
+# limiar_memoria (e o limiar da busca), ou se o score ali alcançar esse valor.
+usar_memoria_posicao = True
+limiar_memoria = 0.9
+margem_memoria = 4  # pixels ao redor da última posição (pequenos deslocamentos)
+_ultimas_posicoes = {}  # chave -> (x, y, checksum, score), x e y absolutos na tela
+
+# Correspondência exata: botões, menus e ícones desenhados pelo mesmo toolkit
+# aparecem na tela idênticos pixel a pixel ao template. Para eles, a busca
+# compara pixels em vez de calcular o TM_CCOEFF_NORMED. Vale para as chaves em
+# templates_exatos e para as detectadas automaticamente (um acerto idêntico ao
+# template). Sem ocorrência exata, volta para a busca normal.
+usar_correspondencia_exata = True
+templates_exatos = set()
+pixels_ancora = 16  # pixels do template conferidos antes da comparação completa
+# Template quase uniforme numa região parecida: se o pixel âncora mais raro
+# aparece em mais que essa fração da região, ou se mais posições que
+# max_candidatos_exato passam por todos os pixels âncora, conferir as candidatas
+# fica mais lento que o matchTemplate. Desiste e deixa a busca normal decidir.
+fracao_maxima_ancora = 0.05
+max_candidatos_exato = 256
+_exatos_detectados = set()
+
+_executor = None
+_lock_executor = threading.Lock()
+_em_tarefa = threading.local()  # marca as threads do pool (evita submeter tarefas aninhadas)
+
+
+def _buffer_resultado(regiao, template):
+    """
+    Retorna um array float32 pré-alocado com o tamanho do resultado do
+    matchTemplate para a região e o template. O mesmo array é reaproveitado
+    enquanto os tamanhos se repetirem.
+    """
+    forma = (regiao.shape[0] - template.shape[0] + 1, regiao.shape[1] - template.shape[1] + 1)
+    cache = getattr(_buffers, "resultados", None)
+    if cache is None:
+        cache = _buffers.resultados = {}
+    buffer = cache.get(forma)
+    if buffer is None:
+        if len(cache) >= 32:
+            cache.clear()
+        buffer = cache[forma] = np.empty(forma, dtype=np.float32)
+    return buffer
+
+
+def mapa_correspondencia(regiao, template):
+    """
+    Calcula o mapa de correspondência TM_CCOEFF_NORMED do template na região.
+
+    O array retornado é um buffer reaproveitado: é sobrescrito pela próxima
+    chamada com os mesmos tamanhos na mesma thread. Copie-o se precisar
+    guardá-lo.
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        template: Template em escala de cinza
+
+    Returns:
+        numpy.ndarray: Mapa de scores (float32)
+    """
+    if regiao.shape[0] < template.shape[0] or regiao.shape[1] < template.shape[1]:
+        # Região menor que o template: não há posição possível
+        return np.full((0, 0), -1, dtype=np.float32)
+    resultado = _buffer_resultado(regiao, template)
+    return cv2.matchTemplate(regiao, template, cv2.TM_CCOEFF_NORMED, result=resultado)
+
+
+def segundo_pico(regiao, template, max_loc):
+    """
+    Retorna o melhor score do template na região fora da vizinhança de max_loc,
+    ou seja, o segundo colocado de uma correspondência.
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        template: Template em escala de cinza
+        max_loc: Posição (x, y) da melhor correspondência na região
+
+    Returns:
+        float: Score do segundo melhor ponto, ou -1.0 se não houver outra posição
+    """
+    mapa = mapa_correspondencia(regiao, template)
+    if mapa.size == 0:
+        return -1.0
+    altura, largura = template.shape[:2]
+    x, y = max_loc
+    mapa[max(0, y - altura // 2):y + altura // 2 + 1, max(0, x - largura // 2):x + largura // 2 + 1] = -1
+    return cv2.minMaxLoc(mapa)[1]
+
+
+def _niveis_template(template):
+    """Retorna as versões reduzidas do template (uma por nível), calculadas uma única vez"""
+    entrada = _piramides_template.get(id(template))
+    if entrada is not None and entrada[0] is template:
+        return entrada[1]
+    niveis = []
+    atual = template
+    while len(niveis) < niveis_maximos_piramide and min(atual.shape[:2]) // 2 >= lado_minimo_template:
+        atual = cv2.pyrDown(atual)
+        niveis.append(atual)
+    if len(_piramides_template) >= 256:
+        _piramides_template.clear()
+    # Guarda a referência ao template para que o id não seja reaproveitado por outro objeto
+    _piramides_template[id(template)] = (template, niveis)
+    return niveis
+
+
+def _candidatos(mapa, quantidade, raio_x, raio_y):
+    """Extrai os picos do mapa (o mapa é alterado: cada pico escolhido tem a vizinhança apagada)"""
+    candidatos = []
+    for _ in range(quantidade):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(mapa)
+        if max_val <= -1:
+            break
+        candidatos.append((max_val, x, y))
+        mapa[max(0, y - raio_y):y + raio_y + 1, max(0, x - raio_x):x + raio_x + 1] = -1
+    return candidatos
+
+
+def _corresponder_piramide(regiao, template, limiar):
+    """
+    Busca grosso para fino. Retorna (max_val, max_loc) ou None quando o nível
+    reduzido não permite decidir e é preciso fazer a busca completa.
+    """
+    niveis = _niveis_template(template)
+    if not niveis:
+        return None
+    fator = 2 ** len(niveis)
+    template_reduzido = niveis[-1]
+    regiao_reduzida = regiao
+    for _ in niveis:
+        regiao_reduzida = cv2.pyrDown(regiao_reduzida)
+
+    mapa = mapa_correspondencia(regiao_reduzida, template_reduzido)
+    if mapa.size == 0:
+        return None
+    candidatos = _candidatos(mapa, candidatos_piramide,
+                             template_reduzido.shape[1] // 2, template_reduzido.shape[0] // 2)
+    melhor_grosso, x_grosso, y_grosso = candidatos[0]
+    if melhor_grosso < limiar - margem_piramide:
+        return ScoreReduzido(melhor_grosso), (x_grosso * fator, y_grosso * fator)
+
+    # Confirma cada candidato numa janela pequena em resolução total
+    altura, largura = template.shape[:2]
+    margem = 2 * fator
+    melhor_val, melhor_loc = -1.0, None
+    for _, x, y in candidatos:
+        x0 = max(0, x * fator - margem)
+        y0 = max(0, y * fator - margem)
+        janela = regiao[y0:y * fator + altura + margem, x0:x * fator + largura + margem]
+        max_val, max_loc = _corresponder_completo(janela, template)
+        if max_loc is not None and max_val > melhor_val:
+            melhor_val, melhor_loc = max_val, (x0 + max_loc[0], y0 + max_loc[1])
+    if melhor_val >= limiar:
+        return melhor_val, melhor_loc
+    return None
+
+
+def _obter_executor():
+    """Retorna o pool de threads, ou None se o paralelismo estiver desligado ou já dentro do pool"""
+    global _executor
+    if not usar_paralelismo or threads_correspondencia <= 1 or getattr(_em_tarefa, "ativa", False):
+        return None
+    with _lock_executor:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads_correspondencia,
+                                           thread_name_prefix="correspondencia")
+        return _executor
+
+
+def _executar_tarefa(funcao, args):
+    _em_tarefa.ativa = True
+    try:
+        return funcao(*args)
+    finally:
+        _em_tarefa.ativa = False
+
+
+def executar_em_paralelo(tarefas):
+    """
+    Executa as tarefas no pool de threads (ou em sequência, com o paralelismo
+    desligado) e retorna os resultados na mesma ordem.
+
+    Args:
+        tarefas: Lista de tuplas (função, argumentos)
+
+    Returns:
+        list: Resultado de cada tarefa
+    """
+    executor = _obter_executor()
+    if executor is None or len(tarefas) <= 1:
+        return [funcao(*args) for funcao, args in tarefas]
+    futuros = [executor.submit(_executar_tarefa, funcao, args) for funcao, args in tarefas]
+    return [futuro.result() for futuro in futuros]
+
+
+def _faixas(regiao, template):
+    """Divide a região em faixas horizontais que se sobrepõem pela altura do template"""
+    linhas_resultado = regiao.shape[0] - template.shape[0] + 1
+    quantidade = 1
+    if regiao.shape[0] * regiao.shape[1] >= area_minima_blocos:
+        quantidade = max(1, min(max_blocos, linhas_resultado // linhas_minimas_bloco))
+    passo = -(-linhas_resultado // quantidade)
+    return [(inicio, min(inicio + passo, linhas_resultado)) for inicio in range(0, linhas_resultado, passo)]
+
+
+def _corresponder_faixa(regiao, template, inicio, fim):
+    resultado = mapa_correspondencia(regiao[inicio:fim + template.shape[0] - 1], template)
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(resultado)
+    return max_val, (max_loc[0], max_loc[1] + inicio)
+
+
+def _corresponder_completo(regiao, template):
+    if regiao.shape[0] < template.shape[0] or regiao.shape[1] < template.shape[1]:
+        return -1.0, None
+    faixas = _faixas(regiao, template)
+    if len(faixas) == 1:
+        resultado = mapa_correspondencia(regiao, template)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(resultado)
+        return max_val, max_loc
+    resultados = executar_em_paralelo([(_corresponder_faixa, (regiao, template, inicio, fim))
+                                       for inicio, fim in faixas])
+    # Em empate, fica a primeira faixa (mesma ordem de varredura do minMaxLoc)
+    melhor_val, melhor_loc = resultados[0]
+    for max_val, max_loc in resultados[1:]:
+        if max_val > melhor_val:
+            melhor_val, melhor_loc = max_val, max_loc
+    return melhor_val, melhor_loc
+
+
+def _corresponder_busca(regiao, template, limiar):
+    if (limiar is not None and usar_piramide
+            and regiao.shape[0] * regiao.shape[1] >= area_minima_piramide):
+        resultado = _corresponder_piramide(regiao, template, limiar)
+        if resultado is not None:
+            return resultado
+    return _corresponder_completo(regiao, template)
+
+
+def procurar_exato(regiao, template):
+    """
+    Procura uma ocorrência idêntica pixel a pixel do template na região.
+
+    Compara primeiro o pixel do template cujo valor é o mais raro na região,
+    em todas as posições, e depois só nas posições que sobraram os demais
+    pixels âncora; as candidatas restantes são comparadas por inteiro. Se
+    algum valor do template nem aparece na região, não há ocorrência. Se há
+    candidatas demais (ver fracao_maxima_ancora e max_candidatos_exato),
+    desiste.
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        template: Template em escala de cinza
+
+    Returns:
+        tuple: Posição (x, y) da primeira ocorrência (de cima para baixo), ou None
+            se não há ocorrência exata ou há candidatas demais para conferir
+    """
+    altura, largura = template.shape[:2]
+    if regiao.shape[0] < altura or regiao.shape[1] < largura:
+        return None
+    histograma = cv2.calcHist([regiao], [0], None, [256], [0, 256]).ravel()
+    frequencias = histograma[template].ravel()
+    if frequencias.min() == 0:
+        return None
+    if frequencias.min() > fracao_maxima_ancora * regiao.size:
+        return None
+
+    ancoras = np.argsort(frequencias, kind="stable")[:pixels_ancora]
+    dy, dx = divmod(int(ancoras[0]), largura)
+    linhas = regiao.shape[0] - altura + 1
+    colunas = regiao.shape[1] - largura + 1
+    ys, xs = np.nonzero(regiao[dy:dy + linhas, dx:dx + colunas] == template[dy, dx])
+    for ancora in ancoras[1:]:
+        dy, dx = divmod(int(ancora), largura)
+        iguais = regiao[ys + dy, xs + dx] == template[dy, dx]
+        ys, xs = ys[iguais], xs[iguais]
+        if ys.size == 0:
+            return None
+    if ys.size > max_candidatos_exato:
+        return None
+
+    for y, x in zip(ys.tolist(), xs.tolist()):
+        if np.array_equal(regiao[y:y + altura, x:x + largura], template):
+            return x, y
+    return None
+
+
+def _checksum(trecho):
+    return zlib.crc32(np.ascontiguousarray(trecho))
+
+
+def _conferir_ultima_posicao(chave, regiao, template, limiar, origem):
+    """
+    Confere o template na última posição em que foi encontrado.
+
+    Returns:
+        tuple: (max_val, max_loc) se ainda estiver lá, ou None
+    """
+    memoria = _ultimas_posicoes.get(chave)
+    if memoria is None:
+        return None
+    x_abs, y_abs, checksum, score = memoria
+    altura, largura = template.shape[:2]
+    x, y = x_abs - origem[0], y_abs - origem[1]
+    if x < 0 or y < 0 or x + largura > regiao.shape[1] or y + altura > regiao.shape[0]:
+        return None
+
+    # Pixels idênticos aos da última correspondência: nem é preciso calcular o score,
+    # desde que o score guardado alcance o limiar desta busca
+    if score >= max(limiar, limiar_memoria) and _checksum(regiao[y:y + altura, x:x + largura]) == checksum:
+        return score, (x, y)
+
+    # Senão, procura só numa janela pequena ao redor da última posição
+    x0 = max(0, x - margem_memoria)
+    y0 = max(0, y - margem_memoria)
+    janela = regiao[y0:y + altura + margem_memoria, x0:x + largura + margem_memoria]
+    max_val, max_loc = _corresponder_completo(janela, template)
+    if max_loc is not None and max_val >= max(limiar, limiar_memoria):
+        return max_val, (x0 + max_loc[0], y0 + max_loc[1])
+    return None
+
+
+def _memorizar_posicao(chave, regiao, template, max_val, max_loc, origem):
+    altura, largura = template.shape[:2]
+    x, y = max_loc
+    checksum = _checksum(regiao[y:y + altura, x:x + largura])
+    _ultimas_posicoes[chave] = (origem[0] + x, origem[1] + y, checksum, max_val)
+
+
+def esquecer_posicoes():
+    """Descarta a memória das últimas posições dos templates"""
+    _ultimas_posicoes.clear()
+
+
+def corresponder(regiao, template, limiar=None, chave=None, origem=(0, 0)):
+    """
+    Procura o template na região e retorna o melhor score e sua posição.
+
+    Com o limiar informado e uma região grande, usa a busca em pirâmide: o
+    resultado é o mesmo da busca completa sempre que o score alcança o limiar.
+    Abaixo do limiar, o score retornado pode ser o do nível reduzido (um
+    ScoreReduzido).
+
+    Com a chave (normalmente o nome da imagem) e a origem da região na tela,
+    confere primeiro a última posição em que o template foi encontrado e só
+    faz a busca completa se ele não estiver mais lá. Para templates que
+    aparecem idênticos na tela, a busca completa é primeiro exata (ver
+    procurar_exato), com score 1.0.
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        template: Template em escala de cinza
+        limiar: Score mínimo que o chamador considera uma correspondência (opcional)
+        chave: Identificação do template para a memória de posição (opcional)
+        origem: Posição (x, y) da região na tela
+
+    Returns:
+        tuple: (max_val, max_loc) - melhor score e posição (x, y) na região;
+               (-1.0, None) se a região for menor que o template
+    """
+    resultado = _conferir_rapido(regiao, template, limiar, chave, origem)
+    if resultado is not None:
+        return resultado
+    max_val, max_loc = _corresponder_busca(regiao, template, limiar)
+    return _concluir(regiao, template, limiar, chave, origem, max_val, max_loc)
+
+
+def _conferir_rapido(regiao, template, limiar, chave, origem):
+    """Memória de posição e busca exata; retorna (max_val, max_loc) ou None se é preciso a busca normal"""
+    if usar_memoria_posicao and chave is not None and limiar is not None:
+        resultado = _conferir_ultima_posicao(chave, regiao, template, limiar, origem)
+        if resultado is not None:
+            return resultado
+
+    if usar_correspondencia_exata and chave is not None and (
+            chave in templates_exatos or chave in _exatos_detectados):
+        max_loc = procurar_exato(regiao, template)
+        if max_loc is not None:
+            return _concluir(regiao, template, limiar, chave, origem, 1.0, max_loc)
+    return None
+
+
+def _concluir(regiao, template, limiar, chave, origem, max_val, max_loc):
+    """Registra o resultado de uma busca (detecção de template exato e memória de posição)"""
+    if (usar_correspondencia_exata and chave is not None and max_loc is not None
+            and max_val >= 0.99 and chave not in _exatos_detectados and np.array_equal(
+                regiao[max_loc[1]:max_loc[1] + template.shape[0],
+                       max_loc[0]:max_loc[0] + template.shape[1]], template)):
+        # Apareceu idêntico ao template: as próximas buscas podem ser exatas
+        _exatos_detectados.add(chave)
+
+    if (usar_memoria_posicao and chave is not None and limiar is not None
+            and max_loc is not None and max_val >= limiar):
+        _memorizar_posicao(chave, regiao, template, max_val, max_loc, origem)
+    return max_val, max_loc
+
+
+def corresponder_alternativas(regiao, lista_templates, limiar=None, chaves=None, origem=(0, 0)):
+    """
+    Procura cada template alternativo na mesma região, em paralelo.
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        lista_templates: Templates em escala de cinza
+        limiar: Score mínimo que o chamador considera uma correspondência (opcional)
+        chaves: Chave de cada template para a memória de posição (opcional)
+        origem: Posição (x, y) da região na tela
+
+    Returns:
+        list: (max_val, max_loc) de cada template, na ordem recebida
+    """
+    chaves = chaves or [None] * len(lista_templates)
+    return executar_em_paralelo([(corresponder, (regiao, template, limiar, chave, origem))
+                                 for template, chave in zip(lista_templates, chaves)])
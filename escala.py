@@ -0,0 +1,54 @@
+import captura
+import correspondencia
+import templates
+
+
+# Detecção da escala da interface (DPI do Windows em 125%, 150%, ... ou outra
+# resolução). As imagens de images/ foram capturadas em uma escala só; a escala
+# ativa é detectada uma vez por execução procurando uma âncora conhecida em
+# várias escalas, e depois disso as buscas são feitas apenas nela.
+usar_deteccao_escala = True
+escalas_candidatas = (1.0, 1.25, 1.5, 1.75, 2.0, 0.8)
+ancora = "projects.png"
+regiao_ancora = (0, 0, 1, 1)
+limiar_escala = 0.8
+corte_escala = 0.95  # Score a partir do qual a escala é aceita sem testar as outras
+
+
+def escala_atual():
+    """Retorna a escala em que os templates estão sendo procurados"""
+    return templates.escala
+
+
+def detectar():
+    """
+    Detecta a escala da interface procurando a âncora em cada escala candidata,
+    e passa a servir os templates nessa escala.
+
+    Returns:
+        float: Escala detectada, ou None se a âncora não foi encontrada em
+               nenhuma escala (os templates continuam na escala original)
+    """
+    if not usar_deteccao_escala:
+        return None
+    # A âncora é sempre redimensionada a partir da imagem original
+    templates.definir_escala(1.0)
+    original = templates.obter_template(ancora)
+    if original is None:
+        return None
+    regiao = captura.capturar_regiao(*regiao_ancora)[0]
+
+    melhor_escala, melhor_score = None, limiar_escala
+    for fator in escalas_candidatas:
+        template = templates.redimensionar(original, fator)
+        if template.shape[0] > regiao.shape[0] or template.shape[1] > regiao.shape[1]:
+            continue
+        max_val, _ = correspondencia.corresponder(regiao, template, limiar_escala)
+        if max_val >= melhor_score:
+            melhor_escala, melhor_score = fator, max_val
+        if max_val >= corte_escala:
+            break
+
+    if melhor_escala is not None:
+        templates.definir_escala(melhor_escala)
+    return melhor_escala
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+import captura
+import correspondencia
+import idioma
+import telemetria
+import templates
+
+
+# Classificador do estado da tela: diz numa única passada qual diálogo do DOORS
+# está aberto, em vez de esperar o timeout de um esperarPor por diálogo.
+# Cada estado é reconhecido por uma das suas imagens numa região relativa da
+# janela. A lista vai do mais específico (diálogos) para o mais geral: se mais
+# de um estado está na tela, vence o primeiro.
+ESTADOS = [
+    ("erro", ["indicador_erro_exportar.png"], (0, 0, 1, 1)),
+    ("sobrescrever", ["confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png"], (0.25, 0.3, 0.7, 0.7)),
+    ("dialogo_exportacao", ["exportar_csv.png", "exportar_csv_en.png"], (0.3, 0.5, 0.6, 0.8)),
+    ("dialogo_colunas", ["inserir.png", "inserir_en.png"], (0.05, 0.05, 0.95, 0.95)),
+    ("colunas_extras", ["separador_coluna.png"], (0.11, 0.05, 0.3, 0.6)),
+    ("modulo_nao_maximizado", ["maximizar_vf.png"], (0.1, 0.05, 0.7, 0.5)),
+    ("modulo", ["main.png"], (0.05, 0.05, 0.95, 0.4)),
+    ("explorador", ["projects.png"], (0, 0, 1, 1)),
+]
+limiar_estado = 0.7
+
+# Impressões digitais: uma miniatura da janela inteira, guardada com os estados
+# encontrados nela. Quando a tela volta a ter a mesma miniatura, esses estados
+# saem da impressão, sem correspondência de modelo. Ausências não são guardadas:
+# uma tela ainda carregando pode ter a miniatura parecida com a final.
+usar_impressoes = True
+arquivo_impressoes = None  # Definido pela interface (logs/estados_tela.npz)
+tamanho_miniatura = (80, 45)  # (largura, altura)
+tolerancia_miniatura = 12  # Diferença máxima de tom em um pixel da miniatura
+max_impressoes = 64
+# Estados sobre os quais a macro age (fechar um erro, confirmar a sobrescrita):
+# são sempre conferidos pela imagem, nunca respondidos pela impressão
+estados_conferidos = {"erro", "sobrescrever"}
+
+_lock = threading.Lock()
+_impressoes = []  # lista de (miniatura, {estado: True}), da mais recente para a mais antiga
+_alterado = False
+
+
+def carregar(caminho):
+    """
+    Carrega as impressões digitais das execuções anteriores.
+
+    Args:
+        caminho: Arquivo .npz onde as impressões são guardadas
+    """
+    global arquivo_impressoes, _alterado
+    arquivo_impressoes = caminho
+    with _lock:
+        _impressoes.clear()
+        _alterado = False
+        if not os.path.exists(caminho):
+            return
+        try:
+            with np.load(caminho) as dados:
+                miniaturas = dados["miniaturas"]
+                estados = json.loads(str(dados["estados"]))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load screen state fingerprints ({e}), starting from scratch")
+            return
+        if miniaturas.shape[1:] != tamanho_miniatura[::-1]:
+            return
+        # Arquivos antigos guardavam também as ausências
+        _impressoes.extend(zip(list(miniaturas), [{nome: True for nome, presente in conferidos.items() if presente}
+                                                  for conferidos in estados]))
+
+
+def salvar():
+    """Grava as impressões digitais, se algo mudou desde a última gravação"""
+    global _alterado
+    with _lock:
+        if arquivo_impressoes is None or not _alterado or not _impressoes:
+            return
+        try:
+            with open(arquivo_impressoes, "wb") as f:
+                np.savez_compressed(f, miniaturas=np.stack([miniatura for miniatura, _ in _impressoes]),
+                                    estados=np.array(json.dumps([estados for _, estados in _impressoes])))
+            _alterado = False
+        except OSError as e:
+            print(f"Could not save screen state fingerprints: {e}")
+
+
+def _miniatura(quadro):
+    return cv2.resize(quadro, tamanho_miniatura, interpolation=cv2.INTER_AREA)
+
+
+def _procurar_impressao(miniatura):
+    """Índice da impressão igual à miniatura (dentro da tolerância), ou None"""
+    for i, (conhecida, _) in enumerate(_impressoes):
+        if cv2.norm(conhecida, miniatura, cv2.NORM_INF) <= tolerancia_miniatura:
+            return i
+    return None
+
+
+def _memorizar(indice, miniatura, novos):
+    """Junta os estados conferidos à impressão (criando-a, se for nova) e a põe no início da lista"""
+    global _alterado
+    if indice is None:
+        entrada = (miniatura, {})
+    else:
+        entrada = _impressoes.pop(indice)
+    entrada[1].update(novos)
+    _impressoes.insert(0, entrada)
+    del _impressoes[max_impressoes:]
+    _alterado = True
+
+
+def _presente(nome, imagens, roi, quadro, origem, registrar_ausentes):
+    """Indica se alguma imagem do estado aparece na região do quadro"""
+    alternativas = []
+    for img in imagens:
+        template = templates.obter_template(img)
+        if template is not None:
+            alternativas.append((img, template))
+    if not alternativas:
+        return False
+    x0, y0, x1, y1 = captura.regiao_absoluta(*roi)
+    rx0 = min(max(x0 - origem[0], 0), quadro.shape[1])
+    ry0 = min(max(y0 - origem[1], 0), quadro.shape[0])
+    recorte = quadro[ry0:max(y1 - origem[1], ry0), rx0:max(x1 - origem[0], rx0)]
+    resultados = idioma.procurar(f"estado_{nome}", roi, alternativas, recorte,
+                                 (origem[0] + rx0, origem[1] + ry0), limiar_estado,
+                                 registrar_ausentes=registrar_ausentes)
+    return any(max_val >= telemetria.limiar(img, limiar_estado)
+               for (img, _), (max_val, _) in zip(alternativas, resultados))
+
+
+def classificar(candidatos=None, regioes=None, registrar_ausentes=True):
+    """
+    Diz qual dos estados conhecidos está na tela, a partir de uma única captura
+    da janela. Os estados que a impressão digital da tela ainda não responde
+    são conferidos todos de uma vez, em paralelo.
+
+    Args:
+        candidatos: Nomes dos estados a considerar (padrão: todos de ESTADOS)
+        regioes: Dicionário estado -> (iniX, iniY, fimX, fimY) para trocar a
+                 região de busca de um estado nesta chamada (opcional)
+        registrar_ausentes: Registra na telemetria as imagens não encontradas
+                            (esperas registram só a primeira classificação)
+
+    Returns:
+        str: Primeiro estado de ESTADOS (entre os candidatos) presente na tela,
+             ou None se nenhum estiver
+    """
+    regioes = regioes or {}
+    estados = [(nome, imagens, regioes.get(nome, roi)) for nome, imagens, roi in ESTADOS
+               if candidatos is None or nome in candidatos]
+    quadro, inicio_x, inicio_y = captura.capturar_regiao(0, 0, 1, 1)[:3]
+
+    miniatura = indice = None
+    conhecidos = {}
+    if usar_impressoes:
+        miniatura = _miniatura(quadro)
+        with _lock:
+            indice = _procurar_impressao(miniatura)
+            if indice is not None:
+                conhecidos = dict(_impressoes[indice][1])
+
+    # Estados com região trocada não são respondidos pela impressão nem guardados nela.
+    # A impressão tem tolerância: os estados conferidos são procurados pela imagem
+    # a cada chamada, e os ausentes da impressão também.
+    pendentes = [(nome, imagens, roi) for nome, imagens, roi in estados
+                 if nome not in conhecidos or nome in regioes or nome in estados_conferidos]
+    presentes = correspondencia.executar_em_paralelo(
+        [(_presente, (nome, imagens, roi, quadro, (inicio_x, inicio_y), registrar_ausentes)) for nome, imagens, roi in pendentes])
+    novos = {nome: presente for (nome, _, _), presente in zip(pendentes, presentes)}
+
+    if usar_impressoes:
+        memorizaveis = {nome: True for nome, presente in novos.items() if presente and nome not in regioes}
+        if memorizaveis:
+            with _lock:
+                _memorizar(_procurar_impressao(miniatura), miniatura, memorizaveis)
+
+    conhecidos.update(novos)
+    for nome, _, _ in estados:
+        if conhecidos.get(nome):
+            return nome
+    return None
+
+
+def esperar(candidatos, timeout=5):
+    """
+    Espera até que um dos estados candidatos esteja na tela.
+
+    Args:
+        candidatos: Nomes dos estados esperados
+        timeout: Tempo máximo de espera em segundos
+
+    Returns:
+        str: Estado encontrado (o primeiro de ESTADOS, se houver mais de um),
+             ou None se nenhum apareceu dentro do timeout
+    """
+    inicio = captura.relogio()
+    primeira = True
+    while True:
+        estado = classificar(candidatos, registrar_ausentes=primeira)
+        if estado is not None:
+            return estado
+        primeira = False
+        restante = timeout - (captura.relogio() - inicio)
+        if restante <= 0:
+            return None
+        intervalo = captura.intervalo_captura() if captura.captura_continua_ativa() else 0.5
+        captura.aguardar_mudanca([(0, 0, 1, 1)], intervalo, restante)
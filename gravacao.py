@@ -0,0 +1,176 @@
+# Gravação de sessões da macro e reprodução (replay) das capturas gravadas.
+#
+# O arquivo de sessão é um ZIP com:
+#   quadros/<id>.png  - cada quadro distinto, em escala de cinza (quadros repetidos são gravados uma vez)
+#   sessao.json       - tamanho da tela e a sequência de eventos (capturas e ações de entrada)
+import hashlib
+import json
+import threading
+import time
+import zipfile
+
+import cv2
+import numpy as np
+
+
+class GravadorSessao:
+    """
+    Grava todas as capturas feitas pela macro e as ações de entrada executadas,
+    na ordem em que aconteceram. Quadros idênticos pixel a pixel são gravados
+    uma única vez.
+    """
+
+    def __init__(self, caminho, largura_tela, altura_tela):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(caminho, "w", zipfile.ZIP_STORED)
+        self._inicio = time.monotonic()
+        self._quadros = {}  # digest -> id do quadro
+        self._eventos = []
+        self._tela = [largura_tela, altura_tela]
+
+    def _instante(self):
+        return round(time.monotonic() - self._inicio, 4)
+
+    def registrar_quadro(self, retangulo, regiao_gray):
+        """
+        Registra uma captura.
+
+        Args:
+            retangulo: (inicio_x, inicio_y, fim_x, fim_y) da captura na tela
+            regiao_gray: Array em escala de cinza capturado
+        """
+        regiao_gray = np.ascontiguousarray(regiao_gray)
+        digest = hashlib.blake2b(regiao_gray, digest_size=16)
+        digest.update(repr(regiao_gray.shape).encode())
+        chave = digest.hexdigest()
+
+        with self._lock:
+            if self._zip is None:
+                return
+            id_quadro = self._quadros.get(chave)
+            if id_quadro is None:
+                id_quadro = len(self._quadros)
+                self._quadros[chave] = id_quadro
+                # PNG já é comprimido, por isso o ZIP usa ZIP_STORED
+                ok, png = cv2.imencode(".png", regiao_gray)
+                if ok:
+                    self._zip.writestr(f"quadros/{id_quadro}.png", png.tobytes())
+            self._eventos.append({
+                "t": self._instante(),
+                "tipo": "quadro",
+                "retangulo": [int(v) for v in retangulo],
+                "quadro": id_quadro,
+            })
+
+    def registrar_entrada(self, acao, detalhes):
+        """
+        Registra uma ação de entrada (clique, atalho, tecla, movimento).
+
+        Args:
+            acao: Nome da ação
+            detalhes: Parâmetros da ação
+        """
+        with self._lock:
+            if self._zip is None:
+                return
+            self._eventos.append({
+                "t": self._instante(),
+                "tipo": "entrada",
+                "acao": acao,
+                "detalhes": [v if isinstance(v, str) else float(v) for v in detalhes],
+            })
+
+    def fechar(self):
+        """Grava o índice de eventos e fecha o arquivo de sessão"""
+        with self._lock:
+            if self._zip is None:
+                return
+            sessao = {"tela": self._tela, "eventos": self._eventos}
+            self._zip.writestr("sessao.json", json.dumps(sessao), compress_type=zipfile.ZIP_DEFLATED)
+            self._zip.close()
+            self._zip = None
+            print(f"✅ Session recorded: {self.caminho} "
+                  f"({len(self._eventos)} events, {len(self._quadros)} distinct frames)")
+
+
+class FonteReplay:
+    """
+    Fonte de quadros que reproduz uma sessão gravada. Cada captura pedida
+    avança na sequência gravada até a próxima captura que contém o retângulo
+    pedido; quando a gravação acaba, continua devolvendo o último quadro
+    compatível.
+
+    O relógio do replay é virtual: vale o instante gravado do último quadro
+    servido, e as esperas e pausas o avançam sem dormir. Assim os timeouts
+    vencem no mesmo ponto da gravação, e não pelo relógio real.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(caminho, "r")
+        sessao = json.loads(self._zip.read("sessao.json"))
+        self.largura_tela, self.altura_tela = sessao["tela"]
+        self._capturas = [e for e in sessao["eventos"] if e["tipo"] == "quadro"]
+        self.entradas = [e for e in sessao["eventos"] if e["tipo"] == "entrada"]
+        self._posicao = 0
+        self._decodificados = {}
+        self.instante = 0.0  # Relógio virtual, em segundos desde o início da gravação
+
+    def _quadro(self, id_quadro):
+        quadro = self._decodificados.get(id_quadro)
+        if quadro is None:
+            png = np.frombuffer(self._zip.read(f"quadros/{id_quadro}.png"), dtype=np.uint8)
+            quadro = cv2.imdecode(png, cv2.IMREAD_GRAYSCALE)
+            self._decodificados[id_quadro] = quadro
+        return quadro
+
+    @staticmethod
+    def _contem(evento, inicio_x, inicio_y, fim_x, fim_y):
+        cx0, cy0, cx1, cy1 = evento["retangulo"]
+        return cx0 <= inicio_x and cy0 <= inicio_y and fim_x <= cx1 and fim_y <= cy1
+
+    def capturar(self, inicio_x, inicio_y, fim_x, fim_y):
+        """
+        Devolve o recorte gravado para o retângulo pedido.
+
+        Returns:
+            numpy.ndarray: Região em escala de cinza (zeros se nenhuma captura gravada contém o retângulo)
+        """
+        with self._lock:
+            evento = None
+            # Procura para frente a próxima captura que contém o retângulo
+            for indice in range(self._posicao, len(self._capturas)):
+                if self._contem(self._capturas[indice], inicio_x, inicio_y, fim_x, fim_y):
+                    evento = self._capturas[indice]
+                    self._posicao = indice + 1
+                    self.instante = max(self.instante, evento["t"])
+                    break
+            if evento is None:
+                # Sem capturas à frente: reaproveita a última compatível
+                for indice in range(min(self._posicao, len(self._capturas)) - 1, -1, -1):
+                    if self._contem(self._capturas[indice], inicio_x, inicio_y, fim_x, fim_y):
+                        evento = self._capturas[indice]
+                        break
+            if evento is None:
+                return np.zeros((fim_y - inicio_y, fim_x - inicio_x), dtype=np.uint8)
+
+            cx0, cy0 = evento["retangulo"][:2]
+            quadro = self._quadro(evento["quadro"])
+            return quadro[inicio_y - cy0:fim_y - cy0, inicio_x - cx0:fim_x - cx0]
+
+    def avancar(self, segundos):
+        """Avança o relógio virtual (espera ou pausa durante o replay)"""
+        with self._lock:
+            self.instante += max(segundos, 0)
+
+    @property
+    def terminou(self):
+        """Indica se todas as capturas gravadas já foram consumidas"""
+        return self._posicao >= len(self._capturas)
+
+    def fechar(self):
+        """Fecha o arquivo de sessão"""
+        with self._lock:
+            self._zip.close()
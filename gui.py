@@ -197,6 +197,11 @@ class MacroGUI:
         
         self.debug_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(debug_frame, text="Enable Debug Mode", variable=self.debug_var).pack(anchor=tk.W, padx=5)
+        
+        # Learned search regions reset checkbox
+        self.reset_rois_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(debug_frame, text="Reset learned search regions",
+                        variable=self.reset_rois_var).pack(anchor=tk.W, padx=5)
     
     def toggle_project_input(self):
         if self.project_method.get() == "manual":
@@ -418,6 +423,30 @@ class MacroGUI:
             self.log("Starting macro operations. Please do not interfere with the mouse or keyboard.")
             self.log("This may take several minutes...")
             
+            # Load the search regions learned in previous runs
+            macro.rois.carregar(os.path.join(macro.logs_dir, "rois_aprendidas.json"))
+            if self.reset_rois_var.get():
+                macro.rois.resetar()
+                self.log("Learned search regions reset")
+            
+            # Load the match telemetry and the per-template thresholds derived from it
+            macro.telemetria.carregar(os.path.join(macro.logs_dir, "telemetria_correspondencia.json"))
+            
+            # Load the screen state fingerprints
+            macro.estados.carregar(os.path.join(macro.logs_dir, "estados_tela.npz"))
+            
+            # Start the out-of-process vision service if enabled
+            if macro.usar_servico_visao:
+                macro.servico_visao.iniciar()
+            
+            # Start background screen capture if enabled
+            if macro.captura_continua:
+                macro.captura.iniciar_captura_continua()
+            
+            # Record the session (captured frames and input actions) if enabled
+            if macro.gravar_sessao:
+                macro.captura.iniciar_gravacao(os.path.join(macro.logs_dir, f"sessao_{timestamp_execucao}.zip"))
+            
             # Call the main_logic function with our parameters
             try:
                 # Execute the main logic function
@@ -430,6 +459,14 @@ class MacroGUI:
                 self.log(f"Traceback: {traceback.format_exc()}")
                 macro.messagebox.showerror("Error", f"Error during macro execution: {str(e)}")
             
+            finally:
+                macro.captura.parar_captura_continua()
+                macro.servico_visao.parar()
+                macro.captura.parar_gravacao()
+                macro.rois.salvar()
+                macro.telemetria.salvar()
+                macro.estados.salvar()
+            
         except Exception as e:
             self.log(f"Error setting up macro execution: {str(e)}")
             import traceback
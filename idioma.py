@@ -0,0 +1,143 @@
+import os
+
+import captura
+import correspondencia
+import rois
+import telemetria
+import templates
+
+
+# Detecção do idioma da interface do DOORS. Muitas imagens têm uma variante em
+# inglês com o sufixo "_en" (ex: inserir.png / inserir_en.png); depois de
+# detectado o idioma, só a variante correspondente é procurada.
+usar_deteccao_idioma = True
+SUFIXOS = {"en": "_en"}  # idioma -> sufixo do nome da imagem (sem sufixo: português)
+
+# Pares de imagens sempre visíveis na janela principal do DOORS, usados na detecção
+ancoras = [
+    {"pt": "ferramentas.png", "en": "ferramentas_en.png"},
+    {"pt": "arquivo.png", "en": "arquivo_en.png"},
+]
+regiao_ancoras = (0, 0, 1, 0.4)
+limiar_ancoras = 0.8
+
+# Em esperarPor, as variantes descartadas também são procuradas a cada intervalo
+# (em segundos), para perceber uma troca de idioma sem esperar o timeout
+intervalo_busca_completa = 5
+
+_idioma = None  # idioma detectado ("pt" ou "en"), ou None se ainda não se sabe
+
+
+def idioma_da_imagem(nome):
+    """Retorna o idioma da variante pelo sufixo do nome (ex: 'inserir_en.png' -> 'en')"""
+    base = os.path.splitext(nome)[0]
+    for idioma, sufixo in SUFIXOS.items():
+        if base.endswith(sufixo):
+            return idioma
+    return "pt"
+
+
+def _nome_base(nome):
+    base, extensao = os.path.splitext(nome)
+    sufixo = SUFIXOS.get(idioma_da_imagem(nome))
+    if sufixo:
+        base = base[:-len(sufixo)]
+    return base + extensao
+
+
+def idioma_atual():
+    """Retorna o idioma detectado, ou None se ainda não foi detectado"""
+    return _idioma
+
+
+def definir_idioma(idioma):
+    """Define o idioma da interface manualmente (None volta a procurar todas as variantes)"""
+    global _idioma
+    _idioma = idioma
+
+
+def detectar():
+    """
+    Detecta o idioma da interface procurando as âncoras conhecidas na parte de
+    cima da janela do DOORS (ou da tela).
+
+    Returns:
+        str: Idioma detectado, ou None se nenhuma âncora foi encontrada
+    """
+    global _idioma
+    if not usar_deteccao_idioma:
+        return None
+    regiao, inicio_x, inicio_y = captura.capturar_regiao(*regiao_ancoras)[:3]
+    pontos = {}
+    for par in ancoras:
+        for idioma, nome in par.items():
+            template = templates.obter_template(nome)
+            if template is None:
+                continue
+            max_val, _ = correspondencia.corresponder(regiao, template, limiar_ancoras)
+            if max_val >= limiar_ancoras:
+                pontos[idioma] = pontos.get(idioma, 0) + max_val
+    _idioma = max(pontos, key=pontos.get) if pontos else None
+    return _idioma
+
+
+def filtrar(nomes):
+    """
+    Mantém só as variantes do idioma detectado. Imagens sem variante nesse
+    idioma são mantidas como estão.
+
+    Args:
+        nomes: Nomes das imagens alternativas
+
+    Returns:
+        list: Nomes mantidos, na ordem original
+    """
+    if _idioma is None or not usar_deteccao_idioma:
+        return list(nomes)
+    grupos = {}
+    for nome in nomes:
+        grupos.setdefault(_nome_base(nome), []).append(nome)
+    mantidos = set()
+    for variantes in grupos.values():
+        do_idioma = [nome for nome in variantes if idioma_da_imagem(nome) == _idioma]
+        mantidos.update(do_idioma or variantes)
+    return [nome for nome in nomes if nome in mantidos]
+
+
+def procurar(local, roi, alternativas, regiao, origem, limiar, completar=True, registrar_ausentes=True):
+    """
+    Procura as alternativas do idioma detectado (ver rois.procurar). Se nenhuma
+    for encontrada e completar for True, procura também as variantes
+    descartadas; se uma delas for encontrada, passa a usar o idioma dela.
+
+    Args:
+        local, roi, regiao, origem, limiar, registrar_ausentes: Ver rois.procurar
+        alternativas: Lista de (nome, template)
+        completar: Procura as variantes descartadas quando não encontra nada
+
+    Returns:
+        list: (max_val, max_loc) de cada alternativa (as não procuradas ficam com (-1.0, None))
+    """
+    global _idioma
+    mantidos = set(filtrar([nome for nome, _ in alternativas]))
+    indices = [i for i, (nome, _) in enumerate(alternativas) if nome in mantidos]
+    descartados = [i for i in range(len(alternativas)) if i not in indices]
+
+    resultados = [(-1.0, None)] * len(alternativas)
+    for i, resultado in zip(indices, rois.procurar(local, roi, [alternativas[i] for i in indices],
+                                                  regiao, origem, limiar, registrar_ausentes)):
+        resultados[i] = resultado
+    if not descartados or not completar or any(max_val >= telemetria.limiar(nome, limiar)
+                                               for (nome, _), (max_val, _) in zip(alternativas, resultados)):
+        return resultados
+
+    for i, resultado in zip(descartados, rois.procurar(local, roi, [alternativas[i] for i in descartados],
+                                                      regiao, origem, limiar, registrar_ausentes)):
+        resultados[i] = resultado
+    encontrados = [i for i in descartados if resultados[i][0] >= telemetria.limiar(alternativas[i][0], limiar)]
+    if encontrados:
+        melhor = max(encontrados, key=lambda i: resultados[i][0])
+        novo_idioma = idioma_da_imagem(alternativas[melhor][0])
+        print(f"UI language changed: {_idioma} -> {novo_idioma}")
+        _idioma = novo_idioma
+    return resultados
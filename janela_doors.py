@@ -0,0 +1,70 @@
+try:
+    import pygetwindow
+except Exception:
+    # pygetwindow ausente, ou sem suporte nesta plataforma (NotImplementedError fora do Windows/macOS)
+    pygetwindow = None
+
+
+# Trecho do título que identifica as janelas do DOORS
+titulo_janela = "DOORS"
+
+
+def _retangulo(janela):
+    return (janela.left, janela.top, janela.left + janela.width, janela.top + janela.height)
+
+
+def _escolher_janela():
+    """
+    Escolhe a janela principal do DOORS: a janela ativa, se for do DOORS
+    (explorer ou módulo aberto); caso contrário (ex: um diálogo está em
+    primeiro plano), a maior janela visível do DOORS.
+
+    Returns:
+        Janela do pygetwindow, ou None se nenhuma janela do DOORS for encontrada
+    """
+    if pygetwindow is None:
+        return None
+
+    try:
+        ativa = pygetwindow.getActiveWindow()
+        if ativa is not None and titulo_janela in (ativa.title or "") and not ativa.isMinimized:
+            return ativa
+
+        janelas = [j for j in pygetwindow.getWindowsWithTitle(titulo_janela)
+                   if not j.isMinimized and j.width > 0 and j.height > 0]
+    except Exception as e:
+        print(f"Error locating DOORS window: {e}")
+        return None
+
+    if not janelas:
+        return None
+    return max(janelas, key=lambda j: j.width * j.height)
+
+
+def fixar_janela_doors():
+    """
+    Escolhe a janela do DOORS uma única vez e retorna uma função que informa o
+    retângulo atual dessa mesma janela (pelo handle). A referência acompanha a
+    janela quando ela é movida ou redimensionada, mas não troca de janela
+    quando o foco passa do explorer para um módulo aberto.
+
+    Returns:
+        Função sem argumentos que retorna (inicio_x, inicio_y, fim_x, fim_y) da
+        janela em pixels, ou None se ela foi fechada ou minimizada (ou se
+        nenhuma janela do DOORS foi encontrada)
+    """
+    janela = _escolher_janela()
+
+    def localizar():
+        if janela is None:
+            return None
+        try:
+            if janela.isMinimized or janela.width <= 0 or janela.height <= 0:
+                return None
+            return _retangulo(janela)
+        except Exception as e:
+            # A janela foi fechada (handle inválido)
+            print(f"Error reading DOORS window position: {e}")
+            return None
+
+    return localizar
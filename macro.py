@@ -12,6 +12,16 @@ from tkinter import messagebox
 import pandas as pd
 from datetime import datetime
 import sys
+import captura
+import correspondencia
+import escala
+import estados
+import idioma
+import janela_doors
+import rois
+import servico_visao
+import telemetria
+import templates
 
 
 def get_resource_path(relative_path):
@@ -41,6 +51,63 @@ nome_arquivo_log = None
 nome_arquivo_caminhos = None
 caminhos_registrados = set()
 VFs = []  # Lista global de VFs a serem baixadas
+captura_continua = False  # Captura a tela em segundo plano (ver captura.iniciar_captura_continua)
+usar_janela_doors = False  # Coordenadas relativas à janela do DOORS em vez da tela inteira (as regiões foram ajustadas como frações da tela)
+gravar_sessao = False  # Grava as capturas e ações da execução em logs/sessao_<timestamp>.zip
+usar_servico_visao = False  # Correspondência e OCR num processo separado (ver servico_visao.py)
+timeout_exportacao = 600  # Tempo máximo (em segundos) de espera pelo fim da exportação de uma VF
+
+# Imagens de images/ usadas pelo macro.py, conferidas no início de main_logic
+# junto com as dos outros módulos (ver imagens_usadas). Toda imagem nova usada
+# aqui precisa entrar nesta lista.
+IMAGENS = [
+    "abrir_export.png", "abrir_export_en.png",
+    "abrir_somente_leitura.png", "abrir_somente_leitura_en.png",
+    "arquivo.png", "arquivo_en.png",
+    "barra.png",
+    "check_localizar.png",
+    "close_vf.png",
+    "confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png",
+    "continuar_close_vf.png", "continuar_close_vf_en.png",
+    "desktop_export.png",
+    "encontrar.png", "encontrar_en.png",
+    "exportar.png", "exportar_en.png",
+    "exportar_csv.png", "exportar_csv_en.png",
+    "fechar.png", "fechar_en.png",
+    "fechar_erro.png", "fechar_erro_en.png",
+    "fechar_localizar.png", "fechar_localizar_en.png",
+    "ferramentas.png", "ferramentas_en.png",
+    "icone_vf.png",
+    "inserir.png", "inserir_en.png",
+    "localizar.png", "localizar_en.png",
+    "main.png", "main_text.png",
+    "maximizar_vf.png",
+    "name.png", "name_main.png",
+    "novo.png", "novo_en.png",
+    "object_heading.png", "object_identifier.png", "object_level.png", "object_number.png", "object_text.png",
+    "pasta.png", "pasta_amarela.png",
+    "planilha_export.png", "planilha_export_en.png",
+    "procurar_export.png", "procurar_export_en.png",
+    "projects.png",
+    "remover.png", "remover_en.png",
+    "separador_coluna.png",
+    "tipo_menu.png", "tipo_menu_en.png",
+]
+
+def imagens_usadas():
+    """
+    Reúne os nomes de todas as imagens usadas: a lista IMAGENS deste módulo,
+    as imagens dos estados (estados.ESTADOS), as âncoras de idioma
+    (idioma.ancoras) e a âncora de escala (escala.ancora).
+
+    Returns:
+        set: Nomes dos arquivos de imagem
+    """
+    nomes = set(IMAGENS)
+    nomes.add(escala.ancora)
+    nomes.update(imagem for _, imagens, _ in estados.ESTADOS for imagem in imagens)
+    nomes.update(nome for par in idioma.ancoras for nome in par.values())
+    return nomes
 
 def limpar_arquivos_antigos(diretorio, prefixo, max_arquivos=10):
     """
@@ -252,6 +319,46 @@ def adicionar_vf_planilha(df, nome_arquivo, folder, vf_info, projeto):
     df.to_excel(nome_arquivo, index=False)
     return df
 
+def clicar(x, y, clickType="left", duration=0.5):
+    """
+    Executa um clique na posição indicada e avisa a camada de captura.
+    
+    Args:
+        x, y: Coordenadas absolutas do clique
+        clickType: Tipo de clique ('left', 'right', 'double' ou 'click')
+        duration: Duração do movimento do mouse até o ponto
+    """
+    if captura.replay_ativo():
+        # Reproduzindo uma sessão gravada: não executa ações reais
+        pass
+    elif clickType == "left":
+        pyautogui.leftClick(x, y, duration=duration)
+    elif clickType == "right":
+        pyautogui.rightClick(x, y, duration=duration)
+    elif clickType == "double":
+        pyautogui.doubleClick(x, y, duration=duration)
+    else:
+        pyautogui.click(x, y)
+    captura.notificar_entrada(clickType, x, y)
+
+def mover_mouse(x, y):
+    """Move o mouse para a posição indicada e avisa a camada de captura"""
+    if not captura.replay_ativo():
+        pyautogui.moveTo(x, y)
+    captura.notificar_entrada("move", x, y)
+
+def pressionar_atalho(*teclas):
+    """Pressiona uma combinação de teclas (ex: 'ctrl', 'v') e avisa a camada de captura"""
+    if not captura.replay_ativo():
+        pyautogui.hotkey(*teclas)
+    captura.notificar_entrada("hotkey", *teclas)
+
+def pressionar_tecla(tecla):
+    """Pressiona uma tecla e avisa a camada de captura"""
+    if not captura.replay_ativo():
+        pyautogui.press(tecla)
+    captura.notificar_entrada("press", tecla)
+
 def moveAndClick(image, clickType, offset_x=0, offset_y=0, iniX=0, iniY=0, fimX=1, fimY=1):
     """
     Move o mouse para uma imagem na tela e clica nela, com opção de offset e região de busca.
@@ -273,20 +380,8 @@ def moveAndClick(image, clickType, offset_x=0, offset_y=0, iniX=0, iniY=0, fimX=
     else:
         images = image
         
-    # Captura uma captura de tela
-    screenshot = pyautogui.screenshot()
-    screenshot = np.array(screenshot)
-    screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2GRAY)
-
-    # Calcula as coordenadas absolutas da região de busca
-    altura, largura = screenshot.shape[:2]
-    inicio_x = int(largura * iniX)
-    fim_x = int(largura * fimX)
-    inicio_y = int(altura * iniY)
-    fim_y = int(altura * fimY)
-    
-    # Recorta a região de busca
-    regiao_busca = screenshot[inicio_y:fim_y, inicio_x:fim_x]
+    # Captura apenas a região de busca, já em escala de cinza
+    regiao_busca, inicio_x, inicio_y, largura, altura = captura.capturar_regiao(iniX, iniY, fimX, fimY)
     
     # Define um limite de similaridade
     threshold = 0.7
@@ -297,20 +392,23 @@ def moveAndClick(image, clickType, offset_x=0, offset_y=0, iniX=0, iniY=0, fimX=
     best_image = None
     best_template = None
     
-    # Tenta encontrar cada imagem na região
+    # Carrega as imagens de referência (já em escala de cinza)
+    alternativas = []
     for img in images:
-        # Carrega a imagem de referência e a converte para escala de cinza
-        template = cv2.imread(r"images/"+img, cv2.IMREAD_GRAYSCALE)
+        template = templates.obter_template(img)
         if template is None:
             print(f"❌ Imagem '{img}' não encontrada!")
             continue
+        alternativas.append((img, template))
 
-        # Usa correspondência de modelo para encontrar a posição
-        result = cv2.matchTemplate(regiao_busca, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-        
+    # Procura as alternativas do idioma da interface, começando pela região onde
+    # foram encontradas nas execuções anteriores a partir deste mesmo local
+    resultados = idioma.procurar(sys._getframe(1).f_code.co_name, (iniX, iniY, fimX, fimY),
+                                 alternativas, regiao_busca, (inicio_x, inicio_y), threshold)
+
+    for (img, template), (max_val, max_loc) in zip(alternativas, resultados):
         # Se esta imagem tem uma correspondência melhor que as anteriores
-        if max_val >= threshold and max_val > best_score:
+        if max_val >= telemetria.limiar(img, threshold) and max_val > best_score:
             best_score = max_val
             best_match = max_loc
             best_image = img
@@ -326,12 +424,8 @@ def moveAndClick(image, clickType, offset_x=0, offset_y=0, iniX=0, iniY=0, fimX=
         
         print(f"✅ Imagem '{best_image}' encontrada com confiança: {best_score:.2f}")
         
-        if clickType == "left":
-            pyautogui.leftClick(center_x, center_y, duration=0.5)
-        elif clickType == "right":
-            pyautogui.rightClick(center_x, center_y, duration=0.5)
-        elif clickType == "double":
-            pyautogui.doubleClick(center_x, center_y, duration=0.5)
+        if clickType in ("left", "right", "double"):
+            clicar(center_x, center_y, clickType)
         return True
     else:
         imagens_str = ", ".join(images)
@@ -351,56 +445,55 @@ def mapear_pastas(icone_path, iniX, iniY, fimX, fimY):
         dict: Dicionário com as pastas mapeadas e suas coordenadas
     """
     print("🔍 Mapeando todas as pastas na interface...")
-    #Mover o mouse para o centro da tela
-    screen_width, screen_height = pyautogui.size()
-    pyautogui.moveTo(screen_width/2, screen_height/2)
-    time.sleep(1)
-    # Verifica se o arquivo de referência do ícone existe
-    if not os.path.exists(icone_path):
-        mensagem = f"Arquivo de ícone '{icone_path}' não encontrado!"
-        registrar_log(mensagem, "ERROR")
-        return {}
-    
-    # Carrega a imagem do ícone e converte para escala de cinza
-    icone_pasta = cv2.imread(icone_path, cv2.IMREAD_GRAYSCALE)
+    # Obtém o ícone (já em escala de cinza) do registro de templates
+    icone_pasta = templates.obter_template(os.path.basename(icone_path))
     if icone_pasta is None:
-        mensagem = f"Erro ao carregar o ícone de pasta!"
+        mensagem = f"Arquivo de ícone '{icone_path}' não encontrado!"
         registrar_log(mensagem, "ERROR")
         return {}
     
-    # Captura a tela
-    screenshot = pyautogui.screenshot()
-    screenshot_np = np.array(screenshot)
-    screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-    
-    # Identifica a região da árvore de pastas no DOORS
-    altura, largura = screenshot_cv.shape[:2]
-    
-    # A área da árvore de pastas está no lado esquerdo
-    inicio_x = int(largura * iniX)
-    fim_x = int(largura * fimX)
-    inicio_y = int(altura * iniY)
-    fim_y = int(altura * fimY)
-    
-    # Recorta a região da árvore e converte para escala de cinza
-    regiao_arvore = screenshot_cv[inicio_y:fim_y, inicio_x:fim_x]
-    regiao_arvore_gray = cv2.cvtColor(regiao_arvore, cv2.COLOR_BGR2GRAY)
+    # Captura apenas a região da árvore de pastas (lado esquerdo), já em escala de cinza
+    regiao_arvore_gray, inicio_x, inicio_y, largura, altura = captura.capturar_regiao(iniX, iniY, fimX, fimY)
     
     # Encontra todas as ocorrências do ícone de pasta na árvore
-    result = cv2.matchTemplate(regiao_arvore_gray, icone_pasta, cv2.TM_CCOEFF_NORMED)
+    result = correspondencia.mapa_correspondencia(regiao_arvore_gray, icone_pasta)
     
     # Abaixa o limite para correspondência
-    threshold = 0.65
+    threshold = telemetria.limiar(os.path.basename(icone_path), 0.65)
+    
+    icone_w, icone_h = icone_pasta.shape[:2]
+    
+    # Em vez de tirar o mouse do caminho, a faixa de linhas sob o cursor (ponteiro ou
+    # destaque de hover) é tratada com tolerância na correspondência e no OCR
+    faixa_cursor = captura.faixa_cursor(inicio_x, inicio_y,
+                                        inicio_x + regiao_arvore_gray.shape[1],
+                                        inicio_y + regiao_arvore_gray.shape[0])
     
     # Método de detecção de máximos locais
-    kernel = np.ones((5, 5), np.uint8)
-    dilated = cv2.dilate(result, kernel)
-    matches = np.where((result >= threshold) & (result == dilated))
-    pontos = list(zip(*matches[::-1]))
+    pontos = []
+    if result.size > 0:
+        kernel = np.ones((5, 5), np.uint8)
+        dilated = cv2.dilate(result, kernel)
+        aceitos = result >= threshold
+        if faixa_cursor is not None:
+            # Ícones que cruzam a faixa do cursor são aceitos com um limite menor
+            y0 = max(faixa_cursor[0] - icone_pasta.shape[0] + 1, 0)
+            y1 = min(faixa_cursor[1], result.shape[0])
+            if y0 < y1:
+                aceitos[y0:y1] |= result[y0:y1] >= threshold - captura.tolerancia_cursor
+        maximos_locais = result == dilated
+        matches = np.where(aceitos & maximos_locais)
+        pontos = list(zip(*matches[::-1]))
+        
+        # Telemetria: score de cada ícone aceito e do melhor pico recusado
+        for x, y in pontos:
+            telemetria.registrar(os.path.basename(icone_path), result[y, x], None, "acerto")
+        recusados = result[maximos_locais & ~aceitos]
+        if recusados.size:
+            telemetria.registrar(os.path.basename(icone_path), recusados.max(), None, "ausente")
     
     # Melhor sistema de agrupamento
     pontos_filtrados = []
-    icone_w, icone_h = icone_pasta.shape[:2]
     
     # Ordena os pontos por valor de correspondência
     pontos_com_score = [(pt[0], pt[1], result[pt[1], pt[0]]) for pt in pontos]
@@ -443,28 +536,31 @@ def mapear_pastas(icone_path, iniX, iniY, fimX, fimY):
     # Dicionário para armazenar os resultados
     pastas_mapeadas = {}
     
-    # Imagem para visualização do mapeamento
-    debug_regioes = regiao_arvore.copy()
+    # Imagem para visualização do mapeamento (só é criada no modo debug). Os arquivos
+    # levam o nome do ícone: os mapeamentos de ícones diferentes rodam em paralelo.
+    prefixo_debug = os.path.splitext(os.path.basename(icone_path))[0]
+    debug_regioes = cv2.cvtColor(regiao_arvore_gray, cv2.COLOR_GRAY2BGR) if debug else None
     
     for idx, (x, y) in enumerate(pontos_filtrados):
         # Define a região de interesse à direita do ícone
         # Move a área de análise mais para a esquerda para capturar melhor o texto
         roi_y_start = max(0, y)
-        roi_y_end = min(regiao_arvore.shape[0], y + icone_h)
+        roi_y_end = min(regiao_arvore_gray.shape[0], y + icone_h)
         
         # Ajuste para começar mais próximo ao ícone (menos pixels à direita)
         roi_x_start = x + icone_w -1  # Inicia 1 pixels antes do final do ícone
-        roi_x_end = min(regiao_arvore.shape[1], x + icone_w + 300)  # Limita a largura
+        roi_x_end = min(regiao_arvore_gray.shape[1], x + icone_w + 300)  # Limita a largura
         
         # Verifica se a região é válida
         if roi_x_start >= roi_x_end or roi_y_start >= roi_y_end:
             continue
         
-        # Extrai a região de interesse
-        roi = regiao_arvore[roi_y_start:roi_y_end, roi_x_start:roi_x_end]
+        # Extrai a região de interesse (já em escala de cinza)
+        roi_gray = regiao_arvore_gray[roi_y_start:roi_y_end, roi_x_start:roi_x_end]
         
-        # Converte para escala de cinza
-        roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        # Na linha sob o cursor, binariza para eliminar o fundo destacado pelo hover
+        if faixa_cursor is not None and roi_y_start < faixa_cursor[1] and faixa_cursor[0] < roi_y_end:
+            _, roi_gray = cv2.threshold(roi_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
         # Inverte a imagem para texto branco em fundo preto (melhora OCR)
         roi_inv = cv2.bitwise_not(roi_gray)
@@ -472,26 +568,27 @@ def mapear_pastas(icone_path, iniX, iniY, fimX, fimY):
         # Aplica OCR na região - usando a imagem invertida por padrão
         try:
             # Primeira tentativa com a imagem invertida e binarizada
-            texto = pytesseract.image_to_string(roi_inv, config=config_ocr).strip()
+            texto = servico_visao.ocr(roi_inv, config_ocr).strip()
                 
             # Se ainda não encontrou, tenta com a imagem original
             if not texto:
-                texto = pytesseract.image_to_string(roi_gray, config=config_ocr).strip()
+                texto = servico_visao.ocr(roi_gray, config_ocr).strip()
             
             # Remove caracteres indesejados
             texto = re.sub(r'[^a-zA-Z0-9\-_.]', '', texto)
             
             # Se encontrou algum texto válido
             if texto:
-                # Adiciona na imagem de debug
-                cv2.putText(debug_regioes, f"{idx}:{texto}", (roi_x_start, roi_y_start - 2), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
-                
-                # Marca região
-                cv2.rectangle(debug_regioes, 
-                            (roi_x_start, roi_y_start), 
-                            (roi_x_end, roi_y_end), 
-                            (0, 0, 255), 1)
+                if debug:
+                    # Adiciona na imagem de debug
+                    cv2.putText(debug_regioes, f"{idx}:{texto}", (roi_x_start, roi_y_start - 2), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
+                    
+                    # Marca região
+                    cv2.rectangle(debug_regioes, 
+                                (roi_x_start, roi_y_start), 
+                                (roi_x_end, roi_y_end), 
+                                (0, 0, 255), 1)
                 
                 print(f"Pasta {idx}: '{texto}'")
                 
@@ -511,12 +608,14 @@ def mapear_pastas(icone_path, iniX, iniY, fimX, fimY):
             print(f"Erro ao processar região do ícone {idx}: {e}")
         
         # Salva as imagens de processamento para debug
-        cv2.imwrite(f"{debug_dir}/roi_icone_{idx}_original.png", roi)
-        cv2.imwrite(f"{debug_dir}/roi_icone_{idx}_inv.png", roi_inv)
+        if debug:
+            cv2.imwrite(f"{debug_dir}/{prefixo_debug}_roi_icone_{idx}_original.png", roi_gray)
+            cv2.imwrite(f"{debug_dir}/{prefixo_debug}_roi_icone_{idx}_inv.png", roi_inv)
 
     
     # Salva a imagem com as pastas mapeadas
-    cv2.imwrite(f"{debug_dir}/pastas_mapeadas.png", debug_regioes)
+    if debug:
+        cv2.imwrite(f"{debug_dir}/{prefixo_debug}_pastas_mapeadas.png", debug_regioes)
     
     print(f"✅ Mapeamento concluído! {len(pastas_mapeadas)} pastas encontradas.")
     
@@ -573,31 +672,31 @@ def clicar_pasta(nome_pasta, mapa_pastas):
         click_x = pasta_encontrada['x']
         click_y = pasta_encontrada['y']
         
-        screenshot = pyautogui.screenshot()
-        screenshot_np = np.array(screenshot)
-        screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-        
-        # Marca o local do clique
-        cv2.circle(screenshot_cv, (click_x, click_y), 10, (0, 255, 0), -1)
-        cv2.rectangle(
-            screenshot_cv, 
-            (pasta_encontrada['icone_x'], pasta_encontrada['icone_y']), 
-            (pasta_encontrada['icone_x'] + 120, pasta_encontrada['icone_y'] + 20), 
-            (0, 0, 255), 2
-        )
-        
-        # Adiciona texto indicando a pasta
-        cv2.putText(screenshot_cv, 
-                   f"Clicando em: {pasta_texto}", 
-                   (click_x + 20, click_y - 20), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                   
+        # A captura da tela inteira só é feita para a imagem de debug
         if debug:
+            tela_gray = captura.capturar_regiao()[0]
+            screenshot_cv = cv2.cvtColor(tela_gray, cv2.COLOR_GRAY2BGR)
+            
+            # Marca o local do clique
+            cv2.circle(screenshot_cv, (click_x, click_y), 10, (0, 255, 0), -1)
+            cv2.rectangle(
+                screenshot_cv, 
+                (pasta_encontrada['icone_x'], pasta_encontrada['icone_y']), 
+                (pasta_encontrada['icone_x'] + 120, pasta_encontrada['icone_y'] + 20), 
+                (0, 0, 255), 2
+            )
+            
+            # Adiciona texto indicando a pasta
+            cv2.putText(screenshot_cv, 
+                       f"Clicando em: {pasta_texto}", 
+                       (click_x + 20, click_y - 20), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            
             cv2.imwrite(f"{debug_dir}/clique_pasta.png", screenshot_cv)
         
         print(f"🖱️ Clicando em ({click_x}, {click_y})")
-        time.sleep(0.5)
-        pyautogui.doubleClick(click_x, click_y, duration=0.5)
+        captura.pausar(0.5)
+        clicar(click_x, click_y, "double")
         return True
     else:
         mensagem = f"Folder '{nome_pasta}' not found in the mapping"
@@ -622,7 +721,7 @@ def esperarPor(image, timeout=30, iniX=0.1, iniY=0.1, fimX=0.23, fimY=0.95, imag
         bool: True se alguma imagem foi encontrada, False caso contrário ou se houve interrupção
               A imagem encontrada é registrada no log
     """
-    start_time = time.time()
+    start_time = captura.relogio()
     
     # Converte imagens únicas em listas para processamento uniforme
     if isinstance(image, str):
@@ -639,23 +738,23 @@ def esperarPor(image, timeout=30, iniX=0.1, iniY=0.1, fimX=0.23, fimY=0.95, imag
             interrupcao_images = imagem_interrupcao
     
     # Carrega todas as imagens principais de uma vez
-    templates = []
+    templates_principais = []
     for img in images:
-        template = cv2.imread(r"images/"+img, cv2.IMREAD_GRAYSCALE)
+        template = templates.obter_template(img)
         if template is None:
             mensagem = f"Image '{img}' loading error. Check if it exists in 'images/'"
             registrar_log(mensagem, "ERROR")
             continue
-        templates.append((img, template))
+        templates_principais.append((img, template))
     
-    if not templates:
+    if not templates_principais:
         registrar_log("None of the images could be loaded", "ERROR")
         return False
     
     # Carrega todas as imagens de interrupção
     interrupcao_templates = []
     for img in interrupcao_images:
-        template = cv2.imread(r"images/"+img, cv2.IMREAD_GRAYSCALE)
+        template = templates.obter_template(img)
         if template is None:
             mensagem = f"Erro ao carregar imagem de interrupção '{img}'"
             registrar_log(mensagem, "ERROR")
@@ -675,74 +774,123 @@ def esperarPor(image, timeout=30, iniX=0.1, iniY=0.1, fimX=0.23, fimY=0.95, imag
     # Define um limite de similaridade
     threshold = 0.7
     
-    while time.time() - start_time < timeout:
-        # Captura uma captura de tela completa
-        screenshot = pyautogui.screenshot()
-        screenshot_np = np.array(screenshot)
+    # Local da chamada, para as ROIs aprendidas (ver rois.py)
+    local = sys._getframe(1).f_code.co_name
+    
+    # Quadros da captura contínua anteriores à última ação de entrada já não valem
+    instante_verificado = captura.instante_ultima_entrada()
+    
+    # Impressões digitais das regiões na última verificação
+    impressoes = {}
+    
+    # Regiões observadas entre as verificações
+    regioes_observadas = [(iniX, iniY, fimX, fimY)]
+    if interrupcao_templates:
+        regioes_observadas.append((interrupcao_iniX, interrupcao_iniY, interrupcao_fimX, interrupcao_fimY))
+    
+    # Instante da última busca que incluiu as variantes de outros idiomas
+    # (None: a primeira verificação já procura todas as variantes)
+    ultima_busca_completa = None
+    
+    # Melhor score de cada imagem principal durante a espera (telemetria de timeouts)
+    melhores_scores = {}
+    
+    # Regiões cujas ausências já foram registradas na telemetria: só a primeira
+    # verificação de cada uma conta, para a espera não encher a telemetria
+    ausencias_registradas = set()
+    
+    while captura.relogio() - start_time < timeout:
+        # De tempos em tempos, procura também as variantes de outros idiomas
+        busca_completa = (ultima_busca_completa is None
+                          or captura.relogio() - ultima_busca_completa >= idioma.intervalo_busca_completa)
+        if busca_completa:
+            ultima_busca_completa = captura.relogio()
         
-        # Calcula coordenadas da região de busca para imagem principal
-        altura, largura = screenshot_np.shape[:2]
-        inicio_x = int(largura * iniX)
-        fim_x = int(largura * fimX)
-        inicio_y = int(altura * iniY)
-        fim_y = int(altura * fimY)
+        # Com a captura contínua ativa, verifica todos os quadros capturados desde a
+        # última verificação (inclusive os logo após o clique que disparou a espera)
+        quadros = captura.quadros_desde(instante_verificado)
+        if quadros:
+            instante_verificado = quadros[-1][0]
+            regioes = []
+            for _, quadro in quadros:
+                regiao_gray, inicio_x, inicio_y = captura.recortar_quadro(quadro, iniX, iniY, fimX, fimY)[:3]
+                regiao_interrupcao_gray, inicio_int_x, inicio_int_y = captura.recortar_quadro(
+                    quadro, interrupcao_iniX, interrupcao_iniY, interrupcao_fimX, interrupcao_fimY)[:3]
+                regioes.append((regiao_gray, (inicio_x, inicio_y),
+                                regiao_interrupcao_gray, (inicio_int_x, inicio_int_y)))
+        else:
+            # Captura apenas a região de busca da imagem principal
+            regiao_gray, inicio_x, inicio_y = captura.capturar_regiao(iniX, iniY, fimX, fimY)[:3]
+            regiao_interrupcao_gray, origem_interrupcao = None, None
+            if interrupcao_templates:
+                # Captura a região de busca da imagem de interrupção
+                regiao_interrupcao_gray, inicio_int_x, inicio_int_y = captura.capturar_regiao(
+                    interrupcao_iniX, interrupcao_iniY, interrupcao_fimX, interrupcao_fimY)[:3]
+                origem_interrupcao = (inicio_int_x, inicio_int_y)
+            regioes = [(regiao_gray, (inicio_x, inicio_y), regiao_interrupcao_gray, origem_interrupcao)]
         
-        # Recorta a região da tela para imagem principal
-        regiao = screenshot_np[inicio_y:fim_y, inicio_x:fim_x]
-        regiao_gray = cv2.cvtColor(regiao, cv2.COLOR_RGB2GRAY)
+        for regiao_gray, origem, regiao_interrupcao_gray, origem_interrupcao in regioes:
+            # Verifica primeiro se alguma imagem de interrupção foi encontrada.
+            # Se a região não mudou desde a última verificação, o resultado seria o mesmo,
+            # a não ser que desta vez as variantes de outros idiomas também sejam procuradas.
+            if interrupcao_templates and (captura.regiao_mudou(regiao_interrupcao_gray, impressoes, "interrupcao")
+                                          or busca_completa):
+                # Verifica todas as imagens de interrupção ao mesmo tempo
+                resultados_int = idioma.procurar(
+                    local, (interrupcao_iniX, interrupcao_iniY, interrupcao_fimX, interrupcao_fimY),
+                    interrupcao_templates, regiao_interrupcao_gray, origem_interrupcao, 0.8, busca_completa,
+                    "interrupcao" not in ausencias_registradas)
+                ausencias_registradas.add("interrupcao")
+                for (nome_img, template), (max_val_int, max_loc_int) in zip(interrupcao_templates, resultados_int):
+                    if debug:
+                        # Salva a região recortada usada na comparação
+                        cv2.imwrite(f"{debug_dir}/regiao_{nome_img}.png", regiao_interrupcao_gray)
+                
+                    if max_val_int >= telemetria.limiar(nome_img, 0.8):  # threshold
+                        mensagem = f"Interruption image '{nome_img}' found"
+                        registrar_log(mensagem, "WARNING")
+                        return False
         
-        # Verifica primeiro se alguma imagem de interrupção foi encontrada
-        if interrupcao_templates:
-            # Calcula coordenadas da região de busca para imagem de interrupção
-            inicio_x_int = int(largura * interrupcao_iniX)
-            fim_x_int = int(largura * interrupcao_fimX)
-            inicio_y_int = int(altura * interrupcao_iniY)
-            fim_y_int = int(altura * interrupcao_fimY)
-            
-            # Recorta a região para imagem de interrupção
-            regiao_interrupcao = screenshot_np[inicio_y_int:fim_y_int, inicio_x_int:fim_x_int]
-            regiao_interrupcao_gray = cv2.cvtColor(regiao_interrupcao, cv2.COLOR_RGB2GRAY)
+            # Só refaz a correspondência se a região principal mudou (ou se é uma busca completa)
+            if not captura.regiao_mudou(regiao_gray, impressoes, "principal") and not busca_completa:
+                continue
             
-            # Verifica cada imagem de interrupção
-            for nome_img, template in interrupcao_templates:
+            # Procura todas as imagens principais ao mesmo tempo; a primeira da lista
+            # que alcança o limite vence, como na busca uma a uma
+            resultados = idioma.procurar(local, (iniX, iniY, fimX, fimY),
+                                         templates_principais, regiao_gray, origem, threshold, busca_completa,
+                                         "principal" not in ausencias_registradas)
+            ausencias_registradas.add("principal")
+            for (nome_img, template), (max_val, max_loc) in zip(templates_principais, resultados):
                 if debug:
                     # Salva a região recortada usada na comparação
-                    cv2.imwrite(f"{debug_dir}/regiao_{nome_img}.png", regiao_interrupcao_gray)
-                
-                result_interrupcao = cv2.matchTemplate(regiao_interrupcao_gray, template, cv2.TM_CCOEFF_NORMED)
-                min_val_int, max_val_int, min_loc_int, max_loc_int = cv2.minMaxLoc(result_interrupcao)
-                
-                if max_val_int >= 0.8:  # threshold
-                    mensagem = f"Interruption image '{nome_img}' found"
-                    registrar_log(mensagem, "WARNING")
-                    return False
-        
-        # Procura cada imagem principal
-        for nome_img, template in templates:
-            if debug:
-                # Salva a região recortada usada na comparação
-                cv2.imwrite(f"{debug_dir}/regiao_{nome_img}.png", regiao_gray)
+                    cv2.imwrite(f"{debug_dir}/regiao_{nome_img}.png", regiao_gray)
             
-            # Usa correspondência de modelo para encontrar a imagem principal
-            result = cv2.matchTemplate(regiao_gray, template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            if max_val >= threshold:
-                mensagem = f"Image '{nome_img}' found with confidence: {max_val:.2f}"
-                registrar_log(mensagem, "INFO")
-                time.sleep(1)
-                return True
+                if not isinstance(max_val, correspondencia.ScoreReduzido):
+                    melhores_scores[nome_img] = max(max_val, melhores_scores.get(nome_img, -1.0))
+                if max_val >= telemetria.limiar(nome_img, threshold):
+                    mensagem = f"Image '{nome_img}' found with confidence: {max_val:.2f}"
+                    registrar_log(mensagem, "INFO")
+                    captura.pausar(1)
+                    return True
         
-        time.sleep(1)
-    
-    imagens_str = ", ".join([img for img, _ in templates])
+        # Com a captura contínua ativa, verifica a cada novo quadro em vez de a cada segundo.
+        # No modo de espera "damage", acorda assim que algum pixel das regiões mudar.
+        intervalo = captura.intervalo_captura() if captura.captura_continua_ativa() else 1
+        captura.aguardar_mudanca(regioes_observadas, intervalo, timeout - (captura.relogio() - start_time))
+    
+    for img, _ in templates_principais:
+        if img in melhores_scores:
+            telemetria.registrar(img, melhores_scores[img], None, "timeout")
+    imagens_str = ", ".join([img for img, _ in templates_principais])
     registrar_log(f"Timeout of {timeout} seconds: None of the images [{imagens_str}] was found", "WARNING")
     return False
 
 def encontrar_coordenadas_y_main(iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.6):
     """
     Procura pela imagem main.png na tela e retorna suas coordenadas Y mais baixa (min)
-    e mais alta (max) como valores relativos (0 a 1) em relação à altura da tela.
+    e mais alta (max) como valores relativos (0 a 1) em relação à altura da janela do DOORS
+    (ou da tela, se a janela não foi fixada).
     
     Args:
         iniX, iniY, fimX, fimY: Coordenadas relativas da região de busca (0 a 1)
@@ -752,34 +900,20 @@ def encontrar_coordenadas_y_main(iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.6):
                ou (0.1, 0.4) por padrão se a imagem não for encontrada
     """
     # Carrega a imagem de referência
-    template = cv2.imread(r"images/main.png", cv2.IMREAD_GRAYSCALE)
+    template = templates.obter_template("main.png")
     if template is None:
         mensagem = f"Erro ao carregar imagem 'main.png'. Verifique se existe em 'images/'"
         registrar_log(mensagem, "ERROR")
         return (0.1, 0.4)  # Valores padrão
     
-    # Captura uma screenshot da tela
-    screenshot = pyautogui.screenshot()
-    screenshot_np = np.array(screenshot)
-    
-    # Converte para escala de cinza
-    screenshot_gray = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2GRAY)
-    
-    # Calcula as coordenadas absolutas da região de busca
-    altura, largura = screenshot_gray.shape[:2]
-    inicio_x = int(largura * iniX)
-    fim_x = int(largura * fimX)
-    inicio_y = int(altura * iniY)
-    fim_y = int(altura * fimY)
-    
-    # Recorta a região de busca
-    regiao_busca = screenshot_gray[inicio_y:fim_y, inicio_x:fim_x]
+    # Captura apenas a região de busca, já em escala de cinza
+    regiao_busca, inicio_x, inicio_y, largura, altura = captura.capturar_regiao(iniX, iniY, fimX, fimY)
     
     # Usa correspondência de modelo para encontrar todas as ocorrências da imagem
-    result = cv2.matchTemplate(regiao_busca, template, cv2.TM_CCOEFF_NORMED)
+    result = correspondencia.mapa_correspondencia(regiao_busca, template)
     
     # Define um limite de similaridade
-    threshold = 0.7
+    threshold = telemetria.limiar("main.png", 0.7)
     
     # Encontra todas as ocorrências acima do threshold
     locations = np.where(result >= threshold)
@@ -793,9 +927,9 @@ def encontrar_coordenadas_y_main(iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.6):
         y_min_abs = inicio_y + y_min_regiao
         y_max_abs = inicio_y + y_max_regiao
         
-        # Converte para valores relativos à altura total da tela
-        y_min_rel = y_min_abs / altura
-        y_max_rel = y_max_abs / altura
+        # Converte para valores relativos à janela do DOORS (ou à tela)
+        y_min_rel = captura.coordenadas_relativas(0, y_min_abs)[1]
+        y_max_rel = captura.coordenadas_relativas(0, y_max_abs)[1]
         
         return (y_min_rel, y_max_rel)
     
@@ -803,6 +937,45 @@ def encontrar_coordenadas_y_main(iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.6):
     registrar_log("Could not find Y coordinates of the main.png image", "WARNING")
     return (0.1, 0.4)
 
+def esperar_exportacao(diretorio, inicio, timeout):
+    """
+    Espera a exportação terminar: um arquivo CSV do diretório gravado depois
+    do início da exportação, com o tamanho estável entre duas verificações.
+    O ícone do DOORS não serve para isso, porque também aparece na barra de
+    título do próprio diálogo de exportação. Se aparecer o erro de DXL, a
+    espera termina.
+
+    Args:
+        diretorio: Diretório onde o DOORS grava o CSV
+        inicio: Instante (time.time) em que a exportação foi disparada, comparado
+                com a data de modificação dos arquivos
+        timeout: Tempo máximo de espera em segundos
+
+    Returns:
+        str: Caminho do CSV exportado, ou None se houve erro ou o tempo acabou
+    """
+    tamanhos = {}
+    inicio_espera = captura.relogio()
+    primeira = True
+    while captura.relogio() - inicio_espera < timeout:
+        # Só a primeira verificação do erro registra a ausência na telemetria
+        if estados.classificar(["erro"], registrar_ausentes=primeira) == "erro":
+            return None
+        primeira = False
+        try:
+            arquivos = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+                        if nome.lower().endswith(".csv")]
+            recentes = {caminho: os.path.getsize(caminho) for caminho in arquivos
+                        if os.path.getmtime(caminho) >= inicio - 1}
+        except OSError:
+            recentes = {}
+        for caminho, tamanho in recentes.items():
+            if tamanho > 0 and tamanhos.get(caminho) == tamanho:
+                return caminho
+        tamanhos = recentes
+        captura.pausar(1)
+    return None
+
 def baixarVF(nome_VF, output_dir=None):
     """
     Baixa uma VF e salva como arquivo Excel
@@ -820,85 +993,87 @@ def baixarVF(nome_VF, output_dir=None):
     
     registrar_log(f"Starting download of VF: {nome_VF}", "INFO")
 
-    if esperarPor("maximizar_vf.png", timeout=5, iniX=0.1, iniY=0.05, fimX=0.7, fimY=0.5):
+    # Identifica numa passada se a VF abriu maximizada ou não, sem esperar o timeout
+    if estados.esperar(["modulo_nao_maximizado", "modulo"], timeout=5) == "modulo_nao_maximizado":
         moveAndClick("maximizar_vf.png", "left")
-        time.sleep(0.7)
+        captura.pausar(0.7)
     
     esperarPor("main.png", timeout=10, iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.4)
     
     # Encontra as coordenadas Y da imagem main.png
     y_min, y_max = encontrar_coordenadas_y_main()
     
-    if esperarPor("separador_coluna.png", timeout=5, iniX=0.11, iniY=y_min, fimX=0.3, fimY=y_max):
+    # Com o módulo já aberto, as colunas extras estão ou não na tela: basta uma verificação
+    if estados.classificar(["colunas_extras"], regioes={"colunas_extras": (0.11, y_min, 0.3, y_max)}):
         moveAndClick("separador_coluna.png", "right", offset_x=-50)
-        time.sleep(0.7)
+        captura.pausar(0.7)
         moveAndClick(["remover.png", "remover_en.png"], "left")
-        time.sleep(0.7)
+        captura.pausar(0.7)
 
     
     #Organizar a VF
     if not moveAndClick("main.png", "right"):
-        moveAndClick("close_VF.png", "left")
+        moveAndClick("close_vf.png", "left")
         esperarPor(["continuar_close_vf.png", "continuar_close_vf_en.png"], timeout=10, iniX=0.05, iniY=0.05, fimX=0.8, fimY=0.95)
         moveAndClick(["continuar_close_vf.png", "continuar_close_vf_en.png"], "left")
-        time.sleep(2)
+        captura.pausar(2)
         registrar_log(f"Failed to click on 'main.png' for VF {nome_VF}", "ERROR")
         return False
     esperarPor(["novo.png", "novo_en.png"], timeout=10, iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.95)
     moveAndClick(["novo.png", "novo_en.png"], "left")
     esperarPor("barra.png", timeout=10, iniX=0.05, iniY=0.05, fimX=0.95, fimY=0.95)
     moveAndClick("barra.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("object_text.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("name.png", "left")
     pyperclip.copy("Main")
-    time.sleep(1)
-    pyautogui.hotkey('ctrl', 'v') 
-    time.sleep(0.7)
+    captura.pausar(1)
+    pressionar_atalho('ctrl', 'v') 
+    captura.pausar(0.7)
     moveAndClick(["inserir.png", "inserir_en.png"], "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("name_main.png", "left")
-    time.sleep(1)
-    pyautogui.hotkey('ctrl', 'a')
-    time.sleep(1.1)
-    pyautogui.press('delete')
-    time.sleep(1.1)
+    captura.pausar(1)
+    pressionar_atalho('ctrl', 'a')
+    captura.pausar(1.1)
+    pressionar_tecla('delete')
+    captura.pausar(1.1)
     moveAndClick("barra.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("object_heading.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick(["inserir.png", "inserir_en.png"], "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("barra.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("object_number.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick(["inserir.png", "inserir_en.png"], "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("barra.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("object_level.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick(["inserir.png", "inserir_en.png"], "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("barra.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("object_identifier.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick("name.png", "left")
     pyperclip.copy("RegID")
-    time.sleep(1)
-    pyautogui.hotkey('ctrl', 'v') 
-    time.sleep(0.7)
+    captura.pausar(1)
+    pressionar_atalho('ctrl', 'v') 
+    captura.pausar(0.7)
     moveAndClick(["inserir.png", "inserir_en.png"], "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick(["fechar.png", "fechar_en.png"], "left")
     esperarPor("main_text.png", timeout=10, iniX=0.1, iniY=0.1, fimX=1, fimY=0.4)
     moveAndClick("main_text.png", "right", offset_x=200)
     esperarPor(["remover.png", "remover_en.png"], timeout=10, iniX=0.3, iniY=0.05, fimX=1, fimY=0.5)
     moveAndClick(["remover.png", "remover_en.png"], "left")
-    time.sleep(1)
+    captura.pausar(1)
     #Exportar a VF
     moveAndClick(["arquivo.png", "arquivo_en.png"], "left")
     esperarPor(["exportar.png", "exportar_en.png"], timeout= 30, iniX=0, iniY=0, fimX=0.6, fimY=0.5)
@@ -912,18 +1087,33 @@ def baixarVF(nome_VF, output_dir=None):
     # poderíamos inserir o caminho completo, mas usando automação temos limitações
     esperarPor("desktop_export.png", timeout= 30, iniX=0.4, iniY=0.2, fimX=0.9, fimY=0.80)
     moveAndClick("desktop_export.png", "left")
-    time.sleep(0.7)
+    captura.pausar(0.7)
     moveAndClick(["abrir_export.png", "abrir_export_en.png"], "left")
     esperarPor(["exportar_csv.png", "exportar_csv_en.png"], timeout= 30, iniX=0.3, iniY=0.50, fimX=0.6, fimY=0.80)
+    inicio_exportacao = time.time()
     moveAndClick(["exportar_csv.png", "exportar_csv_en.png"], "left")
-    #Checando se tem repetido
-    if esperarPor(["confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png"], timeout= 5, iniX=0.25, iniY=0.3, fimX=0.7, fimY=0.7):
+    #Checando se tem repetido: espera até 5 segundos pelo aviso de sobrescrever (ou por um erro)
+    desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
+    estado = estados.esperar(["erro", "sobrescrever"], timeout=5)
+    if estado == "sobrescrever":
         moveAndClick(["confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png"], "left")
-        time.sleep(0.7)
-    #Esperando o export acabar
-    exportando = True
-    while exportando:
-        exportando = esperarPor("doors_icon.png", timeout= 5, iniX=0.3, iniY=0.20, fimX=0.6, fimY=0.4)
+        captura.pausar(0.7)
+    #Esperando o export acabar (a espera termina antes se aparecer o erro de DXL)
+    if estado != "erro" and esperar_exportacao(desktop_path, inicio_exportacao, timeout_exportacao) is None:
+        estado = "erro" if estados.classificar(["erro"]) == "erro" else "timeout"
+    if estado in ("erro", "timeout"):
+        if estado == "erro":
+            moveAndClick(["fechar_erro.png", "fechar_erro_en.png"], "left")
+            captura.pausar(0.7)
+        moveAndClick("close_vf.png", "left")
+        esperarPor(["continuar_close_vf.png", "continuar_close_vf_en.png"], timeout=10, iniX=0.05, iniY=0.05, fimX=0.8, fimY=0.95)
+        moveAndClick(["continuar_close_vf.png", "continuar_close_vf_en.png"], "left")
+        captura.pausar(2)
+        if estado == "erro":
+            registrar_log(f"DXL error while exporting VF {nome_VF}", "ERROR")
+        else:
+            registrar_log(f"Export of VF {nome_VF} did not finish within {timeout_exportacao} seconds", "ERROR")
+        return False
     
     # Se tiver um diretório de saída, tenta mover o arquivo para lá depois de exportado
     if output_dir:
@@ -933,7 +1123,6 @@ def baixarVF(nome_VF, output_dir=None):
                 os.makedirs(output_dir)
                 
             # Nome esperado do arquivo no Desktop (o código atual salva no Desktop)
-            desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
             arquivo_csv = os.path.join(desktop_path, f"{nome_VF}.csv")
             
             # Verifica se o arquivo existe
@@ -948,10 +1137,10 @@ def baixarVF(nome_VF, output_dir=None):
             registrar_log(f"Error moving exported file to output directory: {str(e)}", "ERROR")
     
     #Fechando VF
-    moveAndClick("close_VF.png", "left")
+    moveAndClick("close_vf.png", "left")
     esperarPor(["continuar_close_vf.png", "continuar_close_vf_en.png"], timeout=10, iniX=0.05, iniY=0.05, fimX=0.8, fimY=0.95)
     moveAndClick(["continuar_close_vf.png", "continuar_close_vf_en.png"], "left")
-    time.sleep(2)
+    captura.pausar(2)
     registrar_log(f"Download of VF {nome_VF} completed successfully", "INFO")
     return True
 
@@ -1043,17 +1232,16 @@ def encontrar_pasta_requisitos(mapa_pastas):
     return None
 
 def voltar_nivel(nivel):
-    # Obtém as dimensões da tela
-    screen_width, screen_height = pyautogui.size()
-    # Clica no meio da tela
-    pyautogui.click(screen_width/2, screen_height/2)
-    time.sleep(0.5)
-    pyautogui.hotkey('shift', 'tab')
-    time.sleep(1)
+    # Clica no meio da janela do DOORS (ou da tela)
+    centro_x, centro_y = captura.centro_referencia()
+    clicar(centro_x, centro_y, "click")
+    captura.pausar(0.5)
+    pressionar_atalho('shift', 'tab')
+    captura.pausar(1)
     for i in range(nivel):
-        time.sleep(0.5)
-        pyautogui.hotkey('shift', 'left')  # Usa hotkey para pressionar shift + seta esquerda
-    time.sleep(0.5)
+        captura.pausar(0.5)
+        pressionar_atalho('shift', 'left')  # Usa hotkey para pressionar shift + seta esquerda
+    captura.pausar(0.5)
 
 def encontrar_posicao_xy(image, iniX=0, iniY=0, fimX=1, fimY=1):
     """
@@ -1066,7 +1254,8 @@ def encontrar_posicao_xy(image, iniX=0, iniY=0, fimX=1, fimY=1):
         iniX, iniY, fimX, fimY: Coordenadas relativas da região de busca
         
     Returns:
-        tuple: (x_percentual, y_percentual) - Coordenadas como percentual da tela
+        tuple: (x_percentual, y_percentual) - Coordenadas como percentual da janela do DOORS
+               (ou da tela, se a janela não foi fixada)
                ou (None, None) se a imagem não for encontrada
     """
     # Converte uma imagem única em uma lista para processamento uniforme
@@ -1075,19 +1264,8 @@ def encontrar_posicao_xy(image, iniX=0, iniY=0, fimX=1, fimY=1):
     else:
         images = image
     
-    # Captura uma captura de tela completa
-    screenshot = pyautogui.screenshot()
-    screenshot_np = np.array(screenshot)
-    
-    # Calcula coordenadas da região de busca
-    altura, largura = screenshot_np.shape[:2]
-    inicio_x = int(largura * iniX)
-    fim_x = int(largura * fimX)
-    inicio_y = int(altura * iniY)
-    fim_y = int(altura * fimY)
-    
-    # Recorta a região da tela
-    regiao = screenshot_np[inicio_y:fim_y, inicio_x:fim_x]
+    # Captura apenas a região de busca, já em escala de cinza
+    regiao_gray, inicio_x, inicio_y, largura, altura = captura.capturar_regiao(iniX, iniY, fimX, fimY)
     
     # Define um limite de similaridade
     threshold = 0.7
@@ -1097,24 +1275,23 @@ def encontrar_posicao_xy(image, iniX=0, iniY=0, fimX=1, fimY=1):
     best_loc = None
     best_image = None
     
-    # Tenta encontrar cada imagem na região
+    # Carrega as imagens de referência (já em escala de cinza)
+    alternativas = []
     for img in images:
-        # Carrega a imagem de referência e a converte para escala de cinza
-        template = cv2.imread(r"images/"+img, cv2.IMREAD_GRAYSCALE)
+        template = templates.obter_template(img)
         if template is None:
             mensagem = f"Erro ao carregar imagem '{img}'. Verifique se existe em 'images/'"
             registrar_log(mensagem, "ERROR")
             continue
-        
-        # Converte a região de busca para escala de cinza
-        regiao_gray = cv2.cvtColor(regiao, cv2.COLOR_RGB2GRAY)
-        
-        # Usa correspondência de modelo para encontrar a imagem
-        result = cv2.matchTemplate(regiao_gray, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-        
+        alternativas.append((img, template))
+    
+    # Procura as alternativas do idioma da interface, começando pela região aprendida
+    resultados = idioma.procurar(sys._getframe(1).f_code.co_name, (iniX, iniY, fimX, fimY),
+                                 alternativas, regiao_gray, (inicio_x, inicio_y), threshold)
+    
+    for (img, template), (max_val, max_loc) in zip(alternativas, resultados):
         # Se esta imagem tem uma correspondência melhor que as anteriores
-        if max_val >= threshold and max_val > best_score:
+        if max_val >= telemetria.limiar(img, threshold) and max_val > best_score:
             best_score = max_val
             best_loc = max_loc
             best_image = img
@@ -1125,9 +1302,8 @@ def encontrar_posicao_xy(image, iniX=0, iniY=0, fimX=1, fimY=1):
         x_absoluto = inicio_x + best_loc[0]
         y_absoluto = inicio_y + best_loc[1]
         
-        # Converte para percentual da tela
-        x_percentual = x_absoluto / largura
-        y_percentual = y_absoluto / altura
+        # Converte para percentual da janela do DOORS (ou da tela)
+        x_percentual, y_percentual = captura.coordenadas_relativas(x_absoluto, y_absoluto)
         
         registrar_log(f"Image '{best_image}' found with confidence: {best_score:.2f}", "INFO")
         return x_percentual, y_percentual
@@ -1143,22 +1319,22 @@ def procura_projeto(nome):
     moveAndClick(["ferramentas.png", "ferramentas_en.png"], "left")
     esperarPor(["localizar.png", "localizar_en.png"], timeout=30, iniX=0.01, iniY= 0.05, fimX=0.7, fimY=0.4)
     moveAndClick(["localizar.png", "localizar_en.png"], "left")
-    esperarPor("check_localizar.png", timeout=30, iniX=0.3, iniY=0.2, fimX=7, fimY=0.8)
-    time.sleep(0.5) 
-    pyautogui.hotkey('ctrl', 'v') 
-    time.sleep(1)
+    esperarPor("check_localizar.png", timeout=30, iniX=0.3, iniY=0.2, fimX=0.7, fimY=0.8)
+    captura.pausar(0.5) 
+    pressionar_atalho('ctrl', 'v') 
+    captura.pausar(1)
     moveAndClick("check_localizar.png", "left")
-    time.sleep(0.5)
+    captura.pausar(0.5)
     moveAndClick(["encontrar.png", "encontrar_en.png"], "left")
     if esperarPor("pasta.png",timeout=10, iniX=0.3, iniY=0.4, fimX=0.7, fimY=0.8):
-        moveAndClick(["pasta.png", "pasta_en.png"], "double", iniX=0.3, iniY=0.4, fimX=0.7, fimY=0.8)
-        time.sleep(2)
+        moveAndClick("pasta.png", "double", iniX=0.3, iniY=0.4, fimX=0.7, fimY=0.8)
+        captura.pausar(2)
         moveAndClick(["fechar_localizar.png", "fechar_localizar_en.png"], "left")
-        time.sleep(1)
+        captura.pausar(1)
         return True
     else:
         moveAndClick(["fechar_localizar.png", "fechar_localizar_en.png"], "left")
-        time.sleep(1)
+        captura.pausar(1)
         return False
 
 def filtrar_codigos_por_regiao(caminho_planilha, regiao):
@@ -1294,7 +1470,39 @@ def main_logic(projetos, dominios, use_cases, VFs_param, output_dir=None):
     limpar_arquivos_antigos(logs_dir, "log_", 10)
     limpar_arquivos_antigos(logs_dir, "caminhos_", 10)
 
-    time.sleep(5)
+    # Verifica se todas as imagens usadas (aqui e nos módulos que citam imagens
+    # pelo nome) existem e as carrega uma única vez
+    erros_templates = templates.verificar_manifesto(imagens_usadas())
+    if erros_templates:
+        for erro in erros_templates:
+            registrar_log(erro, "ERROR")
+        messagebox.showerror("Error", "Missing template images:\n" + "\n".join(erros_templates))
+        return
+    registrar_log(f"{templates.carregar_templates()} template images loaded", "INFO")
+
+    captura.pausar(5)
+
+    # Fixa uma janela do DOORS para toda a execução; as regiões de busca passam a ser relativas a ela
+    if usar_janela_doors:
+        janela = captura.fixar_janela(janela_doors.fixar_janela_doors())
+        if janela:
+            registrar_log(f"DOORS window located at {janela}", "INFO")
+        else:
+            registrar_log("DOORS window not found, using full screen coordinates", "WARNING")
+
+    # Detecta a escala da interface (DPI) para procurar os templates só nessa escala
+    escala_interface = escala.detectar()
+    if escala_interface:
+        registrar_log(f"DOORS UI scale detected: {escala_interface:g}x", "INFO")
+    else:
+        registrar_log("DOORS UI scale not detected, using templates at their original scale", "WARNING")
+
+    # Detecta o idioma da interface para procurar só as variantes dele
+    idioma_interface = idioma.detectar()
+    if idioma_interface:
+        registrar_log(f"DOORS UI language detected: {idioma_interface}", "INFO")
+    else:
+        registrar_log("DOORS UI language not detected, searching all language variants", "WARNING")
 
     # Clicando no botão projetos
     if not moveAndClick("projects.png", "left"):
@@ -1428,9 +1636,12 @@ def main_logic(projetos, dominios, use_cases, VFs_param, output_dir=None):
                         if pos_x is None:
                             pos_x, pos_y = 0.3, 0.1  # Valores padrão
                             registrar_log("Could not find tipo_menu.png, using default coordinates", "WARNING")
-                        time.sleep(0.5)  
-                        sub_pastas = mapear_pastas(icone_path="images/pasta_amarela.png", iniX=0.1, iniY=pos_y, fimX=pos_x, fimY=0.95)
-                        vf_nomes = mapear_pastas(icone_path="images/icone_vf.png", iniX=0.1, iniY=pos_y, fimX=pos_x, fimY=0.95)
+                        captura.pausar(0.5)  
+                        # Mapeia subpastas e VFs ao mesmo tempo (correspondência e OCR em paralelo)
+                        sub_pastas, vf_nomes = correspondencia.executar_em_paralelo([
+                            (mapear_pastas, ("images/pasta_amarela.png", 0.1, pos_y, pos_x, 0.95)),
+                            (mapear_pastas, ("images/icone_vf.png", 0.1, pos_y, pos_x, 0.95)),
+                        ])
 
                         # Se não encontrou nem subpastas nem VFs, é uma pasta vazia
                         if not sub_pastas and not vf_nomes:
@@ -1547,7 +1758,7 @@ def main_logic(projetos, dominios, use_cases, VFs_param, output_dir=None):
                                     
                                     if baixar:
                                         clicar_pasta(vf_nome, vf_nomes)
-                                        time.sleep(1)
+                                        captura.pausar(1)
                                         moveAndClick("abrir_somente_leitura.png", "left")
                                         esperarPor("main.png", timeout=20, iniX=0.1, iniY=0.1, fimX=0.9, fimY=0.5)
                                         sucesso = baixarVF(vf_nome, output_dir)
@@ -1564,13 +1775,13 @@ def main_logic(projetos, dominios, use_cases, VFs_param, output_dir=None):
                                             vfs_list=VFs
                                         )
 
-                                time.sleep(1)
+                                captura.pausar(1)
                                 voltar_nivel(1)
 
-                            time.sleep(1)   
+                            captura.pausar(1)   
                             voltar_nivel(2)
                         else:
-                            time.sleep(1)
+                            captura.pausar(1)
                             voltar_nivel(1)
             else:
                 # Lista os domínios encontrados no mapa
@@ -1584,7 +1795,7 @@ def main_logic(projetos, dominios, use_cases, VFs_param, output_dir=None):
         
         voltar_nivel(voltar)
         moveAndClick("projects.png", "left")
-        time.sleep(0.5)
+        captura.pausar(0.5)
 
     print(f"\n✅ Process completed! The spreadsheet was saved at: {nome_arquivo_vfs}")
     messagebox.showinfo("Completed", f"Process finished!\nThe spreadsheet was saved at:\n{nome_arquivo_vfs}")
@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+
+import captura
+import correspondencia
+import servico_visao
+import telemetria
+
+
+# ROIs aprendidas: para cada template e local de chamada, guarda onde ele foi
+# encontrado de fato e passa a procurar primeiro numa região justa ao redor
+# dessas posições. Se não encontrar lá, a busca volta para a ROI original.
+usar_rois_aprendidas = True
+arquivo_rois = None  # Definido pela interface (logs/rois_aprendidas.json)
+acertos_minimos = 3  # Acertos necessários antes de usar a ROI aprendida
+max_acertos = 20  # Posições guardadas por template e local (as mais recentes)
+margem_roi = 0.02  # Folga ao redor das posições, relativa à janela do DOORS (ou à tela)
+
+# Ordem das alternativas: as imagens que mais foram encontradas nesta máquina são
+# procuradas primeiro, e as que nunca foram encontradas vão para o fim da lista.
+# Se a primeira alcançar corte_confianca, as outras nem são procuradas.
+ordenar_alternativas = True
+corte_confianca = 0.95
+
+# A margem de um acerto (até o segundo melhor ponto, ver telemetria) é medida só
+# na vizinhança da posição encontrada, com esta folga em tamanhos do template de
+# cada lado, e não na região inteira
+vizinhanca_margem = 3
+
+_lock = threading.Lock()
+_acertos = {}  # "local|roi original|template" -> lista de [x0, y0, x1, y1] relativos
+_contagem = {}  # template -> número de vezes em que foi encontrado
+_alterado = False
+
+
+def carregar(caminho):
+    """
+    Carrega as ROIs aprendidas em execuções anteriores.
+
+    Args:
+        caminho: Arquivo JSON onde as ROIs são guardadas
+    """
+    global arquivo_rois, _acertos, _contagem, _alterado
+    arquivo_rois = caminho
+    with _lock:
+        _acertos = {}
+        _contagem = {}
+        _alterado = False
+        if not os.path.exists(caminho):
+            return
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load learned search regions ({e}), starting from scratch")
+            return
+        if "rois" in dados:
+            _acertos = dados["rois"]
+            _contagem = dados.get("contagem", {})
+        else:
+            # Formato antigo: só as ROIs
+            _acertos = dados
+
+
+def salvar():
+    """Grava as ROIs aprendidas, se algo mudou desde a última gravação"""
+    global _alterado
+    with _lock:
+        if arquivo_rois is None or not _alterado:
+            return
+        try:
+            with open(arquivo_rois, "w", encoding="utf-8") as f:
+                json.dump({"rois": _acertos, "contagem": _contagem}, f)
+            _alterado = False
+        except OSError as e:
+            print(f"Could not save learned search regions: {e}")
+
+
+def resetar():
+    """Esquece todas as ROIs aprendidas e o histórico de acertos (inclusive os gravados em disco)"""
+    global _alterado
+    with _lock:
+        _acertos.clear()
+        _contagem.clear()
+        _alterado = False
+        if arquivo_rois is not None and os.path.exists(arquivo_rois):
+            os.remove(arquivo_rois)
+
+
+def _chave(local, roi, nome):
+    return f"{local}|{','.join(f'{v:g}' for v in roi)}|{nome}"
+
+
+def roi_aprendida(local, roi, nomes):
+    """
+    Retorna a ROI aprendida para um conjunto de imagens alternativas.
+
+    Args:
+        local: Local da chamada (nome da função que fez a busca)
+        roi: ROI original (iniX, iniY, fimX, fimY)
+        nomes: Nomes das imagens procuradas
+
+    Returns:
+        tuple: (iniX, iniY, fimX, fimY) dentro da ROI original, ou None se
+               ainda não há acertos suficientes
+    """
+    if not usar_rois_aprendidas:
+        return None
+    caixas = []
+    with _lock:
+        for nome in nomes:
+            acertos = _acertos.get(_chave(local, roi, nome), [])
+            if len(acertos) >= acertos_minimos:
+                caixas.extend(acertos)
+    if not caixas:
+        return None
+    ini_x = max(min(c[0] for c in caixas) - margem_roi, roi[0])
+    ini_y = max(min(c[1] for c in caixas) - margem_roi, roi[1])
+    fim_x = min(max(c[2] for c in caixas) + margem_roi, roi[2])
+    fim_y = min(max(c[3] for c in caixas) + margem_roi, roi[3])
+    if ini_x >= fim_x or ini_y >= fim_y:
+        return None
+    return ini_x, ini_y, fim_x, fim_y
+
+
+def registrar_acerto(local, roi, nome, x, y, largura, altura):
+    """
+    Registra onde uma imagem foi encontrada.
+
+    Args:
+        local: Local da chamada
+        roi: ROI original (iniX, iniY, fimX, fimY)
+        nome: Nome da imagem encontrada
+        x, y: Canto superior esquerdo da correspondência, em pixels da tela
+        largura, altura: Dimensões do template
+    """
+    global _alterado
+    x0, y0 = captura.coordenadas_relativas(x, y)
+    x1, y1 = captura.coordenadas_relativas(x + largura, y + altura)
+    with _lock:
+        acertos = _acertos.setdefault(_chave(local, roi, nome), [])
+        acertos.append([round(x0, 4), round(y0, 4), round(x1, 4), round(y1, 4)])
+        del acertos[:-max_acertos]
+        _contagem[nome] = _contagem.get(nome, 0) + 1
+        _alterado = True
+
+
+def _ordem(nomes):
+    """Índices das alternativas, das mais encontradas para as nunca encontradas (estável)"""
+    with _lock:
+        return sorted(range(len(nomes)), key=lambda i: -_contagem.get(nomes[i], 0))
+
+
+def _corresponder(regiao, nomes, lista_templates, limiar, origem):
+    """Procura os templates no serviço de visão, se estiver ativo, ou neste processo"""
+    resultados = servico_visao.corresponder_alternativas(regiao, nomes, lista_templates, limiar, origem)
+    if resultados is None:
+        resultados = correspondencia.corresponder_alternativas(regiao, lista_templates, limiar, nomes, origem)
+    return resultados
+
+
+def _corresponder_em_ordem(regiao, alternativas, limiar, origem):
+    """
+    Procura as alternativas pela ordem do histórico: a primeira sozinha e, se
+    não alcançar corte_confianca, as demais em paralelo. Alternativas que não
+    chegaram a ser procuradas ficam com (-1.0, None).
+    """
+    nomes = [nome for nome, _ in alternativas]
+    lista_templates = [template for _, template in alternativas]
+    if not ordenar_alternativas or len(alternativas) == 1:
+        return _corresponder(regiao, nomes, lista_templates, limiar, origem)
+
+    ordem = _ordem(nomes)
+    primeira = ordem[0]
+    resultados = [(-1.0, None)] * len(alternativas)
+    resultados[primeira] = _corresponder(regiao, [nomes[primeira]], [lista_templates[primeira]], limiar, origem)[0]
+    if resultados[primeira][0] >= max(limiar, corte_confianca):
+        return resultados
+
+    restantes = _corresponder(regiao, [nomes[i] for i in ordem[1:]], [lista_templates[i] for i in ordem[1:]],
+                              limiar, origem)
+    for indice, resultado in zip(ordem[1:], restantes):
+        resultados[indice] = resultado
+    return resultados
+
+
+def _segundo_pico_vizinhanca(regiao, template, max_loc):
+    """Segundo melhor ponto do template numa vizinhança de max_loc (ver correspondencia.segundo_pico)"""
+    altura, largura = template.shape[:2]
+    x0 = max(max_loc[0] - vizinhanca_margem * largura, 0)
+    y0 = max(max_loc[1] - vizinhanca_margem * altura, 0)
+    vizinhanca = regiao[y0:max_loc[1] + (vizinhanca_margem + 1) * altura,
+                        x0:max_loc[0] + (vizinhanca_margem + 1) * largura]
+    return correspondencia.segundo_pico(vizinhanca, template, (max_loc[0] - x0, max_loc[1] - y0))
+
+
+def procurar(local, roi, alternativas, regiao, origem, limiar, registrar_ausentes=True):
+    """
+    Procura as imagens alternativas na região capturada, começando pela ROI
+    aprendida e passando para a região inteira (ROI original) só se nenhuma
+    for encontrada nela. Em cada região, as alternativas são procuradas pela
+    ordem do histórico de acertos, parando na primeira acima de corte_confianca.
+    O resultado de cada alternativa procurada é registrado na telemetria.
+
+    Args:
+        local: Local da chamada (nome da função que fez a busca)
+        roi: ROI original (iniX, iniY, fimX, fimY) usada na captura
+        alternativas: Lista de (nome, template)
+        regiao: Região capturada com a ROI original, em escala de cinza
+        origem: Posição (x, y) da região na tela
+        limiar: Score mínimo de uma correspondência definido no código (cada
+                template pode ter um limiar próprio, ver telemetria.limiar)
+        registrar_ausentes: Registra na telemetria as alternativas não encontradas.
+                            Esperas que repetem a busca registram só a primeira
+                            verificação, para não encher a telemetria de ausências.
+
+    Returns:
+        list: (max_val, max_loc) de cada alternativa, com max_loc relativo à região
+    """
+    nomes = [nome for nome, _ in alternativas]
+    limiares = [telemetria.limiar(nome, limiar) for nome in nomes]
+    limiar = min(limiares, default=limiar)
+
+    resultados = None
+    aprendida = roi_aprendida(local, roi, nomes)
+    if aprendida is not None:
+        ax0, ay0, ax1, ay1 = captura.regiao_absoluta(*aprendida)
+        x0 = min(max(ax0 - origem[0], 0), regiao.shape[1])
+        y0 = min(max(ay0 - origem[1], 0), regiao.shape[0])
+        recorte = regiao[y0:max(ay1 - origem[1], y0), x0:max(ax1 - origem[0], x0)]
+        parciais = _corresponder_em_ordem(recorte, alternativas, limiar, (origem[0] + x0, origem[1] + y0))
+        if any(max_val >= limiar_nome for (max_val, _), limiar_nome in zip(parciais, limiares)):
+            resultados = [(max_val, (max_loc[0] + x0, max_loc[1] + y0) if max_loc is not None else None)
+                          for max_val, max_loc in parciais]
+
+    if resultados is None:
+        # Nada na ROI aprendida (ou ainda não há uma): procura na ROI original
+        resultados = _corresponder_em_ordem(regiao, alternativas, limiar, origem)
+
+    for (nome, template), (max_val, max_loc), limiar_nome in zip(alternativas, resultados, limiares):
+        if max_loc is None:
+            # Não chegou a ser procurada (ou a região é menor que o template)
+            continue
+        if max_val < limiar_nome:
+            # Scores do nível reduzido da pirâmide não entram na telemetria
+            if registrar_ausentes and not isinstance(max_val, correspondencia.ScoreReduzido):
+                telemetria.registrar(nome, max_val, None, "ausente")
+            continue
+        registrar_acerto(local, roi, nome, origem[0] + max_loc[0], origem[1] + max_loc[1],
+                         template.shape[1], template.shape[0])
+        margem = None
+        if telemetria.precisa_margem(nome):
+            margem = max_val - _segundo_pico_vizinhanca(regiao, template, max_loc)
+        telemetria.registrar(nome, max_val, margem, "acerto")
+    return resultados
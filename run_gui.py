@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 import gui
@@ -12,6 +13,10 @@ def include_modules():
     return None
 
 if __name__ == "__main__":
+    # Precisa ser a primeira coisa no executável do PyInstaller: o processo do
+    # serviço de visão (ver servico_visao.py) é iniciado por este mesmo executável
+    multiprocessing.freeze_support()
+
     # Configurar diretório de trabalho para garantir que os recursos sejam encontrados
     base_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(base_dir)
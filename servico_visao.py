@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytesseract
+
+import correspondencia
+import templates
+
+
+# Serviço de visão fora do processo da interface: a correspondência de modelo e
+# o OCR rodam num processo dedicado, que não disputa o GIL com a janela Tk e
+# pode usar outros núcleos. As regiões capturadas passam por memória
+# compartilhada; pedidos e respostas passam por um Pipe local. A captura fica
+# neste processo, junto com a invalidação do cache pelas ações de entrada, a
+# gravação e o replay de sessões.
+tamanho_minimo_memoria = 8 * 1024 * 1024  # Tamanho inicial do bloco de memória compartilhada
+
+_lock = threading.Lock()
+_processo = None
+_conexao = None
+_memoria = None  # Bloco de memória compartilhada onde as imagens são passadas ao serviço
+
+
+def ativo():
+    """Indica se o processo do serviço de visão está rodando"""
+    return _processo is not None and _processo.is_alive()
+
+
+def iniciar():
+    """
+    Inicia o processo do serviço de visão. Os templates são carregados pelo
+    próprio serviço, do mesmo diretório (e do mesmo pacote mapeado em memória).
+    """
+    global _processo, _conexao
+    if ativo():
+        return
+    contexto = multiprocessing.get_context("spawn")
+    _conexao, conexao_servico = contexto.Pipe()
+    _processo = contexto.Process(target=_servico, name="servico_visao", daemon=True,
+                                 args=(conexao_servico, os.path.abspath(templates.diretorio_templates),
+                                       pytesseract.pytesseract.tesseract_cmd))
+    _processo.start()
+    conexao_servico.close()
+
+
+def parar():
+    """Encerra o serviço de visão e libera a memória compartilhada"""
+    global _processo, _conexao, _memoria
+    with _lock:
+        if _processo is not None:
+            try:
+                _conexao.send(("sair",))
+            except (OSError, ValueError):
+                pass
+            _processo.join(timeout=2)
+            if _processo.is_alive():
+                _processo.terminate()
+            _conexao.close()
+        if _memoria is not None:
+            _memoria.close()
+            _memoria.unlink()
+        _processo = _conexao = _memoria = None
+
+
+def _publicar(imagem):
+    """Copia a imagem para a memória compartilhada (aumentando o bloco se preciso) e retorna sua descrição"""
+    global _memoria
+    if _memoria is None or _memoria.size < imagem.nbytes:
+        if _memoria is not None:
+            _memoria.close()
+            _memoria.unlink()
+        _memoria = shared_memory.SharedMemory(create=True, size=max(imagem.nbytes, tamanho_minimo_memoria))
+    np.ndarray(imagem.shape, dtype=np.uint8, buffer=_memoria.buf)[:] = imagem
+    return _memoria.name, imagem.shape
+
+
+def _pedir(pedido):
+    """
+    Envia um pedido ao serviço e espera a resposta.
+
+    Returns:
+        A resposta do serviço, ou None se ele falhou (o chamador faz o trabalho
+        neste processo)
+    """
+    try:
+        _conexao.send(pedido)
+        situacao, resposta = _conexao.recv()
+    except (EOFError, OSError) as e:
+        print(f"❌ Vision service stopped ({e}), running vision in-process")
+        _processo.terminate()
+        return None
+    if situacao != "ok":
+        print(f"❌ Vision service error: {resposta}")
+        return None
+    return resposta
+
+
+def corresponder_alternativas(regiao, nomes, lista_templates, limiar, origem):
+    """
+    Procura os templates alternativos na região dentro do serviço de visão
+    (ver correspondencia.corresponder_alternativas).
+
+    Args:
+        regiao: Região de busca em escala de cinza
+        nomes: Nome de cada template no registro de templates
+        lista_templates: Templates em escala de cinza
+        limiar: Score mínimo de uma correspondência
+        origem: Posição (x, y) da região na tela
+
+    Returns:
+        list: (max_val, max_loc) de cada template, ou None se o serviço não
+              estiver ativo ou se algum template não vier do registro
+    """
+    if not ativo() or regiao.size == 0:
+        return None
+    # O serviço só conhece os templates do registro, pelo nome
+    if any(templates.obter_template(nome) is not template for nome, template in zip(nomes, lista_templates)):
+        return None
+    with _lock:
+        if not ativo():
+            return None
+        return _pedir(("corresponder", _publicar(regiao), list(nomes), limiar, origem, templates.escala))
+
+
+def ocr(imagem, config):
+    """
+    Aplica o OCR (Tesseract) na imagem, no serviço de visão se ele estiver ativo.
+
+    Args:
+        imagem: Imagem em escala de cinza
+        config: Configuração do Tesseract
+
+    Returns:
+        str: Texto reconhecido
+    """
+    if ativo() and imagem.size:
+        with _lock:
+            texto = _pedir(("ocr", _publicar(imagem), config)) if ativo() else None
+        if texto is not None:
+            return texto
+    return pytesseract.image_to_string(imagem, config=config)
+
+
+def _anexar(nome):
+    try:
+        # Python 3.13+: o bloco pertence ao processo da interface, que o libera
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=nome)
+
+
+def _atender(pedido, imagem):
+    if pedido[0] == "corresponder":
+        _, _, nomes, limiar, origem, escala = pedido
+        templates.definir_escala(escala)
+        lista_templates = [templates.obter_template(nome) for nome in nomes]
+        presentes = [i for i, template in enumerate(lista_templates) if template is not None]
+        resultados = [(-1.0, None)] * len(nomes)
+        for i, resultado in zip(presentes, correspondencia.corresponder_alternativas(
+                imagem, [lista_templates[i] for i in presentes], limiar, [nomes[i] for i in presentes], origem)):
+            resultados[i] = resultado
+        return resultados
+    if pedido[0] == "ocr":
+        return pytesseract.image_to_string(imagem, config=pedido[2])
+    raise ValueError(f"unknown request '{pedido[0]}'")
+
+
+def _servico(conexao, diretorio_templates, comando_tesseract):
+    """Laço do processo do serviço de visão: atende um pedido por vez até receber 'sair'"""
+    templates.diretorio_templates = diretorio_templates
+    pytesseract.pytesseract.tesseract_cmd = comando_tesseract
+    memoria = None
+    while True:
+        try:
+            pedido = conexao.recv()
+        except (EOFError, OSError):
+            break
+        if pedido[0] == "sair":
+            break
+        try:
+            nome_memoria, forma = pedido[1]
+            if memoria is None or memoria.name != nome_memoria:
+                if memoria is not None:
+                    memoria.close()
+                memoria = _anexar(nome_memoria)
+            resposta = _atender(pedido, np.ndarray(forma, dtype=np.uint8, buffer=memoria.buf))
+            conexao.send(("ok", resposta))
+        except Exception as e:
+            conexao.send(("erro", f"{type(e).__name__}: {e}"))
+    if memoria is not None:
+        memoria.close()
@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+
+# Telemetria das correspondências: cada busca registra, por template, o melhor
+# score, a margem até o segundo melhor ponto da região e o resultado. Com
+# registros suficientes, cada template ganha um limiar próprio, no meio do
+# intervalo entre os scores de quando ele está ausente e de quando está na tela.
+usar_telemetria = True
+usar_limiares_adaptativos = True
+arquivo_telemetria = None  # Definido pela interface (logs/telemetria_correspondencia.json)
+max_registros = 300  # Registros guardados por template (os mais recentes)
+amostras_minimas = 30  # Registros necessários antes de derivar um limiar
+amostras_minimas_grupo = 5  # Registros mínimos em cada grupo (ausente / presente)
+separacao_minima = 0.2  # Distância mínima entre as médias dos dois grupos
+ajuste_maximo = 0.15  # Quanto o limiar derivado pode se afastar do limiar do código
+amostras_margem = 5  # Acertos por template e execução em que a margem é calculada
+
+_lock = threading.Lock()
+_registros = {}  # template -> lista de [score, margem (ou None), resultado]
+_limiares = {}  # template -> limiar derivado dos registros das execuções anteriores
+_margens_calculadas = {}  # template -> margens calculadas nesta execução
+_alterado = False
+
+
+def carregar(caminho):
+    """
+    Carrega a telemetria das execuções anteriores e deriva os limiares de cada
+    template. Os limiares ficam fixos durante a execução.
+
+    Args:
+        caminho: Arquivo JSON onde a telemetria é guardada
+    """
+    global arquivo_telemetria, _registros, _alterado
+    arquivo_telemetria = caminho
+    with _lock:
+        _registros = {}
+        _limiares.clear()
+        _margens_calculadas.clear()
+        _alterado = False
+        if not os.path.exists(caminho):
+            return
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                _registros = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load match telemetry ({e}), starting from scratch")
+            return
+        for nome, registros in _registros.items():
+            limiar_derivado = derivar_limiar([score for score, _, resultado in registros
+                                              if resultado != "timeout"])
+            if limiar_derivado is not None:
+                _limiares[nome] = limiar_derivado
+
+
+def salvar():
+    """Grava a telemetria e o relatório (relatorio_correspondencia.txt), se algo mudou"""
+    global _alterado
+    with _lock:
+        if arquivo_telemetria is None or not _alterado:
+            return
+        try:
+            with open(arquivo_telemetria, "w", encoding="utf-8") as f:
+                json.dump(_registros, f)
+            caminho_relatorio = os.path.join(os.path.dirname(arquivo_telemetria), "relatorio_correspondencia.txt")
+            with open(caminho_relatorio, "w", encoding="utf-8") as f:
+                f.write(_relatorio())
+            _alterado = False
+        except OSError as e:
+            print(f"Could not save match telemetry: {e}")
+
+
+def registrar(nome, score, margem, resultado):
+    """
+    Registra o resultado de uma busca.
+
+    Args:
+        nome: Nome da imagem procurada
+        score: Melhor score da busca
+        margem: Diferença entre o melhor score e o segundo melhor ponto (None se não calculada)
+        resultado: "acerto", "ausente" ou "timeout" (espera que esgotou o tempo; score é o melhor da espera)
+    """
+    global _alterado
+    if not usar_telemetria:
+        return
+    with _lock:
+        registros = _registros.setdefault(nome, [])
+        registros.append([round(float(score), 4), None if margem is None else round(float(margem), 4), resultado])
+        del registros[:-max_registros]
+        _alterado = True
+
+
+def precisa_margem(nome):
+    """
+    Indica se a margem deste acerto deve ser calculada. Calcular a margem exige
+    uma busca completa a mais, então só é feito nos primeiros acertos de cada
+    template em cada execução.
+    """
+    if not usar_telemetria:
+        return False
+    with _lock:
+        calculadas = _margens_calculadas.get(nome, 0)
+        if calculadas >= amostras_margem:
+            return False
+        _margens_calculadas[nome] = calculadas + 1
+        return True
+
+
+def limiar(nome, padrao):
+    """
+    Retorna o limiar a usar para um template.
+
+    Args:
+        nome: Nome da imagem
+        padrao: Limiar definido no código para esta busca
+
+    Returns:
+        float: Limiar derivado da telemetria (no máximo ajuste_maximo longe do
+               padrão), ou o próprio padrão se ainda não há dados suficientes
+    """
+    if not usar_limiares_adaptativos:
+        return padrao
+    derivado = _limiares.get(nome)
+    if derivado is None:
+        return padrao
+    return min(max(derivado, padrao - ajuste_maximo), padrao + ajuste_maximo)
+
+
+def derivar_limiar(scores):
+    """
+    Separa os scores em dois grupos (template ausente / presente) pelo método de
+    Otsu e coloca o limiar no meio do intervalo entre o maior score do grupo de
+    baixo e o menor do grupo de cima, o mais longe possível dos dois tipos de erro.
+
+    Args:
+        scores: Melhores scores das buscas de um template
+
+    Returns:
+        float: Limiar derivado, ou None se não há registros suficientes ou os
+               dois grupos não estão bem separados
+    """
+    if len(scores) < amostras_minimas:
+        return None
+    valores = np.sort(np.asarray(scores, dtype=np.float64))
+    quantidade = len(valores)
+    acumulado = np.cumsum(valores)
+    tamanhos = np.arange(1, quantidade)
+    media_baixo = acumulado[:-1] / tamanhos
+    media_alto = (acumulado[-1] - acumulado[:-1]) / (quantidade - tamanhos)
+    variancia = tamanhos * (quantidade - tamanhos) * (media_alto - media_baixo) ** 2
+    validos = (tamanhos >= amostras_minimas_grupo) & (quantidade - tamanhos >= amostras_minimas_grupo)
+    if not validos.any():
+        return None
+    variancia[~validos] = -1
+    corte = int(np.argmax(variancia))
+    if media_alto[corte] - media_baixo[corte] < separacao_minima:
+        return None
+    return round(float((valores[corte] + valores[corte + 1]) / 2), 3)
+
+
+def relatorio():
+    """Retorna o resumo da telemetria, um template por linha"""
+    with _lock:
+        return _relatorio()
+
+
+def _formatar(valor):
+    return "-" if valor is None else f"{valor:.2f}"
+
+
+def _relatorio():
+    linhas = ["MATCH TELEMETRY REPORT",
+              "template: searches, hits, timeouts | lowest hit, highest miss, smallest margin | threshold for the next run",
+              ""]
+    for nome in sorted(_registros):
+        registros = _registros[nome]
+        acertos = [score for score, _, resultado in registros if resultado == "acerto"]
+        ausentes = [score for score, _, resultado in registros if resultado == "ausente"]
+        timeouts = [score for score, _, resultado in registros if resultado == "timeout"]
+        margens = [margem for _, margem, _ in registros if margem is not None]
+
+        limiar_derivado = derivar_limiar(acertos + ausentes)
+        linhas.append(
+            f"{nome}: {len(acertos) + len(ausentes)} searches, {len(acertos)} hits, {len(timeouts)} timeouts | "
+            f"{_formatar(min(acertos, default=None))}, {_formatar(max(ausentes, default=None))}, "
+            f"{_formatar(min(margens, default=None))} | "
+            f"{'derived ' + _formatar(limiar_derivado) if limiar_derivado is not None else 'default'}")
+        quase = [score for score in timeouts if score >= 0.5]
+        if quase:
+            linhas.append(f"    near misses on timeout: best scores {', '.join(f'{s:.2f}' for s in sorted(quase))}")
+        if margens and min(margens) < 0.1:
+            linhas.append("    AMBIGUOUS: another spot in the region scores almost as high")
+    return "\n".join(linhas) + "\n"
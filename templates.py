@@ -0,0 +1,302 @@
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+# Diretório com as imagens de referência (templates)
+diretorio_templates = "images"
+
+# Limite de memória (em bytes) dos templates decodificados mantidos em memória.
+# Use 0 para manter todos. Acima do limite, os usados há mais tempo são descartados
+# e decodificados de novo quando forem pedidos.
+limite_memoria_templates = 0
+
+# Pacote pré-compilado com todos os templates já em escala de cinza, mapeado em
+# memória. É reconstruído automaticamente quando as imagens mudam.
+usar_pacote = True
+arquivo_pacote = "templates.pack"
+_MAGICO = b"MDTPACK1"
+_ALINHAMENTO = 64
+
+# Escala da interface em relação à escala em que as imagens foram capturadas
+# (ex: 1.25 com o Windows em 125%). Definida por escala.detectar() no início da
+# execução; os templates passam a ser servidos já redimensionados para ela, e
+# cada escala tem o seu próprio pacote (ex: templates@1.25.pack).
+escala = 1.0
+
+_lock = threading.RLock()
+_arquivos = None  # nome -> caminho de todos os templates disponíveis
+_templates = OrderedDict()  # nome -> template em escala de cinza (ordem de uso, LRU)
+_memoria_usada = 0
+_pacote = None  # nome -> view do template no pacote mapeado em memória
+
+
+def _indexar():
+    """Lista os arquivos de template disponíveis e abre o pacote (apenas na primeira chamada)"""
+    global _arquivos, _pacote
+    if _arquivos is None:
+        _arquivos = {}
+        if os.path.isdir(diretorio_templates):
+            for nome in os.listdir(diretorio_templates):
+                if nome.lower().endswith(".png"):
+                    _arquivos[nome] = os.path.join(diretorio_templates, nome)
+        if usar_pacote and _arquivos:
+            _pacote = _abrir_pacote_atualizado()
+    return _arquivos
+
+
+def _caminho_pacote(fator=None):
+    fator = escala if fator is None else fator
+    nome = arquivo_pacote
+    if fator != 1.0:
+        base, extensao = os.path.splitext(arquivo_pacote)
+        nome = f"{base}@{fator:g}{extensao}"
+    return os.path.join(diretorio_templates, nome)
+
+
+def redimensionar(template, fator):
+    """
+    Redimensiona um template para outra escala da interface.
+
+    Args:
+        template: Template em escala de cinza
+        fator: Escala (ex: 1.25 para 125%)
+
+    Returns:
+        numpy.ndarray: Template redimensionado (o próprio template se fator for 1.0)
+    """
+    if fator == 1.0:
+        return template
+    altura = max(1, round(template.shape[0] * fator))
+    largura = max(1, round(template.shape[1] * fator))
+    interpolacao = cv2.INTER_AREA if fator < 1.0 else cv2.INTER_LINEAR
+    return cv2.resize(template, (largura, altura), interpolation=interpolacao)
+
+
+def definir_escala(fator):
+    """
+    Define a escala da interface. Os templates já servidos em outra escala são
+    descartados e o pacote da nova escala é aberto (ou gerado) na próxima busca.
+
+    Args:
+        fator: Escala da interface (1.0 é a escala em que as imagens foram capturadas)
+    """
+    global escala, _arquivos, _pacote, _memoria_usada
+    with _lock:
+        if fator == escala:
+            return
+        escala = fator
+        _arquivos = None
+        _pacote = None
+        _templates.clear()
+        _memoria_usada = 0
+
+
+def _assinatura_imagens(arquivos, fator=1.0):
+    """
+    Calcula uma assinatura do conteúdo das imagens (CRC32 dos nomes e bytes dos
+    arquivos). Não depende da data de modificação, que muda ao extrair o
+    executável do PyInstaller.
+    """
+    crc = 0
+    for nome in sorted(arquivos):
+        crc = zlib.crc32(nome.encode("utf-8"), crc)
+        with open(arquivos[nome], "rb") as f:
+            crc = zlib.crc32(f.read(), crc)
+    if fator != 1.0:
+        return f"{len(arquivos)}-{crc:08x}@{fator:g}"
+    return f"{len(arquivos)}-{crc:08x}"
+
+
+def construir_pacote(caminho=None, fator=None):
+    """
+    Gera o pacote binário com todos os templates de diretorio_templates já
+    decodificados em escala de cinza, com um índice no cabeçalho.
+
+    Formato: MAGICO | tamanho do índice (uint64) | índice JSON | dados alinhados
+
+    Args:
+        caminho: Caminho do pacote a gerar (padrão: <diretorio_templates>/<arquivo_pacote>)
+        fator: Escala dos templates do pacote (padrão: a escala atual)
+
+    Returns:
+        str: Caminho do pacote gerado
+    """
+    fator = escala if fator is None else fator
+    caminho = caminho or _caminho_pacote(fator)
+    arquivos = {nome: os.path.join(diretorio_templates, nome)
+                for nome in os.listdir(diretorio_templates) if nome.lower().endswith(".png")}
+
+    indice = {}
+    blocos = []
+    deslocamento = 0
+    for nome in sorted(arquivos):
+        template = cv2.imread(arquivos[nome], cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            continue
+        template = redimensionar(template, fator)
+        indice[nome] = [deslocamento, template.shape[0], template.shape[1]]
+        blocos.append(np.ascontiguousarray(template).tobytes())
+        deslocamento += template.nbytes
+
+    cabecalho = json.dumps({"assinatura": _assinatura_imagens(arquivos, fator), "templates": indice}).encode("utf-8")
+    inicio_dados = len(_MAGICO) + 8 + len(cabecalho)
+    preenchimento = (-inicio_dados) % _ALINHAMENTO
+
+    # Grava em um arquivo temporário e substitui, para nunca deixar um pacote pela metade
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(_MAGICO)
+        f.write(struct.pack("<Q", len(cabecalho)))
+        f.write(cabecalho)
+        f.write(b"\0" * preenchimento)
+        for bloco in blocos:
+            f.write(bloco)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def abrir_pacote(caminho=None):
+    """
+    Mapeia o pacote em memória sem decodificar nada.
+
+    Returns:
+        tuple: (assinatura, dicionário nome -> template), ou (None, {}) se o
+               arquivo não existir ou for inválido
+    """
+    caminho = caminho or _caminho_pacote()
+    try:
+        with open(caminho, "rb") as f:
+            if f.read(len(_MAGICO)) != _MAGICO:
+                return None, {}
+            tamanho_cabecalho = struct.unpack("<Q", f.read(8))[0]
+            cabecalho = json.loads(f.read(tamanho_cabecalho))
+    except (OSError, ValueError, struct.error):
+        return None, {}
+
+    inicio_dados = len(_MAGICO) + 8 + tamanho_cabecalho
+    inicio_dados += (-inicio_dados) % _ALINHAMENTO
+    indice = cabecalho["templates"]
+    if not indice:
+        return cabecalho["assinatura"], {}
+
+    dados = np.memmap(caminho, dtype=np.uint8, mode="r", offset=inicio_dados)
+    pacote = {}
+    for nome, (deslocamento, altura, largura) in indice.items():
+        pacote[nome] = dados[deslocamento:deslocamento + altura * largura].reshape(altura, largura)
+    return cabecalho["assinatura"], pacote
+
+
+def _abrir_pacote_atualizado():
+    """
+    Abre o pacote, reconstruindo-o antes se as imagens mudaram desde a última
+    geração. Se não for possível gravar o pacote, retorna None (os templates
+    são decodificados dos PNGs).
+    """
+    try:
+        assinatura_atual = _assinatura_imagens(_arquivos, escala)
+        assinatura, pacote = abrir_pacote()
+        if assinatura != assinatura_atual:
+            construir_pacote()
+            assinatura, pacote = abrir_pacote()
+        return pacote if assinatura == assinatura_atual else None
+    except OSError as e:
+        print(f"Template pack unavailable ({e}), decoding images individually")
+        return None
+
+
+def _guardar(nome, template):
+    """Guarda um template decodificado respeitando o limite de memória (LRU)"""
+    global _memoria_usada
+    _templates[nome] = template
+    _memoria_usada += template.nbytes
+    while limite_memoria_templates and _memoria_usada > limite_memoria_templates and len(_templates) > 1:
+        _, descartado = _templates.popitem(last=False)
+        _memoria_usada -= descartado.nbytes
+
+
+def carregar_templates():
+    """
+    Decodifica todos os templates do diretório de uma vez, em escala de cinza.
+    Com o pacote pré-compilado, apenas o mapeia em memória.
+
+    Returns:
+        int: Número de templates disponíveis
+    """
+    with _lock:
+        for nome in sorted(_indexar()):
+            if _pacote is None or nome not in _pacote:
+                obter_template(nome)
+        return len(_arquivos)
+
+
+def obter_template(nome):
+    """
+    Retorna o template pelo nome do arquivo (ex: 'main.png'), em escala de cinza
+    e na escala atual da interface.
+    A busca diferencia maiúsculas de minúsculas, como nos sistemas de arquivos do Linux.
+
+    Args:
+        nome: Nome do arquivo de imagem dentro do diretório de templates
+
+    Returns:
+        numpy.ndarray: Template em escala de cinza, ou None se não existir
+    """
+    with _lock:
+        template = _templates.get(nome)
+        if template is not None:
+            _templates.move_to_end(nome)
+            return template
+
+        caminho = _indexar().get(nome)
+        if _pacote is not None and nome in _pacote:
+            # Já está no pacote mapeado em memória: não há o que decodificar
+            return _pacote[nome]
+        if caminho is None:
+            return None
+        template = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            return None
+        template = redimensionar(template, escala)
+        _guardar(nome, template)
+        return template
+
+
+def verificar_manifesto(nomes):
+    """
+    Verifica se todos os templates referenciados existem no diretório, com o
+    nome exato (inclusive maiúsculas/minúsculas).
+
+    Args:
+        nomes: Nomes de templates usados pelo código
+
+    Returns:
+        list: Mensagens de erro, uma por template ausente (vazia se está tudo certo)
+    """
+    disponiveis = _indexar()
+    por_nome_minusculo = {nome.lower(): nome for nome in disponiveis}
+    erros = []
+    for nome in sorted(nomes):
+        if nome in disponiveis:
+            continue
+        parecido = por_nome_minusculo.get(nome.lower())
+        if parecido:
+            erros.append(f"Template '{nome}' not found (did you mean '{parecido}'?)")
+        else:
+            erros.append(f"Template '{nome}' not found in '{diretorio_templates}/'")
+    return erros
+
+
+if __name__ == "__main__":
+    # Etapa de build: gera o pacote de templates (ex: antes de rodar o PyInstaller).
+    # Escalas extras podem ser passadas como argumentos: python templates.py 1.25 1.5
+    for fator in [1.0] + [float(argumento) for argumento in sys.argv[1:]]:
+        caminho = construir_pacote(fator=fator)
+        print(f"✅ Template pack generated: {caminho}")
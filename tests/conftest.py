@@ -0,0 +1,68 @@
+import os
+import sys
+from collections import OrderedDict
+
+import cv2
+import pytest
+
+# Os módulos da macro ficam na raiz do repositório
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def tela_real():
+    """Captura real da janela do DOORS (1920x1080, interface em português), em escala de cinza"""
+    return cv2.imread(os.path.join(RAIZ, "debug_area", "area_completa.png"), cv2.IMREAD_GRAYSCALE)
+
+
+@pytest.fixture
+def templates_repositorio(monkeypatch):
+    """Registro de templates lendo as imagens do repositório, sem pacote e sem cache de outro teste"""
+    import templates
+
+    monkeypatch.setattr(templates, "diretorio_templates", os.path.join(RAIZ, "images"))
+    monkeypatch.setattr(templates, "usar_pacote", False)
+    monkeypatch.setattr(templates, "escala", 1.0)
+    monkeypatch.setattr(templates, "_arquivos", None)
+    monkeypatch.setattr(templates, "_pacote", None)
+    monkeypatch.setattr(templates, "_templates", OrderedDict())
+    monkeypatch.setattr(templates, "_memoria_usada", 0)
+    return templates
+
+
+@pytest.fixture
+def tela_falsa(monkeypatch, tela_real):
+    """
+    Faz a camada de captura devolver recortes da captura real, como se fosse a
+    tela inteira, e isola o estado global dos módulos de busca.
+    """
+    pytest.importorskip("pyautogui")
+    import captura
+    import correspondencia
+    import idioma
+    import rois
+    import telemetria
+
+    altura, largura = tela_real.shape
+    monkeypatch.setattr(captura, "tamanho_tela", lambda: (largura, altura))
+    monkeypatch.setattr(captura, "_capturar_do_backend",
+                        lambda x0, y0, x1, y1: tela_real[y0:y1, x0:x1].copy())
+    monkeypatch.setattr(captura, "_gravador", None)
+    monkeypatch.setattr(captura, "_replay", None)
+    monkeypatch.setattr(captura, "_janela_referencia", None)
+    monkeypatch.setattr(captura, "_localizar_janela", None)
+    captura.invalidar_cache()
+    monkeypatch.setattr(idioma, "_idioma", None)
+    monkeypatch.setattr(rois, "_acertos", {})
+    monkeypatch.setattr(rois, "_contagem", {})
+    monkeypatch.setattr(rois, "arquivo_rois", None)
+    monkeypatch.setattr(telemetria, "_registros", {})
+    monkeypatch.setattr(telemetria, "_limiares", {})
+    monkeypatch.setattr(telemetria, "_margens_calculadas", {})
+    monkeypatch.setattr(telemetria, "arquivo_telemetria", None)
+    monkeypatch.setattr(correspondencia, "_exatos_detectados", set())
+    correspondencia.esquecer_posicoes()
+    yield tela_real
+    captura.invalidar_cache()
+    correspondencia.esquecer_posicoes()
@@ -0,0 +1,48 @@
+import json
+
+import cv2
+import numpy as np
+
+import analisar_templates
+
+
+def _templates_quase_iguais():
+    gerador = np.random.default_rng(0)
+    base = gerador.integers(0, 256, (20, 30), dtype=np.uint8)
+    parecido = base.copy()
+    parecido[0, 0] = 255 - parecido[0, 0]
+    return {"botao.png": base, "botao_en.png": parecido}
+
+
+def test_sem_telas_nao_junta_duplicatas():
+    cortados = _templates_quase_iguais()
+
+    representantes, nao_verificados = analisar_templates.agrupar_duplicatas(cortados, [])
+
+    assert representantes == {"botao.png": "botao.png", "botao_en.png": "botao_en.png"}
+    assert nao_verificados == {"botao_en.png": "botao.png"}
+
+
+def test_junta_duplicata_verificada_numa_tela():
+    cortados = _templates_quase_iguais()
+    tela = np.full((100, 120), 128, dtype=np.uint8)
+    tela[40:60, 50:80] = cortados["botao_en.png"]
+
+    representantes, nao_verificados = analisar_templates.agrupar_duplicatas(cortados, [("tela.png", tela)])
+
+    assert representantes["botao_en.png"] == "botao.png"
+    assert nao_verificados == {}
+
+
+def test_analisar_deixa_nao_verificados_fora_do_mapa(tmp_path):
+    imagens = tmp_path / "images"
+    imagens.mkdir()
+    for nome, template in _templates_quase_iguais().items():
+        cv2.imwrite(str(imagens / nome), template)
+
+    caminho_relatorio = analisar_templates.analisar(str(imagens), [], str(tmp_path / "saida"))
+
+    mapa = json.loads((tmp_path / "saida" / "mapa_templates.json").read_text(encoding="utf-8"))
+    assert mapa == {"botao.png": "botao.png"}
+    with open(caminho_relatorio, encoding="utf-8") as f:
+        assert "botao_en.png -> botao.png?" in f.read()
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyautogui")
+
+import captura
+
+
+@pytest.fixture
+def capturas(monkeypatch, tela_falsa):
+    """Retângulos efetivamente capturados do backend (fora do cache)"""
+    feitas = []
+
+    def capturar(x0, y0, x1, y1):
+        feitas.append((x0, y0, x1, y1))
+        return tela_falsa[y0:y1, x0:x1].copy()
+
+    monkeypatch.setattr(captura, "_capturar_do_backend", capturar)
+    monkeypatch.setattr(captura, "janela_cache", 10.0)
+    return feitas
+
+
+def test_regiao_contida_em_captura_recente_vem_do_cache(capturas, tela_falsa):
+    captura.capturar_regiao(0, 0, 0.5, 0.5)
+    regiao, inicio_x, inicio_y = captura.capturar_regiao(0.1, 0.1, 0.4, 0.3)[:3]
+
+    assert capturas == [(0, 0, 960, 540)]
+    assert (inicio_x, inicio_y) == (192, 108)
+    np.testing.assert_array_equal(regiao, tela_falsa[108:324, 192:768])
+
+
+def test_regiao_fora_das_capturas_recentes_e_capturada(capturas):
+    captura.capturar_regiao(0, 0, 0.5, 0.5)
+    captura.capturar_regiao(0.4, 0.4, 0.6, 0.6)
+
+    assert capturas == [(0, 0, 960, 540), (768, 432, 1152, 648)]
+
+
+def test_acao_de_entrada_invalida_o_cache(capturas):
+    captura.capturar_regiao(0, 0, 1, 1)
+    captura.notificar_entrada("left", 10, 20)
+    captura.capturar_regiao(0, 0, 0.5, 0.5)
+
+    assert len(capturas) == 2
+
+
+def test_captura_vencida_nao_e_reaproveitada(capturas, monkeypatch):
+    monkeypatch.setattr(captura, "janela_cache", 0.01)
+    captura.capturar_regiao(0, 0, 1, 1)
+    time.sleep(0.03)
+    captura.capturar_regiao(0, 0, 0.5, 0.5)
+
+    assert len(capturas) == 2
+
+
+def test_cache_guarda_no_maximo_max_regioes_cache(capturas, monkeypatch):
+    monkeypatch.setattr(captura, "max_regioes_cache", 2)
+    for i in range(3):
+        captura.capturar_regiao(i / 4, 0, (i + 1) / 4, 0.1)
+    # A primeira região saiu do cache: é capturada de novo
+    captura.capturar_regiao(0, 0, 0.25, 0.1)
+
+    assert len(capturas) == 4
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+import correspondencia
+
+
+def test_descarte_no_nivel_reduzido_marca_o_score():
+    gerador = np.random.default_rng(1)
+    regiao = gerador.integers(0, 256, (600, 800), dtype=np.uint8)
+    template = gerador.integers(0, 256, (64, 64), dtype=np.uint8)
+
+    max_val, _ = correspondencia.corresponder(regiao, template, 0.7)
+
+    assert isinstance(max_val, correspondencia.ScoreReduzido)
+    assert max_val < 0.7
+
+
+def test_acerto_tem_score_em_resolucao_total():
+    gerador = np.random.default_rng(2)
+    regiao = gerador.integers(0, 256, (600, 800), dtype=np.uint8)
+    template = regiao[300:364, 400:464].copy()
+
+    max_val, max_loc = correspondencia.corresponder(regiao, template, 0.7)
+
+    assert not isinstance(max_val, correspondencia.ScoreReduzido)
+    assert max_loc == (400, 300)
+
+
+def test_memoria_de_posicao_respeita_o_limiar_da_busca(tela_real):
+    template = tela_real[590:615, 885:960].copy()  # Botão "Confirmar" do aviso de sobrescrever
+    correspondencia.esquecer_posicoes()
+    try:
+        # Acerto guardado por uma busca com limiar baixo
+        correspondencia._memorizar_posicao("confirmar", tela_real, template, 0.72, (885, 590), (0, 0))
+        max_val, max_loc = correspondencia._conferir_ultima_posicao("confirmar", tela_real, template, 0.8, (0, 0))
+        # O score guardado não vale para um limiar maior: o trecho é conferido de novo
+        assert max_val == pytest.approx(1.0, abs=1e-4)
+        assert max_loc == (885, 590)
+
+        correspondencia._memorizar_posicao("confirmar", tela_real, template, 0.95, (885, 590), (0, 0))
+        assert correspondencia._conferir_ultima_posicao("confirmar", tela_real, template, 0.8, (0, 0)) == (0.95, (885, 590))
+    finally:
+        correspondencia.esquecer_posicoes()
+
+
+def test_busca_exata_encontra_botao_na_tela_real(tela_real):
+    template = tela_real[590:615, 885:960].copy()
+
+    assert correspondencia.procurar_exato(tela_real, template) == (885, 590)
+
+
+def test_busca_exata_desiste_com_candidatas_demais():
+    # Linhas constantes com uma faixa a cada 19: todo template 20x30 de zeros
+    # passa pelos pixels âncora em quase toda posição, e nenhuma é idêntica
+    regiao = np.zeros((1080, 1920), np.uint8)
+    regiao[::19, :] = 1
+    regiao[5, 5] = 7
+    template = np.zeros((20, 30), np.uint8)
+
+    assert correspondencia.procurar_exato(regiao, template) is None
+
+
+def test_busca_exata_acima_do_limite_cai_na_busca_normal(tela_real):
+    template = tela_real[590:615, 885:960].copy()
+    original = correspondencia.max_candidatos_exato
+    correspondencia.max_candidatos_exato = 0
+    try:
+        assert correspondencia.procurar_exato(tela_real, template) is None
+        max_val, max_loc = correspondencia.corresponder(tela_real, template, 0.8)
+    finally:
+        correspondencia.max_candidatos_exato = original
+    assert max_val == pytest.approx(1.0, abs=1e-4)
+    assert max_loc == (885, 590)
+
+
+# Imagens grandes o bastante para ter níveis reduzidos (as menores vão direto para a busca completa)
+@pytest.mark.parametrize("nome", ["procurar_export.png", "continuar_close_vf.png"])
+def test_piramide_encontra_o_mesmo_ponto_que_a_busca_completa(tela_real, templates_repositorio, nome):
+    template = templates_repositorio.obter_template(nome)
+    assert correspondencia._niveis_template(template)
+
+    resultado = correspondencia._corresponder_piramide(tela_real, template, 0.8)
+    max_val, max_loc = correspondencia._corresponder_completo(tela_real, template)
+
+    assert resultado is not None
+    assert resultado[1] == max_loc
+    assert resultado[0] == pytest.approx(max_val, abs=1e-4)
+
+
+@pytest.mark.parametrize("recorte", [(slice(560, 680), slice(800, 1100)),  # Aviso de sobrescrever
+                                     (slice(60, 130), slice(0, 400)),  # Menu e barra de ferramentas
+                                     (slice(140, 240), slice(1100, 1300))])
+def test_piramide_com_recortes_da_tela_real(tela_real, recorte):
+    template = tela_real[recorte].copy()
+    esperado = (recorte[1].start, recorte[0].start)
+
+    max_val, max_loc = correspondencia._corresponder_piramide(tela_real, template, 0.8)
+
+    assert max_loc == esperado
+    assert max_val == pytest.approx(1.0, abs=1e-4)
+
+
+@pytest.mark.parametrize("nome", ["projects.png", "indicador_erro_exportar.png", "inserir_en.png"])
+def test_piramide_nao_encontra_imagem_ausente(tela_real, templates_repositorio, nome):
+    template = templates_repositorio.obter_template(nome)
+
+    assert correspondencia.corresponder(tela_real, template, 0.8)[0] < 0.8
+    assert correspondencia._corresponder_completo(tela_real, template)[0] < 0.8
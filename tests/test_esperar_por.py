@@ -0,0 +1,87 @@
+import time
+import tkinter
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyautogui")
+pytest.importorskip("pyperclip")
+pytest.importorskip("pytesseract")
+pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def macro(monkeypatch):
+    try:
+        import macro
+    except tkinter.TclError as e:
+        pytest.skip(f"Tk indisponível: {e}")
+    import captura
+    import templates
+
+    regiao = np.zeros((50, 50), dtype=np.uint8)  # Tela estática
+    monkeypatch.setattr(templates, "obter_template", lambda nome: np.ones((5, 5), dtype=np.uint8))
+    monkeypatch.setattr(captura, "quadros_desde", lambda instante: [])
+    monkeypatch.setattr(captura, "capturar_regiao", lambda *roi: (regiao, 0, 0, 50, 50))
+    monkeypatch.setattr(captura, "aguardar_mudanca", lambda regioes, intervalo, restante: True)
+    monkeypatch.setattr(captura, "pausar", lambda segundos: None)
+    return macro
+
+
+class ProcurarFalso:
+    """
+    Simula uma tela estática onde só a variante do outro idioma está presente:
+    ela só é encontrada quando as variantes descartadas também são procuradas.
+    As primeiras verificações podem ser forçadas a não encontrar nada.
+    """
+    def __init__(self, falhas=0):
+        self.chamadas = []
+        self.ausencias = []
+        self.falhas = falhas
+
+    def __call__(self, local, roi, alternativas, regiao, origem, limiar, completar=True, registrar_ausentes=True):
+        self.chamadas.append(completar)
+        self.ausencias.append(registrar_ausentes)
+        encontrado = completar and len(self.chamadas) > self.falhas
+        return [(0.95 if encontrado else 0.1, (0, 0)) for _ in alternativas]
+
+
+def test_primeira_verificacao_procura_todas_as_variantes(macro, monkeypatch):
+    import idioma
+
+    procurar = ProcurarFalso()
+    monkeypatch.setattr(idioma, "procurar", procurar)
+
+    assert macro.esperarPor(["inserir.png", "inserir_en.png"], timeout=1)
+    assert procurar.chamadas == [True]
+
+
+def test_busca_completa_ignora_tela_sem_mudanca(macro, monkeypatch):
+    import idioma
+
+    procurar = ProcurarFalso(falhas=1)
+    monkeypatch.setattr(idioma, "procurar", procurar)
+    monkeypatch.setattr(idioma, "intervalo_busca_completa", 0.05)
+
+    # A região nunca muda, mas a busca completa seguinte é feita mesmo assim
+    assert macro.esperarPor(["inserir.png", "inserir_en.png"], timeout=2)
+    assert procurar.chamadas[0] is True
+    assert procurar.chamadas[-1] is True
+    assert len(procurar.chamadas) > 1
+
+
+def test_espera_registra_ausencias_so_na_primeira_verificacao(macro, monkeypatch):
+    import captura
+    import idioma
+
+    procurar = ProcurarFalso(falhas=1000)
+    monkeypatch.setattr(idioma, "procurar", procurar)
+    # Cada verificação vê uma tela diferente, para que a busca seja refeita
+    telas = iter(np.full((50, 50), valor, dtype=np.uint8) for valor in range(1000))
+    monkeypatch.setattr(captura, "capturar_regiao", lambda *roi: (next(telas), 0, 0, 50, 50))
+    monkeypatch.setattr(captura, "aguardar_mudanca", lambda regioes, intervalo, restante: time.sleep(0.01))
+
+    assert not macro.esperarPor("inserir.png", timeout=0.3)
+    assert len(procurar.ausencias) > 1
+    assert procurar.ausencias[0] is True
+    assert not any(procurar.ausencias[1:])
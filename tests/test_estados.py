@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyautogui")
+
+import captura
+import estados
+
+
+@pytest.fixture
+def tela(tela_falsa, templates_repositorio, monkeypatch):
+    """Tela real com o aviso de sobrescrever aberto sobre o módulo, sem impressões conhecidas"""
+    monkeypatch.setattr(estados, "_impressoes", [])
+    monkeypatch.setattr(estados, "arquivo_impressoes", None)
+    monkeypatch.setattr(estados, "usar_impressoes", True)
+    return tela_falsa
+
+
+@pytest.fixture
+def conferidos(monkeypatch):
+    """Estados conferidos pela imagem em cada classificação"""
+    nomes = []
+    original = estados._presente
+
+    def presente(nome, *args):
+        nomes.append(nome)
+        return original(nome, *args)
+
+    monkeypatch.setattr(estados, "_presente", presente)
+    return nomes
+
+
+def test_classifica_a_tela_real(tela):
+    assert estados.classificar() == "sobrescrever"
+    assert estados.classificar(["modulo", "explorador"]) == "modulo"
+    assert estados.classificar(["explorador", "dialogo_colunas"]) is None
+
+
+def test_impressao_guarda_so_os_estados_presentes(tela):
+    estados.classificar(["modulo", "explorador", "dialogo_colunas"])
+
+    assert len(estados._impressoes) == 1
+    assert estados._impressoes[0][1] == {"modulo": True}
+
+
+def test_impressao_responde_estado_presente_sem_imagem(tela, conferidos):
+    estados.classificar(["modulo", "explorador"])
+    conferidos.clear()
+
+    assert estados.classificar(["modulo", "explorador"]) == "modulo"
+    # A ausência não é guardada: o explorador é procurado de novo
+    assert conferidos == ["explorador"]
+
+
+def test_estados_conferidos_sempre_sao_procurados(tela, conferidos):
+    estados.classificar(["sobrescrever", "modulo"])
+    conferidos.clear()
+
+    assert estados.classificar(["sobrescrever", "modulo"]) == "sobrescrever"
+    assert conferidos == ["sobrescrever"]
+
+
+def test_impressao_de_outra_tela_nao_vale(tela, conferidos, monkeypatch):
+    estados.classificar(["modulo"])
+    conferidos.clear()
+    tela_vazia = np.zeros_like(tela)
+    monkeypatch.setattr(captura, "_capturar_do_backend", lambda x0, y0, x1, y1: tela_vazia[y0:y1, x0:x1])
+    captura.invalidar_cache()
+
+    assert estados.classificar(["modulo"]) is None
+    assert conferidos == ["modulo"]
+
+
+def test_impressoes_gravadas_sao_recarregadas(tela, tmp_path, conferidos):
+    caminho = str(tmp_path / "estados_tela.npz")
+    estados.carregar(caminho)
+    estados.classificar(["modulo", "explorador"])
+    estados.salvar()
+
+    estados.carregar(caminho)
+    conferidos.clear()
+    assert estados.classificar(["modulo"]) == "modulo"
+    assert conferidos == []
+
+
+def test_carregar_descarta_ausencias_de_arquivos_antigos(tela, tmp_path):
+    caminho = tmp_path / "estados_tela.npz"
+    miniatura = np.zeros(estados.tamanho_miniatura[::-1], dtype=np.uint8)
+    with open(caminho, "wb") as f:
+        np.savez_compressed(f, miniaturas=np.stack([miniatura]),
+                            estados=np.array('[{"modulo": true, "explorador": false}]'))
+
+    estados.carregar(str(caminho))
+
+    assert estados._impressoes[0][1] == {"modulo": True}
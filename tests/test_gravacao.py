@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+import pytest
+
+import gravacao
+
+
+def _gravar(caminho, quadros, intervalo=0.01):
+    """Grava uma sessão com as capturas (retângulo, quadro) na ordem recebida"""
+    gravador = gravacao.GravadorSessao(str(caminho), 200, 100)
+    for retangulo, quadro in quadros:
+        gravador.registrar_quadro(retangulo, quadro)
+        gravador.registrar_entrada("left", (10, 20))
+        time.sleep(intervalo)
+    gravador.fechar()
+
+
+def _quadro(valor, altura=100, largura=200):
+    quadro = np.full((altura, largura), valor, dtype=np.uint8)
+    quadro[valor % altura, :] = 255  # Linha distinta em cada quadro
+    return quadro
+
+
+def test_replay_devolve_as_capturas_gravadas_na_ordem(tmp_path):
+    caminho = tmp_path / "sessao.zip"
+    quadros = [((0, 0, 200, 100), _quadro(v)) for v in (10, 20, 20, 30)]
+    _gravar(caminho, quadros)
+
+    replay = gravacao.FonteReplay(str(caminho))
+    try:
+        assert (replay.largura_tela, replay.altura_tela) == (200, 100)
+        assert len(replay.entradas) == len(quadros)
+        for _, quadro in quadros:
+            np.testing.assert_array_equal(replay.capturar(0, 0, 200, 100), quadro)
+        assert replay.terminou
+        # Depois do fim, continua devolvendo a última captura compatível
+        np.testing.assert_array_equal(replay.capturar(50, 10, 60, 20), quadros[-1][1][10:20, 50:60])
+    finally:
+        replay.fechar()
+
+
+def test_replay_recorta_capturas_maiores_e_pula_as_que_nao_contem(tmp_path):
+    caminho = tmp_path / "sessao.zip"
+    pequeno = _quadro(40, 10, 10)
+    _gravar(caminho, [((0, 0, 10, 10), pequeno), ((0, 0, 200, 100), _quadro(50))])
+
+    replay = gravacao.FonteReplay(str(caminho))
+    try:
+        # A primeira captura gravada não contém o retângulo: vai para a segunda
+        np.testing.assert_array_equal(replay.capturar(100, 50, 120, 60), _quadro(50)[50:60, 100:120])
+        assert replay.terminou
+    finally:
+        replay.fechar()
+
+
+def test_relogio_virtual_segue_os_instantes_gravados(tmp_path):
+    caminho = tmp_path / "sessao.zip"
+    _gravar(caminho, [((0, 0, 200, 100), _quadro(v)) for v in (1, 2, 3)], intervalo=0.2)
+
+    replay = gravacao.FonteReplay(str(caminho))
+    try:
+        instantes = []
+        for _ in range(3):
+            replay.capturar(0, 0, 200, 100)
+            instantes.append(replay.instante)
+        assert instantes[0] < instantes[1] < instantes[2]
+        assert instantes[2] - instantes[0] == pytest.approx(0.4, abs=0.1)
+
+        # Sem quadros à frente, só as esperas avançam o relógio
+        replay.avancar(5)
+        replay.capturar(0, 0, 200, 100)
+        assert replay.instante == pytest.approx(instantes[2] + 5)
+    finally:
+        replay.fechar()
+
+
+def test_ida_e_volta_pela_camada_de_captura(tmp_path, monkeypatch):
+    pytest.importorskip("pyautogui")
+    import captura
+
+    caminho = tmp_path / "sessao.zip"
+    telas = iter([_quadro(v) for v in (60, 70, 80)])
+    monkeypatch.setattr(captura, "tamanho_tela", lambda: (200, 100))
+    monkeypatch.setattr(captura, "_capturar_do_backend",
+                        lambda x0, y0, x1, y1: next(telas)[y0:y1, x0:x1].copy())
+    monkeypatch.setattr(captura, "janela_cache", 0)
+
+    captura.iniciar_gravacao(str(caminho))
+    gravadas = [captura.capturar_regiao(0, 0, 1, 1)[0] for _ in range(3)]
+    captura.parar_gravacao()
+
+    # No replay o cache fica desligado mesmo configurado: cada captura consome um quadro gravado
+    monkeypatch.setattr(captura, "janela_cache", 10)
+    captura.iniciar_replay(str(caminho))
+    try:
+        for gravada in gravadas:
+            np.testing.assert_array_equal(captura.capturar_regiao(0, 0, 1, 1)[0], gravada)
+
+        # Um timeout de 30 s vence pelo relógio virtual, sem esperar 30 s reais
+        inicio_real = time.monotonic()
+        inicio = captura.relogio()
+        while captura.relogio() - inicio < 30:
+            captura.capturar_regiao(0, 0, 1, 1)
+            captura.aguardar_mudanca([(0, 0, 1, 1)], 1, 30 - (captura.relogio() - inicio))
+        assert time.monotonic() - inicio_real < 5
+    finally:
+        captura.parar_replay()
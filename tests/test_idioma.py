@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyautogui")
+
+import captura
+import idioma
+
+
+@pytest.fixture
+def tela(tela_falsa, templates_repositorio):
+    return tela_falsa
+
+
+def test_detecta_portugues_na_tela_real(tela):
+    assert idioma.detectar() == "pt"
+    assert idioma.idioma_atual() == "pt"
+
+
+def test_tela_sem_ancoras_nao_tem_idioma(tela, monkeypatch):
+    monkeypatch.setattr(captura, "_capturar_do_backend",
+                        lambda x0, y0, x1, y1: np.full((y1 - y0, x1 - x0), 200, dtype=np.uint8))
+    idioma.definir_idioma("en")
+
+    assert idioma.detectar() is None
+    assert idioma.idioma_atual() is None
+
+
+def test_deteccao_desligada(tela, monkeypatch):
+    monkeypatch.setattr(idioma, "usar_deteccao_idioma", False)
+    assert idioma.detectar() is None
+
+
+def test_filtrar_mantem_as_variantes_do_idioma():
+    nomes = ["inserir.png", "inserir_en.png", "ok.png", "novo_en.png"]
+    idioma.definir_idioma("pt")
+    try:
+        assert idioma.filtrar(nomes) == ["inserir.png", "ok.png", "novo_en.png"]
+        idioma.definir_idioma("en")
+        assert idioma.filtrar(nomes) == ["inserir_en.png", "ok.png", "novo_en.png"]
+        idioma.definir_idioma(None)
+        assert idioma.filtrar(nomes) == nomes
+    finally:
+        idioma.definir_idioma(None)
+
+
+def test_procurar_troca_de_idioma_ao_encontrar_variante_descartada(tela, templates_repositorio):
+    alternativas = [(nome, templates_repositorio.obter_template(nome))
+                    for nome in ("confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png")]
+    idioma.definir_idioma("en")
+
+    resultados = idioma.procurar("teste", (0, 0, 1, 1), alternativas, tela, (0, 0), 0.8, completar=False)
+    assert resultados[0] == (-1.0, None)
+    assert idioma.idioma_atual() == "en"
+
+    resultados = idioma.procurar("teste", (0, 0, 1, 1), alternativas, tela, (0, 0), 0.8)
+    assert resultados[0][1] == (884, 587)
+    assert idioma.idioma_atual() == "pt"
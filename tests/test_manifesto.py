@@ -0,0 +1,51 @@
+import ast
+import os
+import re
+
+import pytest
+
+import templates
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _lista_imagens_macro():
+    """Lê macro.IMAGENS direto do fonte (importar o macro.py abre a interface Tk)"""
+    with open(os.path.join(RAIZ, "macro.py"), encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and any(getattr(alvo, "id", None) == "IMAGENS" for alvo in no.targets):
+            return ast.literal_eval(no.value)
+    raise AssertionError("macro.IMAGENS not found")
+
+
+def _citadas(arquivo):
+    with open(os.path.join(RAIZ, arquivo), encoding="utf-8") as f:
+        fonte = f.read()
+    return {os.path.basename(nome) for nome in re.findall(r"[\"']([\w\-/]+\.png)[\"']", fonte)}
+
+
+@pytest.fixture
+def diretorio_images(monkeypatch):
+    monkeypatch.setattr(templates, "diretorio_templates", os.path.join(RAIZ, "images"))
+
+
+def test_lista_do_macro_cobre_as_imagens_citadas():
+    assert _citadas("macro.py") <= set(_lista_imagens_macro())
+
+
+def test_imagens_do_macro_existem(diretorio_images):
+    assert templates.verificar_manifesto(_lista_imagens_macro()) == []
+
+
+def test_imagens_dos_outros_modulos_existem(diretorio_images):
+    pytest.importorskip("pyautogui")
+    import escala
+    import estados
+    import idioma
+
+    nomes = {escala.ancora}
+    nomes.update(imagem for _, imagens, _ in estados.ESTADOS for imagem in imagens)
+    nomes.update(nome for par in idioma.ancoras for nome in par.values())
+    assert templates.verificar_manifesto(nomes) == []
+    assert _citadas("estados.py") <= nomes
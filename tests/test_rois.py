@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("pyautogui")
+
+import captura
+import rois
+import telemetria
+
+ROI = (0.25, 0.3, 0.7, 0.7)  # Região do aviso de sobrescrever
+
+
+@pytest.fixture
+def busca(tela_falsa, templates_repositorio):
+    """Procura o botão do aviso de sobrescrever (as duas variantes) na ROI da tela real"""
+    alternativas = [(nome, templates_repositorio.obter_template(nome))
+                    for nome in ("confirmar_sobrescrever.png", "confirmar_sobrescrever_en.png")]
+
+    def procurar(**opcoes):
+        regiao, inicio_x, inicio_y = captura.capturar_regiao(*ROI)[:3]
+        return rois.procurar("teste", ROI, alternativas, regiao, (inicio_x, inicio_y), 0.8, **opcoes), (inicio_x, inicio_y)
+    return procurar
+
+
+def test_roi_so_e_aprendida_depois_de_acertos_minimos(tela_falsa):
+    for _ in range(rois.acertos_minimos - 1):
+        rois.registrar_acerto("teste", ROI, "ok.png", 960, 540, 96, 54)
+    assert rois.roi_aprendida("teste", ROI, ["ok.png"]) is None
+
+    rois.registrar_acerto("teste", ROI, "ok.png", 960, 540, 96, 54)
+    assert rois.roi_aprendida("teste", ROI, ["ok.png"]) == pytest.approx(
+        (0.5 - rois.margem_roi, 0.5 - rois.margem_roi, 0.55 + rois.margem_roi, 0.55 + rois.margem_roi))
+    # Outro local de chamada não compartilha o que foi aprendido
+    assert rois.roi_aprendida("outro", ROI, ["ok.png"]) is None
+
+
+def test_roi_aprendida_fica_dentro_da_roi_original(tela_falsa):
+    for _ in range(rois.acertos_minimos):
+        rois.registrar_acerto("teste", ROI, "ok.png", 480, 324, 50, 20)
+
+    ini_x, ini_y, _, _ = rois.roi_aprendida("teste", ROI, ["ok.png"])
+    assert (ini_x, ini_y) == (ROI[0], ROI[1])
+
+
+def test_busca_passa_para_a_roi_aprendida(busca, monkeypatch):
+    for _ in range(rois.acertos_minimos):
+        resultados, origem = busca()
+        assert resultados[0][0] >= 0.8
+    assert rois.roi_aprendida("teste", ROI, ["confirmar_sobrescrever.png"]) is not None
+
+    regioes = []
+    original = rois._corresponder_em_ordem
+
+    def espiar(regiao, alternativas, limiar, origem):
+        regioes.append(regiao.shape)
+        return original(regiao, alternativas, limiar, origem)
+
+    monkeypatch.setattr(rois, "_corresponder_em_ordem", espiar)
+    resultados, origem = busca()
+
+    # Uma única busca, num recorte bem menor que a ROI original
+    assert len(regioes) == 1
+    assert regioes[0][0] * regioes[0][1] < 0.1 * 432 * 864
+    # A posição continua relativa à região inteira
+    assert (origem[0] + resultados[0][1][0], origem[1] + resultados[0][1][1]) == (884, 587)
+
+
+def test_alternativa_mais_encontrada_e_procurada_primeiro(busca):
+    busca()
+    assert rois._ordem(["confirmar_sobrescrever_en.png", "confirmar_sobrescrever.png"]) == [1, 0]
+
+    resultados, _ = busca()
+    # O português alcançou corte_confianca: a variante em inglês nem foi procurada
+    assert resultados[1] == (-1.0, None)
+
+
+def test_ausencias_podem_ficar_fora_da_telemetria(busca, monkeypatch):
+    monkeypatch.setattr(rois, "ordenar_alternativas", False)
+    busca(registrar_ausentes=False)
+    assert [resultado for _, _, resultado in telemetria._registros["confirmar_sobrescrever.png"]] == ["acerto"]
+    assert "confirmar_sobrescrever_en.png" not in telemetria._registros
+
+    busca()
+    assert telemetria._registros["confirmar_sobrescrever_en.png"][0][2] == "ausente"
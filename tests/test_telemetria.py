@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pytest
+
+import telemetria
+
+
+def test_poucos_registros_nao_derivam_limiar():
+    assert telemetria.derivar_limiar([0.3] * 10 + [0.95] * 10) is None
+
+
+def test_limiar_fica_no_meio_do_intervalo_entre_os_grupos():
+    gerador = np.random.default_rng(4)
+    ausentes = gerador.uniform(0.3, 0.5, 25)
+    presentes = gerador.uniform(0.9, 0.99, 25)
+
+    limiar = telemetria.derivar_limiar(list(ausentes) + list(presentes))
+
+    assert limiar == pytest.approx((ausentes.max() + presentes.min()) / 2, abs=1e-3)
+
+
+def test_grupos_proximos_nao_derivam_limiar():
+    gerador = np.random.default_rng(5)
+    assert telemetria.derivar_limiar(gerador.uniform(0.6, 0.75, 50)) is None
+
+
+def test_corte_nao_isola_grupo_pequeno_demais():
+    # Só dois registros ausentes: eles não formam um grupo sozinhos
+    scores = [0.2, 0.25] + [0.9 + i * 0.001 for i in range(40)]
+    limiar = telemetria.derivar_limiar(scores)
+
+    assert limiar is None or limiar > sorted(scores)[telemetria.amostras_minimas_grupo - 1]
+
+
+def test_carregar_deriva_limiares_sem_os_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetria, "_registros", {})
+    monkeypatch.setattr(telemetria, "_limiares", {})
+    monkeypatch.setattr(telemetria, "_margens_calculadas", {})
+    registros = ([[0.4, None, "ausente"]] * 20 + [[0.6, None, "timeout"]] * 20
+                 + [[0.98, 0.5, "acerto"]] * 20)
+    caminho = tmp_path / "telemetria.json"
+    caminho.write_text(json.dumps({"main.png": registros}), encoding="utf-8")
+
+    telemetria.carregar(str(caminho))
+
+    assert telemetria._limiares == {"main.png": 0.69}
+    assert telemetria.limiar("main.png", 0.8) == pytest.approx(0.69)
+    # O limiar derivado não se afasta mais que ajuste_maximo do limiar do código
+    assert telemetria.limiar("main.png", 0.9) == pytest.approx(0.9 - telemetria.ajuste_maximo)
+    assert telemetria.limiar("outra.png", 0.8) == 0.8
+
+
+def test_margem_so_nos_primeiros_acertos(monkeypatch):
+    monkeypatch.setattr(telemetria, "_margens_calculadas", {})
+    pedidos = [telemetria.precisa_margem("main.png") for _ in range(telemetria.amostras_margem + 2)]
+
+    assert pedidos == [True] * telemetria.amostras_margem + [False, False]
@@ -0,0 +1,92 @@
+import os
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import pytest
+
+import templates
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    """Diretório de templates com duas imagens, e o registro zerado apontando para ele"""
+    gerador = np.random.default_rng(3)
+    for nome, forma in (("botao.png", (20, 50)), ("icone.png", (16, 16))):
+        cv2.imwrite(str(tmp_path / nome), gerador.integers(0, 256, forma, dtype=np.uint8))
+    monkeypatch.setattr(templates, "diretorio_templates", str(tmp_path))
+    monkeypatch.setattr(templates, "usar_pacote", True)
+    monkeypatch.setattr(templates, "escala", 1.0)
+    monkeypatch.setattr(templates, "_arquivos", None)
+    monkeypatch.setattr(templates, "_pacote", None)
+    monkeypatch.setattr(templates, "_templates", OrderedDict())
+    monkeypatch.setattr(templates, "_memoria_usada", 0)
+    return tmp_path
+
+
+def _reabrir(monkeypatch):
+    """Simula uma nova execução: o registro volta a indexar o diretório e abrir o pacote"""
+    monkeypatch.setattr(templates, "_arquivos", None)
+    monkeypatch.setattr(templates, "_pacote", None)
+    templates._templates.clear()
+
+
+def test_pacote_guarda_os_templates_em_escala_de_cinza(diretorio):
+    caminho = templates.construir_pacote()
+    _, pacote = templates.abrir_pacote(caminho)
+
+    assert caminho == os.path.join(str(diretorio), "templates.pack")
+    assert sorted(pacote) == ["botao.png", "icone.png"]
+    for nome, template in pacote.items():
+        assert isinstance(template.base, np.memmap)
+        np.testing.assert_array_equal(template, cv2.imread(str(diretorio / nome), cv2.IMREAD_GRAYSCALE))
+
+
+def test_templates_vem_do_pacote_sem_decodificar(diretorio):
+    template = templates.obter_template("botao.png")
+
+    assert os.path.exists(diretorio / "templates.pack")
+    assert isinstance(template.base, np.memmap)
+    assert not templates._templates
+
+
+def test_pacote_e_reconstruido_quando_uma_imagem_muda(diretorio, monkeypatch):
+    templates.obter_template("botao.png")
+    assinatura_antiga, _ = templates.abrir_pacote()
+
+    nova = np.full((20, 50), 7, dtype=np.uint8)
+    cv2.imwrite(str(diretorio / "botao.png"), nova)
+    _reabrir(monkeypatch)
+    template = templates.obter_template("botao.png")
+
+    assert templates.abrir_pacote()[0] != assinatura_antiga
+    np.testing.assert_array_equal(template, nova)
+
+
+def test_pacote_e_reconstruido_quando_uma_imagem_e_adicionada(diretorio, monkeypatch):
+    templates.carregar_templates()
+    cv2.imwrite(str(diretorio / "novo.png"), np.zeros((10, 10), dtype=np.uint8))
+    _reabrir(monkeypatch)
+
+    assert templates.obter_template("novo.png") is not None
+    assert "novo.png" in templates.abrir_pacote()[1]
+
+
+def test_pacote_invalido_e_ignorado(diretorio):
+    (diretorio / "templates.pack").write_bytes(b"lixo")
+
+    assert templates.abrir_pacote() == (None, {})
+    # O registro reconstrói o pacote
+    assert templates.obter_template("icone.png").shape == (16, 16)
+    assert templates.abrir_pacote()[0] is not None
+
+
+def test_cada_escala_tem_o_seu_pacote(diretorio):
+    templates.definir_escala(1.25)
+    try:
+        template = templates.obter_template("botao.png")
+    finally:
+        templates.definir_escala(1.0)
+
+    assert template.shape == (25, 62)
+    assert os.path.exists(diretorio / "templates@1.25.pack")